@@ -0,0 +1,106 @@
+"""Move item JSON out of collections.description
+
+Revision ID: 3f5b8c2d9e71
+Revises: 1a889361c9d1
+Create Date: 2026-10-18 12:00:00.000000
+
+Clients used to store the full item list as a JSON array in
+collections.description. Edits only ever rewrote that JSON, so it is the
+source of truth: each such collection's items rows are rebuilt from it
+(including the svg the items table could not hold before) and the
+description is cleared.
+"""
+import json
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3f5b8c2d9e71'
+down_revision: str | None = '1a889361c9d1'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+collections = sa.table(
+    'collections',
+    sa.column('collection_id', sa.Integer),
+    sa.column('description', sa.String),
+)
+items = sa.table(
+    'items',
+    sa.column('item_id', sa.Integer),
+    sa.column('collection_id', sa.Integer),
+    sa.column('name', sa.String),
+    sa.column('count', sa.Integer),
+    sa.column('svg', sa.String),
+)
+
+
+def upgrade() -> None:
+    op.add_column('items', sa.Column('svg', sa.String(), nullable=True))
+
+    bind = op.get_bind()
+    collection_ids = bind.execute(
+        sa.select(collections.c.collection_id).where(collections.c.description.like('[%'))
+    ).scalars().all()
+
+    for collection_id in collection_ids:
+        description = bind.execute(
+            sa.select(collections.c.description).where(collections.c.collection_id == collection_id)
+        ).scalar_one()
+        try:
+            items_data = json.loads(description)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(items_data, list):
+            continue
+
+        rows = []
+        for item in items_data:
+            if isinstance(item, str):
+                item = {'name': item}
+            if not isinstance(item, dict) or 'name' not in item:
+                continue
+            rows.append({
+                'collection_id': collection_id,
+                'name': str(item['name']),
+                'count': item.get('count') or 1,
+                'svg': item.get('svg'),
+            })
+
+        bind.execute(items.delete().where(items.c.collection_id == collection_id))
+        if rows:
+            bind.execute(items.insert(), rows)
+        bind.execute(
+            collections.update()
+            .where(collections.c.collection_id == collection_id)
+            .values(description='')
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    collection_ids = bind.execute(
+        sa.select(collections.c.collection_id).where(collections.c.description == '')
+    ).scalars().all()
+
+    for collection_id in collection_ids:
+        rows = bind.execute(
+            sa.select(items.c.name, items.c.count, items.c.svg)
+            .where(items.c.collection_id == collection_id)
+            .order_by(items.c.item_id)
+        ).all()
+        items_data = []
+        for name, count, svg in rows:
+            item = {'name': name, 'count': count}
+            if svg is not None:
+                item['svg'] = svg
+            items_data.append(item)
+        bind.execute(
+            collections.update()
+            .where(collections.c.collection_id == collection_id)
+            .values(description=json.dumps(items_data))
+        )
+
+    op.drop_column('items', 'svg')
@@ -0,0 +1,48 @@
+"""Search indexes for public collections
+
+Revision ID: 5c7a9e3d1f08
+Revises: 8d4e6a1b2c35
+Create Date: 2026-10-18 13:00:00.000000
+
+Postgres: pg_trgm, a generated tsvector column with a GIN index, and
+trigram GIN indexes on collection names and creator columns.
+SQLite: an FTS5 trigram table kept in sync by triggers, backfilled here.
+"""
+from typing import Sequence
+
+from alembic import op
+
+from search import POSTGRES_DDL, POSTGRES_DROP, SQLITE_BACKFILL, SQLITE_DDL, SQLITE_DROP
+
+# revision identifiers, used by Alembic.
+revision: str = '5c7a9e3d1f08'
+down_revision: str | None = '8d4e6a1b2c35'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_collections_user_id', 'collections', ['user_id'])
+
+    # The same statements create_all runs, defined once in search.py
+    if op.get_bind().dialect.name == 'postgresql':
+        statements = POSTGRES_DDL
+    elif op.get_bind().dialect.name == 'sqlite':
+        statements = SQLITE_DDL + [SQLITE_BACKFILL]
+    else:
+        statements = []
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        statements = POSTGRES_DROP
+    elif op.get_bind().dialect.name == 'sqlite':
+        statements = SQLITE_DROP
+    else:
+        statements = []
+    for statement in statements:
+        op.execute(statement)
+
+    op.drop_index('ix_collections_user_id', table_name='collections')
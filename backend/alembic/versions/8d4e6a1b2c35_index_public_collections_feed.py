@@ -0,0 +1,28 @@
+"""Index collections for the keyset-paginated public feed
+
+Revision ID: 8d4e6a1b2c35
+Revises: 3f5b8c2d9e71
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4e6a1b2c35'
+down_revision: str | None = '3f5b8c2d9e71'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_collections_status_created_at_id',
+        'collections',
+        ['status', 'created_at', 'collection_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_collections_status_created_at_id', table_name='collections')
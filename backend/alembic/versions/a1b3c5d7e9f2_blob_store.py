@@ -0,0 +1,34 @@
+"""Store feedback images in a content-addressed blob store
+
+Revision ID: a1b3c5d7e9f2
+Revises: f5a7c9e2b6d8
+Create Date: 2026-10-18 19:00:00.000000
+
+Uploaded images are now stored once per SHA-256 under BLOB_STORE_DIR. The
+blobs table records each file whose upload was committed;
+scripts/gc_blobs.py deletes the ones no feedback refers to. Files already in the old upload
+directory are left where they are; existing feedback still points at them.
+"""
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1b3c5d7e9f2'
+down_revision: str | None = 'f5a7c9e2b6d8'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'blobs',
+        sa.Column('sha256', sa.String(), primary_key=True),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('blobs')
@@ -0,0 +1,39 @@
+"""Store item count and weight on collections
+
+Revision ID: b7e2f4a6c913
+Revises: 5c7a9e3d1f08
+Create Date: 2026-10-18 14:00:00.000000
+
+collections.item_count and collections.item_weight (the sum of
+items.count) are kept up to date by the application alongside the items
+table. Existing rows are backfilled here; scripts/backfill_item_stats.py
+repairs them later if they drift.
+"""
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2f4a6c913'
+down_revision: str | None = '5c7a9e3d1f08'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('collections', sa.Column('item_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('collections', sa.Column('item_weight', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE collections SET "
+        "item_count = (SELECT count(*) FROM items WHERE items.collection_id = collections.collection_id), "
+        "item_weight = (SELECT coalesce(sum(coalesce(items.count, 1)), 0) FROM items "
+        "WHERE items.collection_id = collections.collection_id)"
+    )
+
+
+def downgrade() -> None:
+    # Not batch mode: rebuilding the table on SQLite would break the search
+    # triggers that reference it. SQLite 3.35+ drops columns in place.
+    op.drop_column('collections', 'item_weight')
+    op.drop_column('collections', 'item_count')
@@ -0,0 +1,112 @@
+"""Roll completion records up into user_collection_stats
+
+Revision ID: c4d1e8f2a7b5
+Revises: b7e2f4a6c913
+Create Date: 2026-10-18 15:00:00.000000
+
+One row per (user, collection) with the completion count, first and last
+completion times and day streaks. The application updates it with every
+new completion; existing history is folded in here.
+"""
+from typing import Sequence
+
+from alembic import op
+import pytz
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d1e8f2a7b5'
+down_revision: str | None = 'b7e2f4a6c913'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+MOUNTAIN = pytz.timezone('America/Denver')
+
+# Rows fetched, and streaks written, per round trip during the backfill
+STREAM_ROWS = 1000
+
+completion_records = sa.table(
+    'completion_records',
+    sa.column('user_id', sa.Integer),
+    sa.column('collection_id', sa.Integer),
+    sa.column('completed_at', sa.DateTime),
+)
+
+
+def upgrade() -> None:
+    stats = op.create_table(
+        'user_collection_stats',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.user_id'), primary_key=True),
+        sa.Column('collection_id', sa.Integer(), sa.ForeignKey('collections.collection_id'), primary_key=True),
+        sa.Column('completion_count', sa.Integer(), nullable=False),
+        sa.Column('first_completed_at', sa.DateTime(), nullable=False),
+        sa.Column('last_completed_at', sa.DateTime(), nullable=False),
+        sa.Column('current_streak', sa.Integer(), nullable=False),
+        sa.Column('longest_streak', sa.Integer(), nullable=False),
+        sa.Column('last_streak_day', sa.Integer(), nullable=False),
+    )
+
+    # Counts and first/last times in one pass inside the database
+    records = completion_records.c
+    op.execute(
+        stats.insert().from_select(
+            [
+                'user_id', 'collection_id', 'completion_count', 'first_completed_at',
+                'last_completed_at', 'current_streak', 'longest_streak', 'last_streak_day',
+            ],
+            sa.select(
+                records.user_id,
+                records.collection_id,
+                sa.func.count(),
+                sa.func.min(records.completed_at),
+                sa.func.max(records.completed_at),
+                sa.literal(0),
+                sa.literal(0),
+                sa.literal(0),
+            ).group_by(records.user_id, records.collection_id),
+        )
+    )
+
+    # Streaks count Mountain Time days, which is simplest in Python: stream
+    # the records in order, a batch at a time, and write each finished
+    # group's streak back. completed_at is stored as UTC.
+    update = (
+        stats.update()
+        .where(stats.c.user_id == sa.bindparam('b_user_id'), stats.c.collection_id == sa.bindparam('b_collection_id'))
+        .values(
+            current_streak=sa.bindparam('current_streak'),
+            longest_streak=sa.bindparam('longest_streak'),
+            last_streak_day=sa.bindparam('last_streak_day'),
+        )
+    )
+    bind = op.get_bind()
+    result = bind.execute(
+        sa.select(records.user_id, records.collection_id, records.completed_at)
+        .order_by(records.user_id, records.collection_id, records.completed_at)
+        .execution_options(yield_per=STREAM_ROWS)
+    )
+    pending = []
+    streak = None
+    for user_id, collection_id, completed_at in result:
+        utc = completed_at if completed_at.tzinfo else pytz.UTC.localize(completed_at)
+        day = utc.astimezone(MOUNTAIN).date().toordinal()
+        if streak is None or (streak['b_user_id'], streak['b_collection_id']) != (user_id, collection_id):
+            if len(pending) >= STREAM_ROWS:
+                bind.execute(update, pending)
+                pending = []
+            streak = {'b_user_id': user_id, 'b_collection_id': collection_id,
+                      'current_streak': 1, 'longest_streak': 1, 'last_streak_day': day}
+            pending.append(streak)
+            continue
+        if day == streak['last_streak_day'] + 1:
+            streak['current_streak'] += 1
+        elif day != streak['last_streak_day']:
+            streak['current_streak'] = 1
+        streak['longest_streak'] = max(streak['longest_streak'], streak['current_streak'])
+        streak['last_streak_day'] = day
+    if pending:
+        bind.execute(update, pending)
+
+
+def downgrade() -> None:
+    op.drop_table('user_collection_stats')
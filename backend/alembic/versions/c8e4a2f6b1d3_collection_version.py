@@ -0,0 +1,28 @@
+"""Version collections for ETags
+
+Revision ID: c8e4a2f6b1d3
+Revises: a1b3c5d7e9f2
+Create Date: 2026-10-18 20:00:00.000000
+
+collections.version is bumped by every write to a collection or its
+items. The collection read endpoints derive their ETags from it.
+"""
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e4a2f6b1d3'
+down_revision: str | None = 'a1b3c5d7e9f2'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('collections', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    # Not batch mode, for the search triggers; see b7e2f4a6c913
+    op.drop_column('collections', 'version')
@@ -0,0 +1,28 @@
+"""Count how often each feedback outbox row was claimed
+
+Revision ID: d3f5b7c9e1a4
+Revises: c8e4a2f6b1d3
+Create Date: 2026-10-18 21:00:00.000000
+
+A row claimed before may already have its GitHub issue, created just
+before a crash, so the dispatcher looks for that issue before creating
+another.
+"""
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f5b7c9e1a4'
+down_revision: str | None = 'c8e4a2f6b1d3'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('feedback_outbox', sa.Column('claims', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('feedback_outbox', 'claims')
@@ -0,0 +1,79 @@
+"""Link subscribed collections to their source
+
+Revision ID: d9a3b5c7e1f4
+Revises: c4d1e8f2a7b5
+Create Date: 2026-10-18 16:00:00.000000
+
+Subscriptions used to be recognised by a matching collection name.
+collections.source_collection_id records the public collection a copy was
+made from, and a unique index on (user_id, source_collection_id) allows one
+copy per user.
+
+Existing copies are linked by what subscribing used to copy: a
+non-public collection with the same name, description and category as
+another user's public collection created no later than it. Where several
+public collections match, the oldest is taken, and a user's earliest
+matching copy is the one linked.
+"""
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9a3b5c7e1f4'
+down_revision: str | None = 'c4d1e8f2a7b5'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+# Public collections a copy could have been subscribed from
+SOURCES = """
+FROM collections AS source
+WHERE source.status = 'public'
+  AND source.user_id <> collections.user_id
+  AND source.name = collections.name
+  AND source.description = collections.description
+  AND source.category = collections.category
+  AND source.created_at <= collections.created_at
+"""
+
+BACKFILL = f"""
+UPDATE collections
+SET source_collection_id = (SELECT min(source.collection_id) {SOURCES})
+WHERE status <> 'public'
+  AND EXISTS (SELECT 1 {SOURCES})
+  AND collection_id = (
+      SELECT min(earlier.collection_id) FROM collections AS earlier
+      WHERE earlier.user_id = collections.user_id
+        AND earlier.status <> 'public'
+        AND earlier.name = collections.name
+        AND earlier.description = collections.description
+        AND earlier.category = collections.category
+  )
+"""
+
+
+def upgrade() -> None:
+    op.add_column('collections', sa.Column('source_collection_id', sa.Integer(), nullable=True))
+    op.execute(BACKFILL)
+    # SQLite can't add a constraint to an existing table without rebuilding
+    # it, which would break the search triggers
+    if op.get_bind().dialect.name != 'sqlite':
+        op.create_foreign_key(
+            'fk_collections_source_collection_id', 'collections', 'collections',
+            ['source_collection_id'], ['collection_id'],
+        )
+    op.create_index(
+        'ux_collections_user_id_source_collection_id',
+        'collections',
+        ['user_id', 'source_collection_id'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ux_collections_user_id_source_collection_id', table_name='collections')
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_constraint('fk_collections_source_collection_id', 'collections', type_='foreignkey')
+    op.drop_column('collections', 'source_collection_id')
@@ -0,0 +1,47 @@
+"""Let subscribed collections share their source's items
+
+Revision ID: e2c6f8a1d4b7
+Revises: d9a3b5c7e1f4
+Create Date: 2026-10-18 17:00:00.000000
+
+collections.items_source_id points a subscribed collection at the
+collection whose items rows it reads. It gets its own rows only when
+either side edits them. Existing subscriptions already own copies and are
+left as they are.
+"""
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c6f8a1d4b7'
+down_revision: str | None = 'd9a3b5c7e1f4'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column('collections', sa.Column('items_source_id', sa.Integer(), nullable=True))
+    # SQLite can't add a constraint to an existing table without rebuilding
+    # it, which would break the search triggers
+    if op.get_bind().dialect.name != 'sqlite':
+        op.create_foreign_key(
+            'fk_collections_items_source_id', 'collections', 'collections',
+            ['items_source_id'], ['collection_id'],
+        )
+    op.create_index('ix_collections_items_source_id', 'collections', ['items_source_id'])
+
+
+def downgrade() -> None:
+    # Give every sharing collection its own rows before dropping the link
+    op.execute(
+        "INSERT INTO items (name, collection_id, count, svg) "
+        "SELECT i.name, c.collection_id, i.count, i.svg "
+        "FROM items i JOIN collections c ON c.items_source_id = i.collection_id "
+        "ORDER BY c.collection_id, i.item_id"
+    )
+    op.drop_index('ix_collections_items_source_id', table_name='collections')
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_constraint('fk_collections_items_source_id', 'collections', type_='foreignkey')
+    op.drop_column('collections', 'items_source_id')
@@ -0,0 +1,44 @@
+"""Queue GitHub issues for feedback in an outbox table
+
+Revision ID: f5a7c9e2b6d8
+Revises: e2c6f8a1d4b7
+Create Date: 2026-10-18 18:00:00.000000
+
+Feedback used to create its GitHub issue inside the request. Each
+submission now adds a feedback_outbox row in the same transaction and a
+background dispatcher creates the issues.
+"""
+from typing import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5a7c9e2b6d8'
+down_revision: str | None = 'e2c6f8a1d4b7'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'feedback_outbox',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('feedback_id', sa.Integer(), sa.ForeignKey('feedback.id'), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.Column('issue_number', sa.Integer(), nullable=True),
+    )
+    op.create_index(
+        'ix_feedback_outbox_status_next_attempt_at',
+        'feedback_outbox',
+        ['status', 'next_attempt_at'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_feedback_outbox_status_next_attempt_at', table_name='feedback_outbox')
+    op.drop_table('feedback_outbox')
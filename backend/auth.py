@@ -0,0 +1,274 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Set, Tuple
+
+import requests
+from jose import jwk
+from sqlalchemy import or_
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session, select
+
+from crud import UPSERT_INSERTS
+from models import User
+
+logger = logging.getLogger(__name__)
+
+JWKS_TTL_SECONDS = 600
+JWKS_REFRESH_AHEAD_SECONDS = 60
+JWKS_MIN_REFETCH_INTERVAL = 30
+JWKS_FETCH_TIMEOUT = 5
+
+PRINCIPAL_CACHE_SIZE = 1024
+# Upper bound on how long a cached principal is trusted. Invalidation is
+# per-process, so this caps staleness for writes made by other workers.
+PRINCIPAL_MAX_TTL_SECONDS = 60
+
+
+def fetch_jwks(jwks_url: str) -> dict:
+    response = requests.get(jwks_url, timeout=JWKS_FETCH_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+class JWKSCache:
+    """Process-wide cache of Auth0 signing keys, indexed by ``kid``.
+
+    Keys are parsed with ``jwk.construct`` once per fetch instead of once per
+    request. Entries are served until ``ttl`` expires; within
+    ``refresh_ahead`` seconds of expiry a background refresh is started so
+    requests keep using the current keys while the new set is fetched. An
+    unknown ``kid`` (key rotation) triggers at most one refetch, rate limited
+    by ``min_refetch_interval`` so forged tokens can't hammer Auth0.
+
+    ``fetcher`` replaces the HTTP fetch, which lets tests serve a local JWKS.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        ttl: float = JWKS_TTL_SECONDS,
+        refresh_ahead: float = JWKS_REFRESH_AHEAD_SECONDS,
+        min_refetch_interval: float = JWKS_MIN_REFETCH_INTERVAL,
+        fetcher: Optional[Callable[[str], dict]] = None,
+    ):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.min_refetch_interval = min_refetch_interval
+        self.fetcher = fetcher or fetch_jwks
+        self._keys: Dict[str, object] = {}
+        self._algorithms: Dict[str, str] = {}
+        self._fetched_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refresh_task: Optional[asyncio.Future] = None
+
+    def _expires_at(self) -> float:
+        if self._fetched_at is None:
+            return float("-inf")
+        return self._fetched_at + self.ttl
+
+    def refresh(self, stale_before: Optional[float] = None) -> None:
+        """Fetch the key set and swap it in. Blocking; run it off the event loop.
+
+        When ``stale_before`` is given the fetch is skipped if another caller
+        already refreshed after that moment, so a burst of requests at expiry
+        results in a single fetch.
+        """
+        with self._lock:
+            if stale_before is not None and self._fetched_at is not None and self._fetched_at > stale_before:
+                return
+            jwks = self.fetcher(self.jwks_url)
+            keys = {}
+            algorithms = {}
+            for key in jwks.get("keys", []):
+                if key.get("use", "sig") != "sig" or "kid" not in key:
+                    continue
+                alg = key.get("alg", "RS256")
+                try:
+                    keys[key["kid"]] = jwk.construct(key, alg)
+                except Exception as e:
+                    logger.warning("Skipping unusable JWKS key %s: %s", key['kid'], type(e).__name__)
+                    continue
+                algorithms[key["kid"]] = alg
+            self._keys = keys
+            self._algorithms = algorithms
+            self._fetched_at = time.monotonic()
+            logger.info("Loaded %s signing keys from JWKS", len(keys))
+
+    def _schedule_background_refresh(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        loop = asyncio.get_running_loop()
+        self._refresh_task = loop.run_in_executor(None, self._refresh_quietly)
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            # Keep serving the previous keys until they expire
+            logger.error("Background JWKS refresh failed: %s", type(e).__name__)
+
+    async def get_key(self, kid: str):
+        """Return ``(key, algorithm)`` for ``kid`` or ``(None, None)`` if unknown."""
+        now = time.monotonic()
+        if now >= self._expires_at():
+            try:
+                await asyncio.to_thread(self.refresh, now)
+            except Exception:
+                if not self._keys:
+                    raise
+                # Auth0 is unreachable: stale keys beat rejecting every request.
+                # Back off so we don't retry the fetch on every call.
+                logger.error("JWKS refresh failed, serving expired keys")
+                self._fetched_at = time.monotonic() - self.ttl + self.min_refetch_interval
+        elif now >= self._expires_at() - self.refresh_ahead:
+            self._schedule_background_refresh()
+
+        now = time.monotonic()
+        if kid not in self._keys and now - self._fetched_at >= self.min_refetch_interval:
+            # Possibly a rotated key: refetch once before rejecting
+            await asyncio.to_thread(self.refresh, now)
+
+        return self._keys.get(kid), self._algorithms.get(kid)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys = {}
+            self._algorithms = {}
+            self._fetched_at = None
+
+
+class PrincipalCache:
+    """Bounded LRU mapping a bearer token digest to the user it resolved to.
+
+    A hit skips signature verification, claims checks and the user lookup.
+    Entries live until the token's ``exp`` or ``max_ttl``, whichever is
+    sooner, and are dropped for a user whenever that user is written to.
+    Only a SHA-256 digest of the token is kept, never the token itself.
+    """
+
+    def __init__(self, maxsize: int = PRINCIPAL_CACHE_SIZE, max_ttl: float = PRINCIPAL_MAX_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self.digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            values, expires_at = entry
+            if time.time() >= expires_at:
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return values
+
+    def put(self, token: str, values: dict, exp: Optional[float] = None) -> None:
+        now = time.time()
+        expires_at = now + self.max_ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now:
+            return
+        key = self.digest(token)
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (values, expires_at)
+            self._by_user.setdefault(values["user_id"], set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_id = entry[0]["user_id"]
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+
+def snapshot_user(user: User) -> dict:
+    """Column values of ``user``, safe to keep across sessions."""
+    return {column.name: getattr(user, column.name) for column in User.__table__.columns}
+
+
+def attach_user(db: Session, values: dict) -> User:
+    """Rebuild a cached user inside ``db`` without issuing a SELECT."""
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def needs_display_name_repair(display_name: Optional[str], username: str) -> bool:
+    return not display_name or display_name == username or "|" in display_name
+
+
+def upsert_auth0_user(db: Session, username: str, email: Optional[str], display_name: str) -> User:
+    """Return the user for an Auth0 ``sub``, creating or repairing it atomically.
+
+    The common case (user exists with a usable display name) is a single
+    read. Otherwise one ``INSERT ... ON CONFLICT (username) DO UPDATE ...
+    RETURNING`` creates the row or fixes the display name, and only writes
+    when the stored name actually needs repairing, so concurrent first
+    logins can't trip the unique constraint on ``username``.
+    """
+    user = db.exec(select(User).where(User.username == username)).first()
+    if user is not None and not needs_display_name_repair(user.display_name, username):
+        return user
+
+    insert = UPSERT_INSERTS[db.get_bind().dialect.name]
+    stmt = insert(User).values(
+        username=username,
+        email=email,
+        display_name=display_name,
+        hashed_password="",
+        role="student",
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["username"],
+        set_={"display_name": stmt.excluded.display_name},
+        where=or_(
+            User.display_name.is_(None),
+            User.display_name == "",
+            User.display_name == User.username,
+            User.display_name.contains("|"),
+        ),
+    ).returning(User)
+    upserted = db.scalars(
+        select(User).from_statement(stmt),
+        execution_options={"populate_existing": True},
+    ).first()
+    db.commit()
+    if upserted is not None:
+        return upserted
+    # Another request repaired the row first; the WHERE skipped the update
+    return db.exec(select(User).where(User.username == username)).one()
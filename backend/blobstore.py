@@ -0,0 +1,151 @@
+"""Content-addressed storage for uploaded files.
+
+Every file is stored once, under its SHA-256, in a two-level sharded
+layout (``ab/cd/abcd...``) so no directory grows too large. Derived files,
+such as compressed copies of an image, sit next to their original with a
+suffix naming the variant. The ``blobs`` table records every blob whose
+upload was committed; ``scripts/gc_blobs.py`` deletes blobs no feedback
+refers to.
+"""
+import os
+import time
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional, Set
+
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from crud import UPSERT_INSERTS
+from models import Blob, Feedback
+
+BLOB_STORE_DIR = os.environ.get("BLOB_STORE_DIR", "uploads/blobs")
+
+
+class BlobStore:
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or BLOB_STORE_DIR
+
+    @property
+    def temp_dir(self) -> str:
+        # Inside the store so the final rename never crosses filesystems
+        return os.path.join(self.root, "tmp")
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def digest_of(self, path: str) -> Optional[str]:
+        """The digest a path in this store belongs to, if any."""
+        name = os.path.basename(path).split(".", 1)[0]
+        if len(name) == 64 and os.path.abspath(path).startswith(os.path.abspath(self.root) + os.sep):
+            return name
+        return None
+
+    def adopt(self, temp_path: str, digest: str) -> str:
+        """Move a finished temp file into place, or drop it if the blob exists."""
+        path = self.path(digest)
+        if os.path.exists(path):
+            os.remove(temp_path)
+            # Fresh mtime keeps the garbage collector off it until the new
+            # reference is committed
+            os.utime(path)
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        return path
+
+    def delete(self, digest: str) -> None:
+        """Remove a blob and every derivative of it."""
+        path = self.path(digest)
+        directory = os.path.dirname(path)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name == digest or name.startswith(digest + "."):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def modified_before(self, digest: str, cutoff: float) -> bool:
+        try:
+            return os.path.getmtime(self.path(digest)) < cutoff
+        except FileNotFoundError:
+            return True
+
+    def digests(self) -> Iterator[str]:
+        """Every blob on disk (derivatives and temp files excluded)."""
+        for shard, _, names in os.walk(self.root):
+            if os.path.abspath(shard).startswith(os.path.abspath(self.temp_dir)):
+                continue
+            for name in names:
+                if len(name) == 64 and "." not in name:
+                    yield name
+
+
+async def record_blobs(db: AsyncSession, blobs: Iterable[tuple]) -> None:
+    """Record each ``(digest, size)`` as a committed blob.
+
+    One multi-row insert however many files there are; blobs already
+    recorded are left as they are. The caller owns the transaction, which
+    should be the one that stores the referencing row.
+    """
+    blobs = set(blobs)
+    if not blobs:
+        return
+    insert = UPSERT_INSERTS[db.get_bind().dialect.name]
+    now = datetime.now(timezone.utc)
+    # Sorted so concurrent inserts lock shared rows in the same order
+    rows = [{"sha256": digest, "size": size, "created_at": now} for digest, size in sorted(blobs)]
+    await db.exec(insert(Blob.__table__).values(rows).on_conflict_do_nothing(index_elements=["sha256"]))
+
+
+def referenced_digests(db: Session, store: BlobStore) -> Set[str]:
+    """Digests of every blob a feedback row refers to."""
+    digests = set()
+    for image_paths in db.exec(select(Feedback.image_paths)):
+        for path in image_paths or []:
+            digest = store.digest_of(path)
+            if digest:
+                digests.add(digest)
+    return digests
+
+
+def collect_garbage(db: Session, store: BlobStore, grace_seconds: float = 24 * 3600) -> int:
+    """Delete blobs that nothing refers to. Returns how many went.
+
+    That is recorded blobs no feedback row refers to, files with no
+    ``blobs`` row (their request failed before committing), and abandoned
+    temp files. Anything touched within ``grace_seconds`` is left alone:
+    storing a file again refreshes its mtime before the new reference is
+    committed, so in-flight uploads are never collected.
+    """
+    cutoff = time.time() - grace_seconds
+    table = Blob.__table__
+    removed = 0
+
+    # Read before the mtimes are checked, so a reference committed after
+    # this shows up as a fresh mtime instead
+    referenced = referenced_digests(db, store)
+    for digest in db.exec(select(table.c.sha256)).all():
+        if digest in referenced or not store.modified_before(digest, cutoff):
+            continue
+        db.exec(table.delete().where(table.c.sha256 == digest))
+        db.commit()
+        store.delete(digest)
+        removed += 1
+
+    for digest in list(store.digests()):
+        if not store.modified_before(digest, cutoff):
+            continue
+        if db.exec(select(table.c.sha256).where(table.c.sha256 == digest)).first() is None:
+            store.delete(digest)
+            removed += 1
+
+    if os.path.isdir(store.temp_dir):
+        for name in os.listdir(store.temp_dir):
+            path = os.path.join(store.temp_dir, name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+    return removed
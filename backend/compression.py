@@ -0,0 +1,263 @@
+"""Response compression negotiated from ``Accept-Encoding``.
+
+zstd, brotli and gzip, preferred in that order among what the client
+accepts; zstd and brotli only when the ``zstandard`` and ``brotli``
+packages are installed. Only compressible media types at or above a
+minimum size are touched. Streamed bodies are compressed chunk by chunk
+and flushed as they go, so nothing is buffered. Compressed bodies of
+responses carrying an ETag are cached by (ETag, encoding), so an
+unchanged collection is compressed once, not on every poll.
+"""
+import asyncio
+import os
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+from response_cache import ResponseCache
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+COMPRESSION_MINIMUM_BYTES = int(os.environ.get("COMPRESSION_MINIMUM_BYTES", 1024))
+# Bodies this big are compressed on a worker thread, off the event loop
+COMPRESSION_THREAD_BYTES = 64 * 1024
+
+COMPRESSIBLE_TYPES = frozenset({
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+})
+
+
+class _GzipEncoder:
+    def __init__(self, level: int = 6):
+        # wbits=31 writes a gzip header and trailer rather than raw zlib
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int = 4):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int = 3):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encoders() -> Dict[str, type]:
+    """Supported encodings, most preferred first."""
+    encoders = {}
+    if zstandard is not None:
+        encoders["zstd"] = _ZstdEncoder
+    if brotli is not None:
+        encoders["br"] = _BrotliEncoder
+    encoders["gzip"] = _GzipEncoder
+    return encoders
+
+
+def negotiate(accept_encoding: Optional[str], encodings: Iterable[str]) -> Optional[str]:
+    """The encoding to use, or None to send the body as is.
+
+    Highest ``q`` wins; ties go to the order of ``encodings``.
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type.endswith("+json") or media_type in COMPRESSIBLE_TYPES
+
+
+async def _run(function, data: bytes) -> bytes:
+    if len(data) >= COMPRESSION_THREAD_BYTES:
+        return await asyncio.to_thread(function, data)
+    return function(data)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses the client can decode.
+
+    Responses that already have a ``Content-Encoding``, ask for
+    ``no-transform``, have no body (204, 304) or are not a compressible
+    media type pass through untouched.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MINIMUM_BYTES,
+        cache: Optional[ResponseCache] = None,
+        encoders: Optional[Dict[str, type]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache if cache is not None else ResponseCache(maxsize=512)
+        self.encoders = encoders or available_encoders()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+        encoding = negotiate(accept, self.encoders)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self))
+
+
+class _CompressingSend:
+    """The ``send`` the wrapped app sees; decides on the first body chunk."""
+
+    def __init__(self, send, encoding: str, middleware: CompressionMiddleware):
+        self.send = send
+        self.encoding = encoding
+        self.middleware = middleware
+        self.start = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = {name.lower(): value for name, value in message.get("headers", [])}
+            self.passthrough = (
+                message["status"] in (204, 304)
+                or b"content-encoding" in headers
+                or b"no-transform" in headers.get(b"cache-control", b"")
+                or not is_compressible(headers.get(b"content-type", b"").decode("latin-1"))
+            )
+            if self.passthrough:
+                await self.send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is None:
+            if not more_body:
+                await self._send_whole(body)
+                return
+            # Streaming: compress as it comes, without a Content-Length
+            self.encoder = self.middleware.encoders[self.encoding]()
+            await self.send(self._start(drop=(b"content-length",)))
+
+        chunk = await _run(self._stream_chunk, body)
+        if not more_body:
+            chunk += self.encoder.finish()
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _stream_chunk(self, data: bytes) -> bytes:
+        # Flushed every chunk so a slow stream still reaches the client
+        return self.encoder.compress(data) + self.encoder.flush()
+
+    def _compress_whole(self, data: bytes) -> bytes:
+        encoder = self.middleware.encoders[self.encoding]()
+        return encoder.compress(data) + encoder.finish()
+
+    async def _send_whole(self, body: bytes) -> None:
+        if len(body) < self.middleware.minimum_size:
+            await self.send(self._start(vary=True, compressed=False))
+            await self.send({"type": "http.response.body", "body": body})
+            return
+        etag = self._header(b"etag")
+        compressed = None
+        if etag is not None:
+            compressed = self.middleware.cache.get((etag, self.encoding), etag)
+        if compressed is None:
+            compressed = await _run(self._compress_whole, body)
+            if etag is not None:
+                self.middleware.cache.put((etag, self.encoding), etag, compressed)
+        start = self._start(drop=(b"content-length",))
+        start["headers"].append((b"content-length", str(len(compressed)).encode("latin-1")))
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": compressed})
+
+    def _header(self, name: bytes) -> Optional[bytes]:
+        for key, value in self.start.get("headers", []):
+            if key.lower() == name:
+                return value
+        return None
+
+    def _start(self, drop: Iterable[bytes] = (), vary: bool = True, compressed: bool = True) -> dict:
+        drop = set(drop)
+        headers: List[tuple] = []
+        for name, value in self.start.get("headers", []):
+            key = name.lower()
+            if key in drop:
+                continue
+            if compressed and key == b"etag" and not value.startswith(b"W/"):
+                # A different byte sequence than the identity response, so
+                # the validator becomes weak (If-None-Match compares weakly)
+                value = b"W/" + value
+            if vary and key == b"vary":
+                if b"accept-encoding" not in value.lower():
+                    value += b", Accept-Encoding"
+                vary = False
+            headers.append((name, value))
+        if vary:
+            headers.append((b"vary", b"Accept-Encoding"))
+        if compressed:
+            headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+        return {**self.start, "headers": headers}
@@ -0,0 +1,330 @@
+import json
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import delete, func, insert, literal, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import Collection, CollectionRead, Item, ItemPayload, User
+
+# How many item names list endpoints include per collection
+PREVIEW_ITEMS = 5
+
+# Dialects whose INSERT supports ON CONFLICT ... DO UPDATE ... RETURNING
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def parse_items_payload(items_data) -> List[ItemPayload]:
+    """Validate a raw item list. Plain strings are accepted as item names."""
+    if not isinstance(items_data, list):
+        raise ValueError("Items must be a list")
+    try:
+        return [
+            ItemPayload(name=item) if isinstance(item, str) else ItemPayload.model_validate(item)
+            for item in items_data
+        ]
+    except ValidationError as e:
+        raise ValueError(str(e))
+
+
+def split_legacy_description(description: Optional[str]) -> Tuple[Optional[str], Optional[List[ItemPayload]]]:
+    """Separate items from a description that still carries them as JSON.
+
+    Older clients send the whole item list as a JSON array in
+    ``description``. Returns ``("", items)`` for those and
+    ``(description, None)`` for a real description.
+    """
+    if not description or not description.lstrip().startswith("["):
+        return description, None
+    try:
+        items_data = json.loads(description)
+    except json.JSONDecodeError:
+        return description, None
+    return "", parse_items_payload(items_data)
+
+
+def item_rows(collection_id: int, items: Iterable[ItemPayload]) -> List[dict]:
+    """Turn the client's item payload into rows for the items table."""
+    return [
+        {
+            "name": item.name,
+            "collection_id": collection_id,
+            "count": item.count if item.count is not None else 1,
+            "svg": item.svg,
+        }
+        for item in items
+    ]
+
+
+def item_weight(count: Optional[int]) -> int:
+    """What an item contributes to ``Collection.item_weight``."""
+    return count if count is not None else 1
+
+
+async def adjust_item_stats(db: AsyncSession, collection_id: int, items: int, weight: int) -> None:
+    """Shift a collection's stored item count and weight by a delta.
+
+    Relative updates, so concurrent writers to the same collection don't
+    overwrite each other. Bumps ``Collection.version`` too, as every item
+    write comes through here. The caller owns the transaction.
+    """
+    if not items and not weight:
+        return
+    await db.exec(
+        update(Collection)
+        .where(Collection.collection_id == collection_id)
+        .values(
+            item_count=Collection.item_count + items,
+            item_weight=Collection.item_weight + weight,
+            version=Collection.version + 1,
+        )
+    )
+
+
+async def bulk_insert_items(db: AsyncSession, rows: List[dict]) -> List[int]:
+    """Insert item rows in one executemany and return the new ids, ascending.
+
+    SQLAlchemy batches the executemany into multi-row
+    ``INSERT ... VALUES ... RETURNING`` statements on both Postgres and
+    SQLite. It goes through the Core table rather than the ORM entity so no
+    per-row ORM bookkeeping happens. The owning collections' item stats are
+    bumped in the same transaction, which the caller owns.
+    """
+    if not rows:
+        return []
+    items = Item.__table__
+    # No sort_by_parameter_order: on SQLite it degrades to one row per statement
+    result = await db.exec(insert(items).returning(items.c.item_id), params=rows)
+    item_ids = sorted(result.scalars().all())
+
+    deltas: Dict[int, List[int]] = {}
+    for row in rows:
+        delta = deltas.setdefault(row["collection_id"], [0, 0])
+        delta[0] += 1
+        delta[1] += item_weight(row.get("count"))
+    for collection_id, (count, weight) in deltas.items():
+        await adjust_item_stats(db, collection_id, count, weight)
+    return item_ids
+
+
+async def delete_items(db: AsyncSession, collection_id: int, item_ids: Optional[Iterable[int]] = None) -> int:
+    """Delete a collection's items (all of them unless ``item_ids`` is given).
+
+    Returns how many rows went. The collection's item stats are lowered in
+    the same transaction, which the caller owns.
+    """
+    items = Item.__table__
+    statement = delete(items).where(items.c.collection_id == collection_id)
+    if item_ids is not None:
+        statement = statement.where(items.c.item_id.in_(list(item_ids)))
+    result = await db.exec(statement.returning(items.c.count))
+    counts = result.scalars().all()
+    await adjust_item_stats(db, collection_id, -len(counts), -sum(item_weight(count) for count in counts))
+    return len(counts)
+
+
+async def replace_items(db: AsyncSession, collection_id: int, items: List[ItemPayload]) -> List[int]:
+    """Swap a collection's items for ``items``. The caller owns the transaction."""
+    if not await prepare_items_write(db, collection_id, copy=False):
+        await delete_items(db, collection_id)
+    return await bulk_insert_items(db, item_rows(collection_id, items))
+
+
+def items_owner_id(collection: Collection) -> int:
+    """Id of the collection whose rows in the items table hold ``collection``'s items."""
+    if collection.items_source_id is not None:
+        return collection.items_source_id
+    return collection.collection_id
+
+
+def items_owner_subquery(collection_id: int):
+    """``items_owner_id`` as a scalar subquery, for resolving in the same statement."""
+    return (
+        select(func.coalesce(Collection.items_source_id, Collection.collection_id))
+        .where(Collection.collection_id == collection_id)
+        .scalar_subquery()
+    )
+
+
+async def copy_items(
+    db: AsyncSession, source_collection_id: int, target_collection_id: int, exclude_item_ids: Iterable[int] = ()
+) -> int:
+    """Copy the items of one collection into another with ``INSERT ... SELECT``.
+
+    The rows never leave the database. Returns how many were copied; the
+    caller sets the target's item stats and owns the transaction.
+    """
+    items = Item.__table__
+    rows = (
+        select(items.c.name, literal(target_collection_id), items.c.count, items.c.svg)
+        .where(items.c.collection_id == source_collection_id)
+        .order_by(items.c.item_id)
+    )
+    exclude_item_ids = list(exclude_item_ids)
+    if exclude_item_ids:
+        rows = rows.where(items.c.item_id.not_in(exclude_item_ids))
+    result = await db.exec(insert(items).from_select(["name", "collection_id", "count", "svg"], rows))
+    return result.rowcount
+
+
+async def lock_collections(db: AsyncSession, *criteria) -> List[int]:
+    """Lock the matching collection rows until the transaction ends.
+
+    ``SELECT ... FOR UPDATE`` on Postgres. SQLite has no row locks and
+    ignores it; a write there locks the whole database instead. Returns the
+    locked ids.
+    """
+    result = await db.exec(
+        select(Collection.collection_id).where(*criteria).order_by(Collection.collection_id).with_for_update()
+    )
+    return result.all()
+
+
+async def detach_references(db: AsyncSession, collection_id: int) -> None:
+    """Give every collection reading its items from this one a private copy.
+
+    Called before this collection's items change or it is deleted, so
+    subscribers keep the items they subscribed to. All referencing
+    collections are copied in one ``INSERT ... SELECT``; their stored item
+    stats already describe these items.
+    """
+    # Locked source first, then its references: subscribing takes the
+    # source's lock too, so no new reference can appear until commit
+    await lock_collections(db, Collection.collection_id == collection_id)
+    if not await lock_collections(db, Collection.items_source_id == collection_id):
+        return
+    items = Item.__table__
+    collections = Collection.__table__
+    rows = (
+        select(items.c.name, collections.c.collection_id, items.c.count, items.c.svg)
+        .select_from(items.join(collections, collections.c.items_source_id == items.c.collection_id))
+        .where(items.c.collection_id == collection_id)
+        .order_by(collections.c.collection_id, items.c.item_id)
+    )
+    await db.exec(insert(items).from_select(["name", "collection_id", "count", "svg"], rows))
+    # New item ids for the copies, so new versions too
+    await db.exec(
+        update(Collection)
+        .where(Collection.items_source_id == collection_id)
+        .values(items_source_id=None, version=Collection.version + 1)
+    )
+
+
+async def prepare_items_write(
+    db: AsyncSession, collection_id: int, copy: bool = True, exclude_item_ids: Iterable[int] = ()
+) -> bool:
+    """Make ``collection_id`` own its item rows before they are written.
+
+    Referencing collections are detached first. If the collection itself
+    reads another's items, it gets its own copy (without
+    ``exclude_item_ids``), or no rows at all when ``copy`` is false because
+    the caller is about to replace them. Returns whether the collection was
+    a reference. The caller owns the transaction.
+    """
+    await detach_references(db, collection_id)
+    result = await db.exec(select(Collection.items_source_id).where(Collection.collection_id == collection_id))
+    source_id = result.first()
+    if source_id is None:
+        return False
+
+    exclude_item_ids = list(exclude_item_ids)
+    values = {"items_source_id": None, "version": Collection.version + 1}
+    if copy:
+        await copy_items(db, source_id, collection_id, exclude_item_ids)
+    else:
+        values.update(item_count=0, item_weight=0)
+    await db.exec(update(Collection).where(Collection.collection_id == collection_id).values(**values))
+    if copy and exclude_item_ids:
+        await db.exec(refresh_item_stats_statement([collection_id]))
+    return True
+
+
+def refresh_item_stats_statement(collection_ids: Optional[Iterable[int]] = None):
+    """``UPDATE`` recomputing stored item stats from the items table.
+
+    Used to backfill and repair the columns; request paths adjust them
+    incrementally instead.
+    """
+    owner = func.coalesce(Collection.items_source_id, Collection.collection_id)
+    counted = (
+        select(func.count(Item.item_id))
+        .where(Item.collection_id == owner)
+        .scalar_subquery()
+    )
+    weighed = (
+        select(func.coalesce(func.sum(func.coalesce(Item.count, 1)), 0))
+        .where(Item.collection_id == owner)
+        .scalar_subquery()
+    )
+    statement = update(Collection).values(item_count=counted, item_weight=weighed, version=Collection.version + 1)
+    if collection_ids is not None:
+        statement = statement.where(Collection.collection_id.in_(list(collection_ids)))
+    return statement.execution_options(synchronize_session=False)
+
+
+# CollectionRead's fields that come straight from a row; previews are added
+SUMMARY_FIELDS = tuple(name for name in CollectionRead.model_fields if name != "preview_items")
+
+
+def summary_columns(with_creator: bool = False) -> list:
+    """What to select for ``summarize_collections`` as plain rows.
+
+    Plain rows skip building ORM objects altogether. With ``with_creator``
+    the creator's names come from the user row, which the caller joins.
+    """
+    columns = [getattr(Collection, name) for name in SUMMARY_FIELDS]
+    if with_creator:
+        columns = [
+            column for column in columns
+            if column.key not in ("creator_display_name", "creator_username")
+        ]
+        columns += [User.display_name.label("creator_display_name"), User.username.label("creator_username")]
+    return columns + [Collection.items_source_id]
+
+
+async def preview_items(db: AsyncSession, owner_ids: Iterable[int], preview: int = PREVIEW_ITEMS) -> Dict[int, List[str]]:
+    """The first ``preview`` item names of each collection, in one windowed query."""
+    previews: Dict[int, List[str]] = {owner: [] for owner in owner_ids}
+    if previews:
+        ranked = (
+            select(
+                Item.collection_id,
+                Item.name,
+                func.row_number().over(partition_by=Item.collection_id, order_by=Item.item_id).label("position"),
+            )
+            .where(Item.collection_id.in_(list(previews)))
+            .subquery()
+        )
+        result = await db.exec(
+            select(ranked.c.collection_id, ranked.c.name)
+            .where(ranked.c.position <= preview)
+            .order_by(ranked.c.collection_id, ranked.c.position)
+        )
+        for collection_id, name in result.all():
+            previews[collection_id].append(name)
+    return previews
+
+
+async def summarize_collections(
+    db: AsyncSession, collections: Sequence, preview: int = PREVIEW_ITEMS
+) -> List[dict]:
+    """Build list responses carrying an item count and the first few item names.
+
+    ``collections`` are rows of ``summary_columns()`` (ORM objects work too).
+    The results are plain dicts shaped like ``CollectionRead``, ready to
+    serialize without another round of validation. The count is the stored
+    ``Collection.item_count``; the previews take one windowed query for the
+    whole page, however many collections or items.
+    """
+    previews = await preview_items(db, {items_owner_id(collection) for collection in collections}, preview)
+    summaries = []
+    for collection in collections:
+        summary = {name: getattr(collection, name) for name in SUMMARY_FIELDS}
+        summary["preview_items"] = previews[items_owner_id(collection)]
+        summaries.append(summary)
+    return summaries
@@ -0,0 +1,178 @@
+"""Connection pool and query metrics for SQLAlchemy engines.
+
+``TimedQueuePool`` and ``TimedAsyncQueuePool`` time every checkout,
+including waiting for a free connection and opening a new one.
+``instrument_engine`` adds pool gauges and times each statement, labelled
+by a fingerprint of its SQL with literals and placeholder lists collapsed.
+Pools are labelled by ``pool_logging_name``, which survives the pool
+being recreated.
+
+``track_queries`` also counts the statements and database time of the
+code running inside it, which is how requests get their Server-Timing
+header and statement budget.
+"""
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Iterator, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from metrics import Counter, Gauge, Histogram
+
+# Past this many distinct fingerprints new ones are counted as "other",
+# so a stray dynamic statement can't blow up the label set
+MAX_FINGERPRINTS = 500
+FINGERPRINT_LENGTH = 200
+
+CHECKOUT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+pool_checkouts = Counter("db_pool_checkouts", "Connections checked out of the pool", ["pool"])
+pool_timeouts = Counter("db_pool_timeouts", "Checkouts that gave up waiting for a connection", ["pool"])
+pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "Time to get a connection from the pool, including waiting and connecting",
+    ["pool"],
+    buckets=CHECKOUT_BUCKETS,
+)
+pool_size = Gauge("db_pool_size", "Connections the pool keeps open", ["pool"])
+pool_checked_out = Gauge("db_pool_checked_out", "Connections currently in use", ["pool"])
+pool_overflow = Gauge("db_pool_overflow", "Connections open beyond pool_size", ["pool"])
+pool_max_overflow = Gauge("db_pool_max_overflow", "Most connections allowed beyond pool_size", ["pool"])
+query_seconds = Histogram("db_query_seconds", "Statement execution time by SQL fingerprint", ["statement"])
+
+# qmark (SQLite), numeric (asyncpg) and pyformat (psycopg2) parameters
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+)"
+_FINGERPRINT_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(_PLACEHOLDER), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\s+"), " "),
+    # IN lists and multi-row VALUES vary with the data, not the query
+    (re.compile(r"\(\?(?:, \?)*\)(?:, \(\?(?:, \?)*\))+"), "(...)"),
+    (re.compile(r"\(\?(?:, \?)+\)"), "(...)"),
+]
+
+
+@lru_cache(maxsize=2048)
+def _normalize(statement: str) -> str:
+    for pattern, replacement in _FINGERPRINT_RULES:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()[:FINGERPRINT_LENGTH]
+
+
+_fingerprints = set()
+
+
+def fingerprint(statement: str) -> str:
+    """``statement`` with its data taken out, for use as a metric label."""
+    normalized = _normalize(statement)
+    if normalized not in _fingerprints:
+        if len(_fingerprints) >= MAX_FINGERPRINTS:
+            return "other"
+        _fingerprints.add(normalized)
+    return normalized
+
+
+def pool_name(pool) -> str:
+    return getattr(pool, "logging_name", None) or "default"
+
+
+class _TimedCheckout:
+    def connect(self):
+        name = pool_name(self)
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            pool_timeouts.inc(pool=name)
+            raise
+        finally:
+            pool_checkout_seconds.observe(time.perf_counter() - start, pool=name)
+        pool_checkouts.inc(pool=name)
+        return connection
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+class QueryStats:
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+# A mutable object rather than counters in the variable itself: sync
+# endpoints run on worker threads with a copy of the context, and their
+# statements still have to land in the request's totals
+_current_queries: ContextVar[Optional[QueryStats]] = ContextVar("current_queries", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count statements run in this context, and tasks or threads started from it."""
+    stats = QueryStats()
+    token = _current_queries.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_queries.reset(token)
+
+
+class StatementBudgetExceeded(RuntimeError):
+    pass
+
+
+def statement_budget(limit: int):
+    """Give one endpoint its own statement budget. Goes under ``@app.get`` etc."""
+    def decorate(endpoint):
+        endpoint.statement_budget = limit
+        return endpoint
+    return decorate
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    query_seconds.observe(elapsed, statement=fingerprint(statement))
+    stats = _current_queries.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += elapsed
+
+
+def _handle_error(context):
+    # Failed statements never reach after_cursor_execute
+    starts = context.connection.info.get("query_start_time") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine) -> None:
+    """Report ``engine``'s pool gauges and time its statements.
+
+    Takes a sync engine; pass ``async_engine.sync_engine`` for an async one.
+    """
+    name = pool_name(engine.pool)
+    if isinstance(engine.pool, QueuePool):
+        # The engine's current pool, even after it is recreated
+        pool_size.set_function(lambda: engine.pool.size(), pool=name)
+        pool_checked_out.set_function(lambda: engine.pool.checkedout(), pool=name)
+        pool_overflow.set_function(lambda: max(engine.pool.overflow(), 0), pool=name)
+        pool_max_overflow.set_function(lambda: engine.pool._max_overflow, pool=name)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
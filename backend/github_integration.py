@@ -1,52 +1,61 @@
-from github import Github
+from github import Auth, Github
 import os
 from datetime import datetime
 import logging
 from pytz import timezone
-from PIL import Image
-import io
 import base64
 
+from images import ImageCompressor, compress_image_file
+
 logger = logging.getLogger(__name__)
 
+# Hidden in each issue body so a retried delivery can find its issue
+FEEDBACK_MARKER = "<!-- feedback-id: {} -->"
+
 class GitHubIssueCreator:
-    def __init__(self):
-        self.github_token = os.environ.get("GITHUB_ACCESS_TOKEN")
-        self.repo_name = os.environ.get("GITHUB_REPO")
+    def __init__(self, token=None, repo_name=None, base_url=None, compressor=None, **github_options):
+        self.github_token = token or os.environ.get("GITHUB_ACCESS_TOKEN")
+        self.repo_name = repo_name or os.environ.get("GITHUB_REPO")
+        # Point at GitHub Enterprise, or a fake server in tests
+        self.base_url = base_url or os.environ.get("GITHUB_API_URL", "https://api.github.com")
         
         if not self.github_token or not self.repo_name:
             logger.error("GitHub configuration is missing")
             raise ValueError("GitHub configuration is missing")
         
-        try:
-            self.github = Github(self.github_token)
-            # Test the connection
-            self.repo = self.github.get_repo(self.repo_name)
-            logger.info(f"Successfully connected to GitHub repo: {self.repo_name}")
-        except Exception as e:
-            logger.error(f"Failed to initialize GitHub connection: {str(e)}")
-            raise
+        # Retries and rate limits are handled by the outbox dispatcher, which
+        # can wait without holding a thread
+        github_options.setdefault("retry", None)
+        # lazy: no request until the first issue is created
+        self.github = Github(auth=Auth.Token(self.github_token), base_url=self.base_url, lazy=True, **github_options)
+        self.repo = self.github.get_repo(self.repo_name)
+        self.compressor = compressor or ImageCompressor()
 
     def compress_image(self, image_path, max_size=(800, 800)):
         try:
-            with Image.open(image_path) as img:
-                # Convert to RGB if image is in RGBA mode
-                if img.mode == "RGBA":
-                    img = img.convert("RGB")
-                
-                # Resize image while maintaining aspect ratio
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                
-                # Save compressed image to bytes buffer
-                buffer = io.BytesIO()
-                img.save(buffer, format="JPEG", quality=85, optimize=True)
-                return buffer.getvalue()
+            return compress_image_file(image_path, max_size)
         except Exception as e:
-            logger.error(f"Failed to compress image {image_path}: {str(e)}")
+            logger.error("Failed to compress image %s: %s", image_path, e)
             return None
 
-    def create_feedback_issue(self, feedback_data):
+    def find_feedback_issue(self, feedback_id):
+        """Number of the issue already created for ``feedback_id``, if any."""
+        marker = FEEDBACK_MARKER.format(feedback_id)
+        query = f'repo:{self.repo_name} is:issue in:body "feedback-id: {feedback_id}"'
+        for issue in self.github.search_issues(query):
+            # Search matches words; the marker itself must match exactly
+            if marker in (issue.body or ""):
+                return issue.number
+        return None
+
+    def create_feedback_issue(self, feedback_data, feedback_id=None, check_existing=False):
         try:
+            if check_existing and feedback_id is not None:
+                existing = self.find_feedback_issue(feedback_id)
+                if existing is not None:
+                    logger.info("GitHub issue #%s already exists for feedback %s", existing, feedback_id)
+                    return existing
+
             display_name = feedback_data.get("display_name", "Anonymous User")
             page_url = feedback_data["page_url"]
             route = page_url.split("/")[-1] or "home"
@@ -72,34 +81,29 @@ class GitHubIssueCreator:
             # Add images section if there are images
             if feedback_data.get("image_paths"):
                 body += "\n### Attached Images:\n"
-                for image_path in feedback_data["image_paths"]:
+                image_paths = feedback_data["image_paths"]
+                # Queued before uploads kept their names: fall back to the path
+                image_names = feedback_data.get("image_names") or [os.path.basename(path) for path in image_paths]
+                # All attachments are compressed in parallel, in memory
+                compressed_images = self.compressor.compress_files(image_paths)
+                for image_path, image_name, compressed_image in zip(image_paths, image_names, compressed_images):
                     try:
-                        # Compress the image
-                        compressed_image = self.compress_image(image_path)
                         if compressed_image:
-                            # Create a temporary file for the compressed image
-                            temp_filename = f"temp_{os.path.basename(image_path)}"
-                            with open(temp_filename, "wb") as f:
-                                f.write(compressed_image)
-                            
                             # Upload the image directly to the issue
-                            with open(temp_filename, "rb") as f:
-                                content = f.read()
-                                # Create a blob and get its URL
-                                blob = self.repo.create_git_blob(
-                                    base64.b64encode(content).decode(),
-                                    "base64"
-                                )
-                                image_url = f"https://raw.githubusercontent.com/{self.repo_name}/main/{temp_filename}"
-                                body += f"\n![{os.path.basename(image_path)}]({image_url})\n"
-                            
-                            # Clean up temporary file
-                            os.remove(temp_filename)
+                            blob = self.repo.create_git_blob(
+                                base64.b64encode(compressed_image).decode(),
+                                "base64"
+                            )
+                            image_url = f"https://raw.githubusercontent.com/{self.repo_name}/main/{image_name}"
+                            body += f"\n![{image_name}]({image_url})\n"
                         else:
-                            body += f"\n*Failed to process image: {image_path}*\n"
+                            body += f"\n*Failed to process image: {image_name}*\n"
                     except Exception as e:
-                        logger.error(f"Failed to process image {image_path}: {str(e)}")
-                        body += f"\n*Failed to process image: {image_path}*\n"
+                        logger.error("Failed to process image %s: %s", image_path, e)
+                        body += f"\n*Failed to process image: {image_name}*\n"
+
+            if feedback_id is not None:
+                body += "\n" + FEEDBACK_MARKER.format(feedback_id) + "\n"
 
             # Create the issue
             issue = self.repo.create_issue(
@@ -107,8 +111,8 @@ class GitHubIssueCreator:
                 body=body,
                 labels=["feedback"]
             )
-            logger.info(f"Successfully created GitHub issue #{issue.number}")
+            logger.info("Successfully created GitHub issue #%s", issue.number)
             return issue.number
         except Exception as e:
-            logger.error(f"Failed to create GitHub issue: {str(e)}")
+            logger.error("Failed to create GitHub issue: %s", e)
             raise
@@ -0,0 +1,111 @@
+"""Image compression for feedback attachments, off the request thread.
+
+Compression runs in a process pool so several attachments are resized in
+parallel and PIL's CPU work never holds the GIL of the serving process.
+Results come back as bytes. Each result is also kept next to its source
+as a derivative (see ``blobstore``), so an image is only ever compressed
+once per size, however often it is submitted or an issue is retried.
+"""
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+IMAGE_COMPRESSION_WORKERS = int(os.environ.get("IMAGE_COMPRESSION_WORKERS", os.cpu_count() or 1))
+MAX_IMAGE_SIZE = (800, 800)
+JPEG_QUALITY = 85
+
+image_compress_seconds = Histogram(
+    "image_compress_seconds",
+    "Time to compress one batch of feedback images, including queueing for workers",
+)
+
+
+def compress_image_bytes(data: bytes, max_size: Tuple[int, int] = MAX_IMAGE_SIZE) -> bytes:
+    """Downscale an encoded image to fit ``max_size`` and re-encode it as JPEG."""
+    with Image.open(io.BytesIO(data)) as img:
+        # JPEG can decode at 1/2, 1/4 or 1/8 scale directly, which skips most
+        # of the decode work for a large photo that is about to be shrunk
+        if img.format == "JPEG":
+            img.draft("RGB", max_size)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.thumbnail(max_size, Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        return buffer.getvalue()
+
+
+def derivative_path(path: str, max_size: Tuple[int, int] = MAX_IMAGE_SIZE) -> str:
+    return f"{path}.{max_size[0]}x{max_size[1]}q{JPEG_QUALITY}.jpg"
+
+
+# Top-level so the process pool can pickle it by reference
+def compress_image_file(path: str, max_size: Tuple[int, int] = MAX_IMAGE_SIZE) -> bytes:
+    cached = derivative_path(path, max_size)
+    try:
+        with open(cached, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+
+    with open(path, "rb") as f:
+        data = compress_image_bytes(f.read(), max_size)
+    # Written aside and renamed so a concurrent reader never sees half a file
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(cached) or ".", prefix=".derivative-", delete=False) as f:
+        f.write(data)
+    os.replace(f.name, cached)
+    return data
+
+
+class ImageCompressor:
+    """Compresses batches of images in a lazily started process pool."""
+
+    def __init__(self, max_workers: int = IMAGE_COMPRESSION_WORKERS):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: see passwords.PasswordHasher
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def compress_files(self, paths: Sequence[str], max_size: Tuple[int, int] = MAX_IMAGE_SIZE) -> List[Optional[bytes]]:
+        """Compress every file at once; ``None`` for any that fails.
+
+        Blocks until the whole batch is done, so call it from a worker
+        thread rather than the event loop.
+        """
+        if not paths:
+            return []
+        start = time.perf_counter()
+        executor = self._get_executor()
+        futures = [executor.submit(compress_image_file, path, max_size) for path in paths]
+        results: List[Optional[bytes]] = []
+        for path, future in zip(paths, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error("Failed to compress image %s: %s", path, e)
+                results.append(None)
+        image_compress_seconds.observe(time.perf_counter() - start)
+        return results
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,150 @@
+"""Non-blocking JSON logging.
+
+Loggers only put records on a queue; a ``QueueListener`` thread formats
+them as one JSON object per line and writes them out, so neither message
+formatting nor a slow stderr ever holds up the event loop. Records whose
+``%``-style arguments are plain values (strings, numbers) are formatted
+by the listener; any others are formatted before they are queued. Chatty
+INFO lines can be sampled per route, keeping one in N.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import traceback
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from pytz import timezone
+
+TIMEZONE = timezone("America/Denver")
+
+# Logged on (nearly) every request; one in N is plenty to see they happen
+DEFAULT_SAMPLE_RATES = {
+    "Handled request: %s %s": 20,
+    "Attempting to validate token": 20,
+    "Fetched current user.": 20,
+}
+
+# The ASGI scope of the request being handled, for per-route sampling.
+# The router adds the matched route to it before any handler runs.
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+
+class JSONFormatter(logging.Formatter):
+    """``{"ts", "level", "logger", "message", ...}`` with Mountain Time stamps."""
+
+    def __init__(self):
+        super().__init__()
+        # Records arrive in time order, so the second's prefix rarely changes
+        self._cached_second: Optional[int] = None
+        self._cached_prefix = ""
+        self._cached_suffix = ""
+
+    def timestamp(self, created: float) -> str:
+        second = int(created)
+        if second != self._cached_second:
+            local = datetime.fromtimestamp(second, TIMEZONE)
+            self._cached_prefix = local.strftime("%Y-%m-%dT%H:%M:%S")
+            self._cached_suffix = local.strftime("%z")
+            self._cached_second = second
+        millis = int((created - second) * 1000)
+        return f"{self._cached_prefix}.{millis:03d}{self._cached_suffix[:3]}:{self._cached_suffix[3:]}"
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.timestamp(record.created),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        route = getattr(record, "route", None)
+        if route:
+            entry["route"] = route
+        sample_rate = getattr(record, "sample_rate", 1)
+        if sample_rate > 1:
+            entry["sample_rate"] = sample_rate
+        if record.exc_info:
+            entry["exc_info"] = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in ``rate`` INFO-or-lower records for each (message, route).
+
+    ``rates`` maps a record's message template (``record.msg``) to N.
+    Warnings and errors always pass. Kept records carry ``sample_rate`` so
+    counts can be scaled back up.
+    """
+
+    def __init__(self, rates: Dict[str, int]):
+        super().__init__()
+        self.rates = dict(rates)
+        self._seen: Dict[Tuple[str, str], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        scope = current_scope.get()
+        if scope is not None:
+            route = scope.get("route")
+            record.route = getattr(route, "path", None)
+        rate = self.rates.get(record.msg) if record.levelno <= logging.INFO else None
+        if not rate or rate <= 1:
+            return True
+        key = (record.msg, getattr(record, "route", None) or "")
+        # Unlocked: a lost update only shifts which record is kept
+        seen = self._seen.get(key, 0)
+        self._seen[key] = seen + 1
+        if seen % rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+# Immutable, so the listener formatting them later sees what was logged
+_PLAIN_ARGS = (str, int, float, bool, type(None), bytes)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() formats every message here, on the caller's
+        # thread. Plain arguments are left for the listener to format.
+        # Anything else (an ORM object, say) could change or lazy-load
+        # from another thread by then, so that message is formatted now.
+        args = record.args
+        if args:
+            values = args.values() if isinstance(args, dict) else args
+            if not all(isinstance(value, _PLAIN_ARGS) for value in values):
+                record.msg = record.getMessage()
+                record.args = None
+        return record
+
+
+def _stop(listener: logging.handlers.QueueListener) -> None:
+    # stop() fails if called twice before Python 3.12
+    if listener._thread is not None:
+        listener.stop()
+
+
+def setup_logging(level: int = logging.INFO, sample_rates: Optional[Dict[str, int]] = None, stream=None):
+    """Route every logger through a queue to a JSON-writing listener thread.
+
+    Returns the started ``QueueListener``; it is stopped, flushing what is
+    queued, at interpreter exit.
+    """
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(records)
+    queue_handler.addFilter(SamplingFilter(sample_rates or {}))
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JSONFormatter())
+    listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+    listener.start()
+    atexit.register(_stop, listener)
+    return listener
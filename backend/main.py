@@ -1,5 +1,5 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Header, Query, File, UploadFile, Form
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Depends, HTTPException, status, Header, Query, File, UploadFile, Form, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlmodel import Session, SQLModel, create_engine, select
 from models import (
@@ -9,6 +9,7 @@ from models import (
     Collection, 
     CollectionCreate, 
     CollectionRead, 
+    CollectionCreated,
     CollectionUpdate,
     Item, 
     UserCreate, 
@@ -17,8 +18,14 @@ from models import (
     NameListCreate, 
     NameListRead, 
     Feedback,
+    FeedbackOutbox,
     CompletionRecord,
-    ReportResponse
+    ReportResponse,
+    ReportsResponse,
+    UserCollectionStats,
+    ItemPayload,
+    ItemRead,
+    DESCRIPTION_MAX_LENGTH
 )
 from jose import jwt, jwk
 from jose.exceptions import JWKError, ExpiredSignatureError, JWTClaimsError, JWTError
@@ -26,11 +33,10 @@ from datetime import datetime, timedelta
 from typing import List, Optional, Dict
 import logging
 import os
-from passlib.context import CryptContext
 import requests
 from pytz import timezone
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError, OperationalError
 import time
 import smtplib
 from email.mime.text import MIMEText
@@ -38,11 +44,52 @@ from dotenv import load_dotenv
 import pytz
 from pydantic import BaseModel
 from github_integration import GitHubIssueCreator
+from images import ImageCompressor
+from passwords import PasswordHasher, PasswordHashQueueFull
+from auth import JWKSCache, PrincipalCache, attach_user, snapshot_user, upsert_auth0_user
+import hmac
 import json
 from sqlalchemy import func
-import shutil
-
-from database import get_db, get_engine
+from contextlib import asynccontextmanager
+
+from sqlalchemy import delete, or_, tuple_, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from blobstore import record_blobs
+from compression import CompressionMiddleware
+from crud import (
+    PREVIEW_ITEMS,
+    bulk_insert_items,
+    delete_items,
+    detach_references,
+    item_rows,
+    items_owner_id,
+    items_owner_subquery,
+    item_weight,
+    lock_collections,
+    prepare_items_write,
+    replace_items,
+    split_legacy_description,
+    summarize_collections,
+    summary_columns,
+)
+from database import AsyncSessionLocal, async_engine, get_async_db, get_db, get_engine
+from db_metrics import StatementBudgetExceeded, track_queries
+from export import can_export, stream_export
+from log_config import DEFAULT_SAMPLE_RATES, current_scope, setup_logging
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, Histogram
+from outbox import FeedbackOutboxDispatcher
+from pagination import decode_cursor, encode_cursor
+from reports import CompletionTotals, completion_counts, fetch_report_rows, record_completion
+from response_cache import ResponseCache, conditional_json, make_etag
+from search import search_public_collections
+from uploads import (
+    MAX_UPLOAD_REQUEST_BYTES,
+    REQUEST_OVERHEAD_BYTES,
+    RequestSizeLimitMiddleware,
+    UploadTooLarge,
+    save_uploads,
+)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -55,6 +102,7 @@ SECRET_KEY = os.environ.get("SECRET_KEY")
 FRONTEND_URL = os.environ.get("FRONTEND_URL", "https://www.race-the-clock.com")
 LOCAL_FRONTEND_URL = os.environ.get("LOCAL_FRONTEND_URL", "http://localhost:5173")
 ALLOWED_ORIGINS = [FRONTEND_URL, LOCAL_FRONTEND_URL]
+AUTH0_JWKS_URL = os.environ.get("AUTH0_JWKS_URL", f"https://{AUTH0_DOMAIN}/.well-known/jwks.json")
 ALGORITHM = "HS256"
 
 # Add this line to define TIMEZONE
@@ -62,9 +110,57 @@ TIMEZONE = timezone("America/Denver")  # This is for Mountain Time
 
 TESTING = os.environ.get("TESTING", "False") == "True"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+PUBLIC_FEED_PAGE_SIZE = 50
+PUBLIC_FEED_MAX_PAGE_SIZE = 100
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+
+# bcrypt runs in worker processes so signups don't stall the event loop
+password_hasher = PasswordHasher()
+# Feedback screenshots are compressed in parallel worker processes
+image_compressor = ImageCompressor()
+
+# Signing keys are fetched once and shared by every request in this process
+jwks_cache = JWKSCache(AUTH0_JWKS_URL)
+# Verified tokens, so a burst of calls with one token verifies it once
+principal_cache = PrincipalCache()
+completion_totals = CompletionTotals()
+# Serialized collection reads, each kept with the ETag it was built for
+response_cache = ResponseCache()
+
+request_seconds = Histogram("http_request_seconds", "Request latency by route", ["method", "route", "status"])
+# Scrapes must send this as a bearer token. Without one /metrics is
+# refused, except in development: it shows SQL and per-route traffic
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+METRICS_OPEN = os.environ.get("NODE_ENV") == "development"
+
+# Most SQL statements one request may run; see check_statement_budget
+SQL_STATEMENT_BUDGET = int(os.environ.get("SQL_STATEMENT_BUDGET", 15))
+SQL_BUDGET_STRICT = os.environ.get("SQL_BUDGET_STRICT") == "True"
+
+# JSON lines written by a background thread; request handlers only enqueue.
+# LOG_SAMPLE_RATES is a JSON object of message template -> keep 1 in N,
+# merged over the defaults (a rate of 1 turns sampling off for a message).
+LOG_SAMPLE_RATES = {**DEFAULT_SAMPLE_RATES, **json.loads(os.environ.get("LOG_SAMPLE_RATES") or "{}")}
+setup_logging(logging.INFO, LOG_SAMPLE_RATES)
+logger = logging.getLogger("main")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    feedback_dispatcher.start()
+    yield
+    await feedback_dispatcher.stop()
+    password_hasher.shutdown()
+    image_compressor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
-app = FastAPI()
+# Refuse oversized uploads before Starlette spools them to disk
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    max_bytes=MAX_UPLOAD_REQUEST_BYTES + REQUEST_OVERHEAD_BYTES,
+    paths=["/api/feedback"],
+)
 
 # Add this CORS middleware configuration
 app.add_middleware(
@@ -73,18 +169,60 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paginated lists hand out the next page here; browsers hide
+    # non-safelisted response headers from scripts unless exposed
+    expose_headers=["X-Next-Cursor"],
 )
 
+# gzip (or brotli/zstd when installed) for JSON the client can decode
+app.add_middleware(CompressionMiddleware)
+
 # Single middleware function to log requests
 @app.middleware("http")
 async def log_requests(request, call_next):
-    logger.info(f"Received request: {request.method}")
+    # Routing fills in scope["route"]; sampled log lines are keyed by it
+    current_scope.set(request.scope)
+    start = time.perf_counter()
+    status_code = 500
     try:
-        response = await call_next(request)
+        with track_queries() as queries:
+            response = await call_next(request)
+        status_code = response.status_code
+        # Logged once routed, so it is sampled per route like the rest
+        logger.info("Handled request: %s %s", request.method, status_code)
+        response.headers["Server-Timing"] = (
+            f'db;desc="{queries.statements} statements";dur={queries.seconds * 1000:.1f}'
+        )
+        check_statement_budget(request, queries.statements)
         return response
     except Exception as e:
-        logger.error(f"Error processing request: {type(e).__name__}")
+        logger.error("Error processing request: %s", type(e).__name__)
         raise
+    finally:
+        # The route template, not the raw path, to keep the label set small
+        route = request.scope.get("route")
+        request_seconds.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status_code,
+        )
+
+def check_statement_budget(request, statements: int) -> None:
+    """Flag a request that ran more SQL statements than its route allows.
+
+    Usually a query per row (N+1). Logged in production; raised under
+    SQL_BUDGET_STRICT, which the test suite turns on.
+    """
+    route = request.scope.get("route")
+    budget = getattr(getattr(route, "endpoint", None), "statement_budget", SQL_STATEMENT_BUDGET)
+    if statements <= budget:
+        return
+    message = "%s %s ran %d SQL statements (budget %d)"
+    args = (request.method, getattr(route, "path", request.url.path), statements, budget)
+    if SQL_BUDGET_STRICT:
+        raise StatementBudgetExceeded(message % args)
+    logger.warning(message, *args)
 
 # Auth0 token validation
 async def get_current_user(authorization: str = Header(...), db: Session = Depends(get_db)):
@@ -96,28 +234,22 @@ async def get_current_user(authorization: str = Header(...), db: Session = Depen
     )
     try:
         token = authorization.split(" ")[1]
-        jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-        
-        jwks = requests.get(jwks_url).json()
-        rsa_key = {}
-        for key in jwks["keys"]:
-            if key["kid"] == jwt.get_unverified_header(token)["kid"]:
-                rsa_key = {
-                    "kty": key["kty"],
-                    "kid": key["kid"],
-                    "use": key["use"],
-                    "n": key["n"],
-                    "e": key["e"],
-                    "alg": key.get("alg", "RS256")
-                }
-        
-        if not rsa_key:
+        cached_user = principal_cache.get(token)
+        if cached_user is not None:
+            return attach_user(db, cached_user)
+
+        kid = jwt.get_unverified_header(token).get("kid")
+        if not kid:
             raise credentials_exception
-            
+
+        signing_key, algorithm = await jwks_cache.get_key(kid)
+        if signing_key is None:
+            raise credentials_exception
+
         payload = jwt.decode(
             token,
-            jwk.construct(rsa_key),
-            algorithms=[rsa_key["alg"]],
+            signing_key,
+            algorithms=[algorithm],
             audience=AUTH0_AUDIENCE,
             issuer=f"https://{AUTH0_DOMAIN}/",
         )
@@ -130,36 +262,19 @@ async def get_current_user(authorization: str = Header(...), db: Session = Depen
         if name and "|" in name:
             name = name.split("|")[1].strip()
         
-        user = db.query(User).filter(User.username == username).first()
-        
-        if user is None:
-            # Create new user with proper display name
-            user = User(
-                username=username,
-                email=email,
-                display_name=name or email or username.split("|")[1],
-                hashed_password="",
-                role="student"
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-        elif not user.display_name or user.display_name == username or "|" in user.display_name:
-            # Update existing user's display name if it's not set or contains Auth0 ID
-            user.display_name = name or email or username.split("|")[1]
-            db.commit()
-            db.refresh(user)
+        user = upsert_auth0_user(db, username, email, name or email or username.split("|")[1])
         
+        principal_cache.put(token, snapshot_user(user), payload.get("exp"))
         logger.info("Fetched current user.")
         return user
     except Exception as e:
-        logger.error(f"Error in get_current_user: {type(e).__name__}")
+        logger.error("Error in get_current_user: %s", type(e).__name__)
         raise credentials_exception
 
 # User Endpoints
 @app.get("/users/me/", response_model=User)
 async def read_users_me(current_user: User = Depends(get_current_user)):
-    logger.info(f"Fetched current user: {current_user.username}")
+    logger.info("Fetched current user: %s", current_user.username)
     return current_user
 
 @app.get("/users/{user_id}/sequences", response_model=List[Sequence])
@@ -175,7 +290,14 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
 
-    hashed_password = pwd_context.hash(user.password)  # Hash the password
+    try:
+        hashed_password = await password_hasher.hash(user.password)  # Hash the password
+    except PasswordHashQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many signups in progress, please retry",
+            headers={"Retry-After": "1"}
+        )
     new_user = User(username=user.username, email=user.email, hashed_password=hashed_password)
     db.add(new_user)
     db.commit()
@@ -208,6 +330,7 @@ async def update_display_name(
     db.add(current_user)
     db.commit()
     db.refresh(current_user)
+    principal_cache.invalidate_user(current_user.user_id)
     return current_user
 
 @app.put("/sequences/{sequence_id}", response_model=Sequence)
@@ -231,188 +354,370 @@ async def delete_sequence(sequence_id: int, db: Session = Depends(get_db)):
     return {"detail": "Sequence deleted successfully"}
 
 # Collection Endpoints
-@app.post("/collections", response_model=Collection)
+@app.post("/collections", response_model=CollectionCreated)
 async def create_collection(
     collection: CollectionCreate, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user: User = Depends(get_current_user)
 ):
+    # Older clients still send the item list as JSON in the description
+    try:
+        description, legacy_items = split_legacy_description(collection.description)
+    except ValueError:
+        logger.error("Failed to parse collection items data")
+        raise HTTPException(status_code=400, detail="Invalid items data format")
+    items = collection.items if collection.items is not None else (legacy_items or [])
+    if len(description) > DESCRIPTION_MAX_LENGTH:
+        raise HTTPException(status_code=400, detail="Description is too long")
+
     mst_time = datetime.now(TIMEZONE)
     
     db_collection = Collection(
         name=collection.name,
-        description=collection.description,
+        description=description,
         status=collection.status or "private",  
         category=collection.category,
         user_id=current_user.user_id,
         created_at=mst_time
     )
     db.add(db_collection)
-    db.commit()
-    db.refresh(db_collection)
+    # Collection and items go in one transaction; flush only assigns the id
+    await db.flush()
+    rows = item_rows(db_collection.collection_id, items)
+    item_ids = await bulk_insert_items(db, rows)
+    await db.commit()
+
+    # The stored stats were bumped by an UPDATE the instance hasn't seen
+    return CollectionCreated.model_validate(db_collection, update={
+        "item_ids": item_ids,
+        "item_count": len(rows),
+        "item_weight": sum(item_weight(row.get("count")) for row in rows),
+        "preview_items": [row["name"] for row in rows[:PREVIEW_ITEMS]],
+    })
 
-    # Parse the collection data from the description field
-    try:
-        items_data = json.loads(collection.description)
-        for item_data in items_data:
-            db_item = Item(
-                name=item_data["name"],
-                collection_id=db_collection.collection_id,
-                count=item_data.get("count", 1)  # Default to 1 if count is not provided
-            )
-            db.add(db_item)
-        db.commit()
-    except json.JSONDecodeError:
-        logger.error("Failed to parse collection items data")
-        raise HTTPException(status_code=400, detail="Invalid items data format")
+@app.get("/users/me/collections", response_model=List[CollectionRead])
+async def get_collections(
+    if_none_match: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    logger.info("Fetching collections for user: %s", current_user.username)
+    # created_at as well as the version: SQLite may reuse a deleted row's id
+    result = await db.exec(
+        select(Collection.collection_id, Collection.version, Collection.created_at)
+        .where(Collection.user_id == current_user.user_id)
+        .order_by(Collection.collection_id)
+    )
+    versions = result.all()
+    etag = make_etag("collections", current_user.user_id, [tuple(row) for row in versions])
 
-    return db_collection
+    async def build():
+        result = await db.exec(select(*summary_columns()).where(Collection.user_id == current_user.user_id))
+        collections = result.all()
+        logger.info("Found %s collections", len(collections))
+        return await summarize_collections(db, collections)
 
-@app.get("/users/me/collections", response_model=List[CollectionRead])
-async def get_collections(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    logger.info(f"Fetching collections for user: {current_user.username}")
-    collections = current_user.collections
-    logger.info(f"Found {len(collections)} collections")
-    return collections
-
-@app.get("/collections/{collection_id}/items")
-async def get_collection_items(collection_id: int, db: Session = Depends(get_db)):
-    items = db.query(Item).filter(Item.collection_id == collection_id).all()
-    if not items:
-        return []  
-    return items
+    return await conditional_json(response_cache, ("collections", current_user.user_id), etag, if_none_match, build)
+
+@app.get("/collections/{collection_id}/items", response_model=List[ItemRead])
+async def get_collection_items(
+    collection_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # created_at as well as the version: SQLite may reuse a deleted row's id
+    result = await db.exec(
+        select(Collection.version, Collection.created_at).where(Collection.collection_id == collection_id)
+    )
+    row = result.first()
+    if row is None:
+        return []
+
+    async def build():
+        # Subscribed collections may read the source's rows; resolve in one query
+        result = await db.exec(
+            select(Item.item_id, Item.name, Item.count, Item.svg)
+            .where(Item.collection_id == items_owner_subquery(collection_id))
+            .order_by(Item.item_id)
+        )
+        # Shaped like ItemRead, straight from the rows
+        return [
+            {"item_id": item_id, "name": name, "collection_id": collection_id, "count": count, "svg": svg}
+            for item_id, name, count, svg in result.all()
+        ]
+
+    etag = make_etag("items", collection_id, *row)
+    return await conditional_json(response_cache, ("items", collection_id), etag, if_none_match, build)
 
 @app.put("/collections/{collection_id}", response_model=Collection)
 async def update_collection(
     collection_id: int,
     collection_data: CollectionUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         # Get the existing collection
-        db_collection = db.query(Collection).filter(
+        result = await db.exec(select(Collection).where(
             Collection.collection_id == collection_id,
             Collection.user_id == current_user.user_id
-        ).first()
+        ))
+        db_collection = result.first()
         
         if not db_collection:
             raise HTTPException(status_code=404, detail="Collection not found")
         
         # Update only the fields that are provided
-        update_data = collection_data.dict(exclude_unset=True)
+        update_data = collection_data.dict(exclude_unset=True, exclude={"items"})
+        items = collection_data.items
+        if "description" in update_data:
+            update_data["description"], legacy_items = split_legacy_description(update_data["description"])
+            if items is None:
+                items = legacy_items
+            if len(update_data["description"] or "") > DESCRIPTION_MAX_LENGTH:
+                raise HTTPException(status_code=400, detail="Description is too long")
         for key, value in update_data.items():
             setattr(db_collection, key, value)
+        if update_data:
+            db_collection.version = Collection.version + 1
+        if items is not None:
+            await replace_items(db, collection_id, items)
         
-        db.commit()
-        db.refresh(db_collection)
+        await db.commit()
+        await db.refresh(db_collection)
         return db_collection
         
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid items data format")
     except Exception as e:
-        logger.error(f"Error updating collection: {str(e)}")
+        logger.error("Error updating collection: %s", e)
         raise HTTPException(status_code=500, detail="Error updating collection")
 
 @app.delete("/collections/{collection_id}")
 async def delete_collection(
     collection_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     try:
         # First verify the collection exists and belongs to the user
-        db_collection = db.query(Collection).filter(
+        result = await db.exec(select(Collection).where(
             Collection.collection_id == collection_id,
             Collection.user_id == current_user.user_id
-        ).first()
+        ))
+        db_collection = result.first()
         
         if not db_collection:
             raise HTTPException(status_code=404, detail="Collection not found")
 
         # Log the deletion attempt
-        logger.info(f"Attempting to delete collection {collection_id} for user {current_user.user_id}")
+        logger.info("Attempting to delete collection %s for user %s", collection_id, current_user.user_id)
         
-        # Delete completion records first
-        db.query(CompletionRecord).filter(
-            CompletionRecord.collection_id == collection_id
-        ).delete(synchronize_session=False)
+        # Subscribers still reading this collection's items get their own
+        await detach_references(db, collection_id)
+
+        # Delete completion records and items first. Set-based deletes
+        # instead of the ORM cascade, which would load every child row.
+        await db.exec(delete(CompletionRecord).where(CompletionRecord.collection_id == collection_id))
+        await db.exec(delete(UserCollectionStats).where(UserCollectionStats.collection_id == collection_id))
+        # Subscribers keep their copies, just without the link back
+        await db.exec(
+            update(Collection)
+            .where(Collection.source_collection_id == collection_id)
+            .values(source_collection_id=None)
+        )
+        await db.exec(delete(Item).where(Item.collection_id == collection_id))
         
         # Then delete the collection
-        db.delete(db_collection)
-        db.commit()
+        await db.exec(delete(Collection).where(Collection.collection_id == collection_id))
+        await db.commit()
+        # Records from any number of users went with it
+        completion_totals.invalidate()
         
-        logger.info(f"Successfully deleted collection {collection_id}")
+        logger.info("Successfully deleted collection %s", collection_id)
         return {"detail": "Collection deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
-        logger.error(f"Error deleting collection {collection_id}: {str(e)}", exc_info=True)
+        await db.rollback()
+        logger.error("Error deleting collection %s: %s", collection_id, e, exc_info=True)
         raise HTTPException(
             status_code=500, 
             detail=f"Failed to delete collection: {str(e)}"
         )
 
+async def load_summaries(db: AsyncSession, collection_ids: List[int]):
+    """Summary rows, with their creators' names, for ``collection_ids`` in that order."""
+    result = await db.exec(
+        select(*summary_columns(with_creator=True))
+        .join(User)
+        .where(Collection.collection_id.in_(collection_ids))
+    )
+    by_id = {row.collection_id: row for row in result.all()}
+    return [by_id[cid] for cid in collection_ids if cid in by_id]
+
 @app.get("/collections/public", response_model=List[CollectionRead])
-async def get_public_collections(db: Session = Depends(get_db)):
-    collections = db.query(Collection).join(User).filter(
-        Collection.status == "public"
-    ).all()
-    
-    # Enhance collections with creator information
-    for collection in collections:
-        collection.creator_display_name = collection.user.display_name
-        collection.creator_username = collection.user.username
-    
-    return collections
+async def get_public_collections(
+    limit: int = Query(PUBLIC_FEED_PAGE_SIZE, ge=1, le=PUBLIC_FEED_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Newest first, keyset-paginated on (created_at, collection_id) so every
+    # page is an index range scan, however deep the client pages. Only the
+    # versions are read here; full rows are loaded on a cache miss.
+    statement = (
+        select(
+            Collection.collection_id,
+            Collection.created_at,
+            Collection.version,
+            User.display_name,
+            User.username,
+        )
+        .join(User)
+        .where(Collection.status == "public")
+        .order_by(Collection.created_at.desc(), Collection.collection_id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        try:
+            created_at, collection_id = decode_cursor(cursor, datetime, int)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        statement = statement.where(
+            tuple_(Collection.created_at, Collection.collection_id) < tuple_(created_at, collection_id)
+        )
+    rows = (await db.exec(statement)).all()
+    page = [tuple(row) for row in rows[:limit]]
+
+    # The next page starts after the last row; no header on the last page
+    headers = {}
+    if len(rows) > limit:
+        last_id, last_created_at = page[-1][:2]
+        headers["X-Next-Cursor"] = encode_cursor(last_created_at, last_id)
+
+    async def build():
+        return await summarize_collections(db, await load_summaries(db, [row[0] for row in page]))
+
+    # The creator's names are part of the page, so they go into the ETag
+    etag = make_etag("public", page)
+    return await conditional_json(response_cache, ("public", cursor, limit), etag, if_none_match, build, headers)
 
 @app.post("/collections/{collection_id}/items")
-async def create_items(collection_id: int, items: List[str], db: Session = Depends(get_db)):
+async def create_items(collection_id: int, items: List[str], db: AsyncSession = Depends(get_async_db)):
     try:
-        add_items_to_collection(db, collection_id, items)
-        return {"message": "Items added successfully"}
+        item_ids = await add_items_to_collection(db, collection_id, items)
+        return {"message": "Items added successfully", "item_ids": item_ids}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
+@app.delete("/collections/{collection_id}/items/{item_id}")
+async def delete_collection_item(
+    collection_id: int,
+    item_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    result = await db.exec(select(Collection.collection_id).where(
+        Collection.collection_id == collection_id,
+        Collection.user_id == current_user.user_id
+    ))
+    if result.first() is None:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    result = await db.exec(select(Item.item_id).where(
+        Item.item_id == item_id,
+        Item.collection_id == items_owner_subquery(collection_id)
+    ))
+    if result.first() is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    # A subscribed collection still reading the source's rows takes its own
+    # copy, minus this item, rather than deleting the shared row
+    if not await prepare_items_write(db, collection_id, exclude_item_ids=[item_id]):
+        await delete_items(db, collection_id, [item_id])
+    await db.commit()
+    return {"detail": "Item deleted successfully"}
+
 # Utility function
-def add_items_to_collection(db: Session, collection_id: int, items: List[str]):
-    for item_name in items:
-        item = Item(name=item_name, collection_id=collection_id)
-        db.add(item)
-    db.commit()
+async def add_items_to_collection(db: AsyncSession, collection_id: int, items: List[str]) -> List[int]:
+    await prepare_items_write(db, collection_id)
+    item_ids = await bulk_insert_items(db, item_rows(collection_id, (ItemPayload(name=name) for name in items)))
+    await db.commit()
+    return item_ids
 
 @app.post("/collections/subscribe/{collection_id}", response_model=Collection)
 async def subscribe_to_collection(
     collection_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Fetch the public collection
-    public_collection = db.query(Collection).filter(Collection.collection_id == collection_id, Collection.status == "public").first()
+    result = await db.exec(select(Collection).where(Collection.collection_id == collection_id, Collection.status == "public"))
+    public_collection = result.first()
     
     if not public_collection:
         raise HTTPException(status_code=404, detail="Collection not found or not public")
+    if public_collection.user_id == current_user.user_id:
+        raise HTTPException(status_code=400, detail="You cannot subscribe to your own collection.")
 
     # Check if the user has already subscribed to this collection
-    existing_subscription = db.query(Collection).filter(Collection.name == public_collection.name, Collection.user_id == current_user.user_id).first()
-    if existing_subscription:
+    result = await db.exec(select(Collection.collection_id).where(
+        Collection.source_collection_id == collection_id,
+        Collection.user_id == current_user.user_id
+    ))
+    if result.first() is not None:
         raise HTTPException(status_code=400, detail="You have already subscribed to this collection.")
 
-    # Duplicate the collection for the user
+    # The user's collection reads the source's items until either side
+    # edits them (crud.prepare_items_write), so subscribing writes one row.
+    # The rows holding those items are locked first, as writes to them do,
+    # so they can't be replaced before this reference is committed.
+    owner_id = items_owner_id(public_collection)
+    while True:
+        await lock_collections(db, Collection.collection_id == owner_id)
+        # Re-read under the lock: an edit meanwhile may have changed the
+        # items or given the source its own copy of them
+        result = await db.exec(
+            select(
+                func.coalesce(Collection.items_source_id, Collection.collection_id).label("owner_id"),
+                Collection.item_count,
+                Collection.item_weight,
+            ).where(Collection.collection_id == collection_id)
+        )
+        row = result.first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Collection not found or not public")
+        if row.owner_id == owner_id:
+            break
+        owner_id = row.owner_id
     new_collection = Collection(
         name=public_collection.name,
         description=public_collection.description,
         category=public_collection.category,
         user_id=current_user.user_id,
-        status="private"
+        status="private",
+        source_collection_id=collection_id,
+        items_source_id=owner_id,
+        created_at=datetime.now(TIMEZONE),
+        item_count=row.item_count,
+        item_weight=row.item_weight
     )
     db.add(new_collection)
-    db.commit()
-    db.refresh(new_collection)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request subscribed first
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="You have already subscribed to this collection.")
+    logger.info("User %s subscribed to collection %s", current_user.user_id, collection_id)
     return new_collection
 
 @app.post("/namelists/", response_model=NameListRead)
 async def create_namelist(
     namelist: NameListCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     db_namelist = NameList(
         name=namelist.name,
@@ -420,71 +725,102 @@ async def create_namelist(
         user_id=current_user.user_id
     )
     db.add(db_namelist)
-    db.commit()
-    db.refresh(db_namelist)
+    await db.commit()
+    await db.refresh(db_namelist)
     return db_namelist
 
 @app.get("/namelists/", response_model=List[NameListRead])
 async def get_namelists(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return db.query(NameList).filter(NameList.user_id == current_user.user_id).all()
+    # Plain rows rather than ORM objects: the response_model reads them once
+    result = await db.exec(
+        select(NameList.namelist_id, NameList.name, NameList.names, NameList.user_id)
+        .where(NameList.user_id == current_user.user_id)
+    )
+    return [row._asdict() for row in result.all()]
 
 @app.put("/namelists/{namelist_id}", response_model=NameListRead)
 async def update_namelist(
     namelist_id: int,
     updated_namelist: NameListCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_namelist = db.query(NameList).filter(NameList.namelist_id == namelist_id, NameList.user_id == current_user.user_id).first()
+    result = await db.exec(select(NameList).where(NameList.namelist_id == namelist_id, NameList.user_id == current_user.user_id))
+    db_namelist = result.first()
     if not db_namelist:
         raise HTTPException(status_code=404, detail="NameList not found")
     
     db_namelist.name = updated_namelist.name
     db_namelist.names = updated_namelist.names
-    db.commit()
-    db.refresh(db_namelist)
+    await db.commit()
+    await db.refresh(db_namelist)
     return db_namelist
 
 @app.delete("/namelists/{namelist_id}")
 async def delete_namelist(
     namelist_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_namelist = db.query(NameList).filter(NameList.namelist_id == namelist_id, NameList.user_id == current_user.user_id).first()
+    result = await db.exec(select(NameList).where(NameList.namelist_id == namelist_id, NameList.user_id == current_user.user_id))
+    db_namelist = result.first()
     if not db_namelist:
         raise HTTPException(status_code=404, detail="NameList not found")
     
-    db.delete(db_namelist)
-    db.commit()
+    await db.delete(db_namelist)
+    await db.commit()
     return {"detail": "NameList deleted successfully"}
 
 @app.get("/collections/search", response_model=List[CollectionRead])
 async def search_collections(
+    response: Response,
     query: str = Query(None, min_length=1),
-    db: Session = Depends(get_db)
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    search = f"%{query}%"
-    collections = db.query(Collection).join(User).filter(
-        (Collection.status == "public") &
-        (
-            (Collection.name.ilike(search)) |
-            (User.username.ilike(search))
-        )
-    ).all()
-    
-    for collection in collections:
-        collection.items = db.query(Item).filter(Item.collection_id == collection.collection_id).all()
-    
-    return collections
+    if not query:
+        return []
+    after = None
+    if cursor:
+        try:
+            rank, collection_id = decode_cursor(cursor)
+            after = (float(rank), int(collection_id))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # Ranked ids from the search index, one extra to detect a next page;
+    # keyset on (rank, collection_id) like the public feed
+    rows = await search_public_collections(db, query, limit + 1, after)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_id, last_rank = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last_rank, last_id)
+    collection_ids = [collection_id for collection_id, _ in rows]
+    if not collection_ids:
+        return []
+
+    # Plain dicts; the response_model validates and serializes them once
+    return await summarize_collections(db, await load_summaries(db, collection_ids))
 
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus text exposition: pools, queries, requests, background work."""
+    if METRICS_TOKEN:
+        allowed = hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}")
+    else:
+        allowed = METRICS_OPEN
+    if not allowed:
+        raise HTTPException(status_code=401, detail="Not authorized to read metrics")
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
 def create_db_and_tables():
     engine = get_engine()
     
@@ -507,7 +843,7 @@ def wait_for_db(db_url, max_retries=5, retry_interval=5):
             return
         except OperationalError:
             retries += 1
-            logger.warning(f"Database connection attempt {retries} failed. Retrying in {retry_interval} seconds...")
+            logger.warning("Database connection attempt %s failed. Retrying in %s seconds...", retries, retry_interval)
             time.sleep(retry_interval)
     
     raise Exception("Could not connect to the database after multiple attempts")
@@ -517,13 +853,14 @@ def wait_for_db(db_url, max_retries=5, retry_interval=5):
 async def check_subscription(
     collection_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Check if the user has a private copy of this collection
-    subscription = db.query(Collection).filter(
+    # Check if the user owns this collection or has a private copy of it
+    result = await db.exec(select(Collection.collection_id).where(
         Collection.user_id == current_user.user_id,
-        Collection.collection_id == collection_id
-    ).first()
+        or_(Collection.collection_id == collection_id, Collection.source_collection_id == collection_id)
+    ))
+    subscription = result.first()
     
     return {"isSubscribed": subscription is not None}
 
@@ -553,6 +890,7 @@ async def update_user_role(
     user.role = role_update.role
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate_user(user.user_id)
     
     return user
 
@@ -576,35 +914,31 @@ if os.environ.get("NODE_ENV") == "development":
         SQLModel.metadata.create_all(engine)
         return {"message": "Development database initialized"}
 
-@app.get("/db-info")
-async def get_db_info(db: Session = Depends(get_db)):
-    try:
-        # Use text() to declare the SQL expression
-        tables = db.execute(text("SELECT table_name FROM information_schema.tables WHERE table_schema='public'")).fetchall()
-        
-        db_info = {}
-        for table in tables:
-            table_name = table[0]
-            # Fetch all rows from the table
-            data = db.execute(text(f"SELECT * FROM {table_name}")).fetchall()
-            # Convert rows to a list of dictionaries
-            db_info[table_name] = [dict(zip(row.keys(), row)) for row in data]
-        
-        return db_info
-    except Exception as e:
-        logger.error(f"Error fetching database info: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal Server Error")
+@app.get("/db-export")
+async def export_database(current_user: User = Depends(get_current_user)):
+    """Every table as gzipped NDJSON, streamed. Admins only (ADMIN_USERNAMES)."""
+    if not can_export(current_user):
+        raise HTTPException(status_code=403, detail="Not authorized to export the database")
+    logger.info("Database export started by %s", current_user.username)
+    filename = f"race-the-clock-{datetime.now(pytz.utc):%Y%m%dT%H%M%SZ}.ndjson.gz"
+    return StreamingResponse(
+        stream_export(async_engine),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 # Instead, create a function to get or create the GitHub issue creator
 def get_github_issue_creator():
     if not hasattr(get_github_issue_creator, "_instance"):
         try:
-            get_github_issue_creator._instance = GitHubIssueCreator()
+            get_github_issue_creator._instance = GitHubIssueCreator(compressor=image_compressor)
         except ValueError:
             logger.warning("GitHub integration disabled - configuration missing")
             get_github_issue_creator._instance = None
     return get_github_issue_creator._instance
 
+feedback_dispatcher = FeedbackOutboxDispatcher(AsyncSessionLocal, get_github_issue_creator)
+
 # Update the feedback endpoint
 @app.post("/api/feedback")
 async def submit_feedback(
@@ -612,24 +946,22 @@ async def submit_feedback(
     page_url: str = Form(...),
     display_name: str = Form(...),
     files: List[UploadFile] = File(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     logger.info("Received feedback from user.")
     try:
         # Create new Feedback instance with Mountain Time
         current_time = datetime.now(TIMEZONE)
         
-        # Save images if provided
+        # Save images if provided, streamed to disk off the event loop
         image_paths = []
+        image_names = []
         if files:
-            upload_dir = "uploads/feedback_images"
-            os.makedirs(upload_dir, exist_ok=True)
-            
-            for file in files:
-                file_path = f"{upload_dir}/{current_time.strftime('%Y%m%d_%H%M%S')}_{file.filename}"
-                with open(file_path, "wb") as buffer:
-                    shutil.copyfileobj(file.file, buffer)
-                image_paths.append(file_path)
+            stored = await save_uploads(files)
+            image_paths = [upload.path for upload in stored]
+            # Stored under their digests; the issue shows what was uploaded
+            image_names = [upload.filename for upload in stored]
+            await record_blobs(db, [(upload.sha256, upload.size) for upload in stored])
         
         feedback = Feedback(
             message=message,
@@ -638,58 +970,32 @@ async def submit_feedback(
             user_id=None,
             image_paths=image_paths
         )
-        
         db.add(feedback)
-        db.commit()
-        db.refresh(feedback)
-
-        # Create GitHub issue with images
-        github_creator = get_github_issue_creator()
-        if github_creator:
-            try:
-                issue_number = github_creator.create_feedback_issue({
-                    "message": message,
-                    "page_url": page_url,
-                    "created_at": current_time.strftime("%Y-%m-%d %H:%M:%S MST"),
-                    "display_name": display_name,
-                    "image_paths": image_paths
-                })
-                logger.info(f"Created GitHub issue #{issue_number} for feedback")
-            except Exception as e:
-                logger.error(f"Failed to create GitHub issue: {str(e)}")
+        await db.flush()
+
+        # The GitHub issue is created in the background; queue it in the
+        # same transaction so it can't be lost or sent for unsaved feedback
+        db.add(FeedbackOutbox(
+            feedback_id=feedback.id,
+            payload={
+                "message": message,
+                "page_url": page_url,
+                "created_at": current_time.strftime("%Y-%m-%d %H:%M:%S MST"),
+                "display_name": display_name,
+                "image_paths": image_paths,
+                "image_names": image_names
+            }
+        ))
+        await db.commit()
+        feedback_dispatcher.wake()
         
         return {"status": "success", "message": "Feedback submitted successfully"}
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        logger.error(f"Error submitting feedback: {str(e)}")
+        logger.error("Error submitting feedback: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-# Replace the existing logging setup with this:
-TIMEZONE = timezone("America/Denver")
-
-class MountainTimeFormatter(logging.Formatter):
-    def converter(self, timestamp):
-        dt = datetime.fromtimestamp(timestamp)
-        return TIMEZONE.localize(dt)
-
-    def formatTime(self, record, datefmt=None):
-        dt = self.converter(record.created)
-        if datefmt:
-            return dt.strftime(datefmt)
-        return dt.isoformat()
-
-# Clear any existing handlers
-logging.getLogger().handlers = []
-
-# Configure root logger
-logger = logging.getLogger("main")
-logger.setLevel(logging.INFO)
-logger.handlers = []  # Clear any existing handlers
-
-# Add single handler with Mountain Time formatting
-handler = logging.StreamHandler()
-handler.setFormatter(MountainTimeFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
-logger.addHandler(handler)
-
 class CollectionIdsRequest(BaseModel):
     collection_ids: List[int]
 
@@ -697,113 +1003,108 @@ class CollectionIdsRequest(BaseModel):
 async def check_subscriptions_batch(
     request: CollectionIdsRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        subscriptions = db.query(Collection).filter(
+        result = await db.exec(select(Collection.collection_id, Collection.source_collection_id).where(
             Collection.user_id == current_user.user_id,
-            Collection.collection_id.in_(request.collection_ids)
-        ).all()
+            or_(
+                Collection.collection_id.in_(request.collection_ids),
+                Collection.source_collection_id.in_(request.collection_ids)
+            )
+        ))
         
-        return {
-            str(collection.collection_id): True 
-            for collection in subscriptions
-        }
+        requested = set(request.collection_ids)
+        subscribed = {}
+        for collection_id, source_collection_id in result.all():
+            for matched in (collection_id, source_collection_id):
+                if matched in requested:
+                    subscribed[str(matched)] = True
+        return subscribed
     except Exception as e:
-        logger.error(f"Error checking subscriptions batch: {str(e)}")
+        logger.error("Error checking subscriptions batch: %s", e)
         raise HTTPException(status_code=500, detail="Error checking subscriptions")
 
 @app.get("/collections/completion-counts")
 async def get_completion_counts(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        counts = db.query(Collection.collection_id, func.count(CompletionRecord.id))\
-                  .join(CompletionRecord, Collection.collection_id == CompletionRecord.collection_id)\
-                  .filter(CompletionRecord.user_id == current_user.user_id)\
-                  .group_by(Collection.collection_id)\
-                  .all()
-        
-        return {str(cid): count for cid, count in counts}
+        counts = await completion_counts(db, current_user.user_id)
+        return {str(cid): count for cid, count in counts.items()}
     except Exception as e:
-        logger.error(f"Error fetching completion counts: {str(e)}")
+        logger.error("Error fetching completion counts: %s", e)
         raise HTTPException(status_code=500, detail="Error fetching completion counts")
 
 # Add this endpoint before the if __name__ == "__main__": block
-@app.get("/reports", response_model=List[ReportResponse])
+@app.get("/reports", response_model=ReportsResponse)
 async def get_reports(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    page: int = Query(1, ge=1),  # Page number, default to 1
-    limit: int = Query(10, ge=1, le=50)  # Limit per page, default 10, max 50
+    db: AsyncSession = Depends(get_async_db),
+    page: int = Query(1, ge=1),  # Only used by clients that don't send a cursor
+    limit: int = Query(10, ge=1, le=50),  # Limit per page, default 10, max 50
+    cursor: Optional[str] = None
 ):
-    try:
-        # Calculate offset
+    after = None
+    offset = 0
+    if cursor:
+        try:
+            after = tuple(decode_cursor(cursor, datetime, int))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    else:
         offset = (page - 1) * limit
 
-        # Query with pagination
-        completion_records = db.query(CompletionRecord, Collection)\
-            .join(Collection, CompletionRecord.collection_id == Collection.collection_id)\
-            .filter(CompletionRecord.user_id == current_user.user_id)\
-            .order_by(CompletionRecord.completed_at.desc())\
-            .offset(offset)\
-            .limit(limit)\
-            .all()
-
-        logger.info(f"Fetched {len(completion_records)} completion records for user {current_user.user_id}")
-
-        reports = []
-        for i, (record, collection) in enumerate(completion_records):
-            # Get items count for this collection
-            items_count = db.query(func.count(Item.item_id))\
-                .filter(Item.collection_id == collection.collection_id)\
-                .scalar() or 0
-                
-            report = ReportResponse(
-                report_id=offset + i + 1,
-                user_id=current_user.user_id,
-                total_items=items_count,
-                time_taken=60.0,  # Placeholder, should be calculated dynamically
-                missed_items=0,
-                skipped_items=0,
-                created_at=record.completed_at
-            )
-            reports.append(report)
-
-        # Get total count for pagination metadata
-        total_count = db.query(func.count(CompletionRecord.id))\
-            .filter(CompletionRecord.user_id == current_user.user_id)\
-            .scalar()
-
-        return {
-            "reports": reports,
-            "total_count": total_count,
-            "page": page,
-            "limit": limit
-        }
+    try:
+        # Fetch one extra row to know whether another page exists
+        rows = await fetch_report_rows(db, current_user.user_id, limit + 1, after=after, offset=offset)
+        total_count = await completion_totals.get(db, current_user.user_id)
     except Exception as e:
-        logger.error(f"Error fetching reports: {str(e)}")
+        logger.error("Error fetching reports: %s", e)
         raise HTTPException(status_code=500, detail=f"Error fetching reports: {str(e)}")
 
+    logger.info("Fetched %s completion records for user %s", min(len(rows), limit), current_user.user_id)
+
+    reports = [
+        ReportResponse(
+            report_id=record_id,
+            user_id=current_user.user_id,
+            total_items=item_count,
+            time_taken=60.0,  # Placeholder, should be calculated dynamically
+            missed_items=0,
+            skipped_items=0,
+            created_at=completed_at
+        )
+        for record_id, item_count, completed_at in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = reports[-1]
+        next_cursor = encode_cursor(last.created_at, last.report_id)
+
+    return ReportsResponse(
+        reports=reports,
+        total_count=total_count,
+        page=page,
+        limit=limit,
+        next_cursor=next_cursor
+    )
+
 @app.post("/collections/{collection_id}/complete")
 async def complete_collection(
     collection_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        completion_record = CompletionRecord(
-            collection_id=collection_id,
-            user_id=current_user.user_id,
-            completed_at=datetime.now(timezone("America/Denver"))
-        )
-        db.add(completion_record)
-        db.commit()
-        logger.info(f"Created completion record: collection_id={collection_id}, user_id={current_user.user_id}")
+        await record_completion(db, current_user.user_id, collection_id, datetime.now(TIMEZONE))
+        await db.commit()
+        completion_totals.increment(current_user.user_id)
+        logger.info("Created completion record: collection_id=%s, user_id=%s", collection_id, current_user.user_id)
         return {"message": "Collection completion recorded successfully"}
     except Exception as e:
-        logger.error(f"Error recording completion: {str(e)}")
+        logger.error("Error recording completion: %s", e)
         raise HTTPException(status_code=500, detail="Error recording completion")
 
 if __name__ == "__main__":
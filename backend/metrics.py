@@ -0,0 +1,170 @@
+"""In-process metrics rendered in the Prometheus text format.
+
+Metrics register themselves with ``REGISTRY`` when created; ``/metrics``
+renders it. Counts are per worker process, so scrape every worker (or
+sum across them) when running several.
+"""
+import math
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds. Wide enough for bcrypt (~250ms) and slow queries alike.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, "Metric"] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: "Metric") -> None:
+        # Last one wins, so a re-created metric replaces its predecessor
+        with self._lock:
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional["Metric"]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}" if label_text else f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> Iterator[Sample]:
+        return iter(())
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield f"{self.name}_total", self._labels(key), value
+
+
+class Gauge(Metric):
+    """A value read at scrape time, from ``set`` or from a callback."""
+
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+        self.set_function(lambda: value, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = function
+
+    def value(self, **labels) -> float:
+        function = self._values.get(self._key(labels))
+        return function() if function else 0
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, function in values:
+            yield self.name, self._labels(key), function()
+
+
+class Histogram(Metric):
+    """Minimal cumulative histogram in the Prometheus data model."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS,
+                 registry: Optional[Registry] = REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # One counter per bucket, then +Inf, sum
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[len(self.buckets)] if series else 0
+
+    def sum(self, **labels) -> float:
+        series = self._series.get(self._key(labels))
+        return series[-1] if series else 0.0
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            all_series = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in all_series:
+            labels = self._labels(key)
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, count
+            yield f"{self.name}_sum", labels, series[-1]
+            yield f"{self.name}_count", labels, series[len(self.buckets)]
@@ -21,7 +21,12 @@ class MountainDateTime(TypeDecorator):
                 # If naive, assume it's in Mountain Time and make it aware
                 mountain_tz = pytz.timezone("America/Denver")
                 value = mountain_tz.localize(value)
-            return value.astimezone(pytz.UTC)
+            value = value.astimezone(pytz.UTC)
+            if not self.impl.timezone:
+                # timestamp WITHOUT time zone holds naive UTC, which is what
+                # process_result_value assumes; asyncpg rejects aware values
+                value = value.replace(tzinfo=None)
+            return value
             
     def process_result_value(self, value, dialect):
         if value is not None:
@@ -107,13 +112,24 @@ class CollectionBase(SQLModel):
 
 class Collection(SQLModel, table=True):
     __tablename__ = "collections"
+    __table_args__ = (
+        # Serves the public feed's keyset pagination as a range scan
+        sa.Index("ix_collections_status_created_at_id", "status", "created_at", "collection_id"),
+        # One subscription per user per public collection
+        sa.Index("ux_collections_user_id_source_collection_id", "user_id", "source_collection_id", unique=True),
+    )
     collection_id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     description: str
-    user_id: int = Field(foreign_key="users.user_id")
+    user_id: int = Field(foreign_key="users.user_id", index=True)
     status: str = Field(default="private")
     category: str
     is_public: bool = Field(default=False)
+    # The public collection this one was subscribed from, if any
+    source_collection_id: Optional[int] = Field(default=None, foreign_key="collections.collection_id")
+    # Set while this collection reads its items from another collection's
+    # rows instead of owning copies; see crud.prepare_items_write
+    items_source_id: Optional[int] = Field(default=None, foreign_key="collections.collection_id", index=True)
     creator_display_name: Optional[str] = None
     creator_username: Optional[str] = None
     user: User = Relationship(back_populates="collections")
@@ -122,17 +138,32 @@ class Collection(SQLModel, table=True):
         sa_relationship_kwargs={"cascade": "all, delete-orphan"}
     )
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # Maintained alongside the items table by the helpers in crud.py
+    item_count: int = Field(default=0, sa_column_kwargs={"server_default": "0", "nullable": False})
+    item_weight: int = Field(default=0, sa_column_kwargs={"server_default": "0", "nullable": False})
+    # Bumped by every write to the collection or the items it shows; the
+    # read endpoints derive their ETags from it
+    version: int = Field(default=1, sa_column_kwargs={"server_default": "1", "nullable": False})
     completions: List["CompletionRecord"] = Relationship(
         back_populates="collection",
         sa_relationship_kwargs={"cascade": "all, delete-orphan"}
     )
 
+# Longest description a collection may carry. Items live in the items table.
+DESCRIPTION_MAX_LENGTH = 500
+
+class ItemPayload(BaseModel):
+    name: str
+    count: Optional[int] = 1
+    svg: Optional[str] = None
+
 class CollectionCreate(SQLModel):
     name: str
-    description: str
+    description: str = ""
     status: Optional[str] = "private"
     category: str
     stage: Optional[str] = "beginner"  # Add this line
+    items: Optional[List[ItemPayload]] = None
 
 class CollectionRead(CollectionBase):
     collection_id: int
@@ -140,6 +171,14 @@ class CollectionRead(CollectionBase):
     status: str
     creator_display_name: Optional[str] = None
     creator_username: Optional[str] = None
+    # Compact summary instead of the full item list
+    item_count: int = 0
+    item_weight: int = 0
+    preview_items: List[str] = []
+
+class CollectionCreated(CollectionRead):
+    # The new items' ids, in the order the items were sent
+    item_ids: List[int] = []
 
 class CollectionUpdate(SQLModel):
     name: Optional[str] = None
@@ -147,6 +186,7 @@ class CollectionUpdate(SQLModel):
     status: Optional[str] = None
     category: Optional[str] = None
     is_public: Optional[bool] = None
+    items: Optional[List[ItemPayload]] = None
 
 # Item Models
 class ItemBase(SQLModel):
@@ -159,6 +199,7 @@ class Item(ItemBase, table=True):
     collection_id: int = Field(foreign_key="collections.collection_id")
     collection: "Collection" = Relationship(back_populates="items")
     count: Optional[int] = Field(default=1)
+    svg: Optional[str] = Field(default=None)
 
 class ItemCreate(ItemBase):
     pass
@@ -167,6 +208,8 @@ class ItemRead(SQLModel):
     item_id: int
     name: str
     collection_id: int
+    count: Optional[int] = 1
+    svg: Optional[str] = None
 
 class Feedback(SQLModel, table=True):
     __tablename__ = "feedback"
@@ -179,6 +222,46 @@ class Feedback(SQLModel, table=True):
     user_id: Optional[int] = Field(default=None, foreign_key="users.user_id")
     image_paths: List[str] = Field(default_factory=list, sa_column=Column(JSON))
 
+class Blob(SQLModel, table=True):
+    """A file in the content-addressed blob store, by SHA-256.
+
+    Written in the transaction that stores the first row referring to it
+    (for now, an entry in ``Feedback.image_paths``). Blobs that no row
+    refers to are garbage once older than a grace period; see
+    ``scripts/gc_blobs.py``.
+    """
+    __tablename__ = "blobs"
+    sha256: str = Field(primary_key=True)
+    size: int
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
+
+class FeedbackOutbox(SQLModel, table=True):
+    """GitHub issues still to be created for submitted feedback.
+
+    Written in the same transaction as the ``Feedback`` row and drained by
+    ``outbox.FeedbackOutboxDispatcher``. ``next_attempt_at`` is UTC.
+    """
+    __tablename__ = "feedback_outbox"
+    __table_args__ = (
+        sa.Index("ix_feedback_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    feedback_id: int = Field(foreign_key="feedback.id")
+    payload: dict = Field(default_factory=dict, sa_column=Column(JSON))
+    status: str = Field(default="pending")  # pending, sent or failed
+    attempts: int = Field(default=0)
+    # Times a dispatcher took the row; above zero, an issue may already exist
+    claims: int = Field(default=0, sa_column_kwargs={"server_default": "0", "nullable": False})
+    next_attempt_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
+    last_error: Optional[str] = None
+    issue_number: Optional[int] = None
+
 class CompletionRecord(SQLModel, table=True):
     __tablename__ = "completion_records"
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -190,6 +273,24 @@ class CompletionRecord(SQLModel, table=True):
     collection: Collection = Relationship(back_populates="completions")
     user: User = Relationship(back_populates="completions")
 
+class UserCollectionStats(SQLModel, table=True):
+    """Per-user, per-collection rollup of completion_records.
+
+    Kept current by ``reports.record_completion`` in the same transaction
+    as each new completion record. Streaks count consecutive Mountain Time
+    days with at least one completion; ``last_streak_day`` is that day's
+    ``date.toordinal()`` so the update can do the day arithmetic in SQL.
+    """
+    __tablename__ = "user_collection_stats"
+    user_id: int = Field(foreign_key="users.user_id", primary_key=True)
+    collection_id: int = Field(foreign_key="collections.collection_id", primary_key=True)
+    completion_count: int = Field(default=0)
+    first_completed_at: datetime = Field(sa_column=Column(MountainDateTime, nullable=False))
+    last_completed_at: datetime = Field(sa_column=Column(MountainDateTime, nullable=False))
+    current_streak: int = Field(default=0)
+    longest_streak: int = Field(default=0)
+    last_streak_day: int = Field(default=0)
+
 class ReportResponse(BaseModel):
     report_id: int
     user_id: int
@@ -203,4 +304,5 @@ class ReportsResponse(BaseModel):
     reports: List[ReportResponse]
     total_count: int
     page: int
-    limit: int
\ No newline at end of file
+    limit: int
+    next_cursor: Optional[str] = None
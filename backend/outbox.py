@@ -0,0 +1,187 @@
+"""Background delivery of feedback to GitHub issues.
+
+``submit_feedback`` only writes a ``FeedbackOutbox`` row next to the
+``Feedback`` row. ``FeedbackOutboxDispatcher`` runs on the event loop,
+claims due rows, and creates the issues on a worker thread, retrying
+failures with exponential backoff and waiting out GitHub rate limits.
+Rows are claimed by pushing ``next_attempt_at`` out by a lease, so a
+crashed worker's rows are picked up again once the lease runs out.
+
+Delivery is at least once: a crash after GitHub accepted an issue but
+before its row was marked sent means it is sent again. Each issue body
+carries the feedback id, and a row that was claimed before is first
+looked up by it, so the retry finds that issue instead of opening a
+duplicate. The lookup goes through GitHub search, which can lag new
+issues by a minute or so; the lease is longer than that.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from github import GithubException, RateLimitExceededException
+from sqlalchemy import update
+from sqlmodel import select
+
+from models import FeedbackOutbox
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_POLL_SECONDS = float(os.environ.get("FEEDBACK_OUTBOX_POLL_SECONDS", 5))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("FEEDBACK_OUTBOX_MAX_ATTEMPTS", 8))
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def rate_limit_delay(exc: GithubException) -> Optional[float]:
+    """Seconds GitHub asked us to wait, or None if this isn't a rate limit."""
+    headers = {k.lower(): v for k, v in (exc.headers or {}).items()}
+    if "retry-after" in headers:
+        return float(headers["retry-after"])
+    if isinstance(exc, RateLimitExceededException) or headers.get("x-ratelimit-remaining") == "0":
+        reset = headers.get("x-ratelimit-reset")
+        if reset is not None:
+            return max(float(reset) - time.time(), 1.0)
+        return 60.0
+    return None
+
+
+class FeedbackOutboxDispatcher:
+    def __init__(
+        self,
+        session_factory,
+        issue_creator_factory: Callable,
+        poll_interval: float = OUTBOX_POLL_SECONDS,
+        batch_size: int = 10,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        base_backoff: float = 5.0,
+        max_backoff: float = 3600.0,
+        lease: float = 300.0,
+    ):
+        self.session_factory = session_factory
+        self.issue_creator_factory = issue_creator_factory
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.lease = lease
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Nothing is sent while GitHub has us rate limited
+        self._paused_until = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self) -> None:
+        """Deliver new rows now instead of at the next poll."""
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                while await self.dispatch_once():
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Feedback outbox dispatch failed: %s", e)
+            timeout = max(self.poll_interval, self._paused_until - time.monotonic())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim(self):
+        now = _utcnow()
+        async with self.session_factory() as db:
+            result = await db.exec(
+                select(FeedbackOutbox)
+                .where(FeedbackOutbox.status == "pending", FeedbackOutbox.next_attempt_at <= now)
+                .order_by(FeedbackOutbox.next_attempt_at, FeedbackOutbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows = result.all()
+            if rows:
+                # Not synchronized, so the rows keep the claims they had
+                await db.exec(
+                    update(FeedbackOutbox)
+                    .where(FeedbackOutbox.id.in_([row.id for row in rows]))
+                    .values(next_attempt_at=now + timedelta(seconds=self.lease), claims=FeedbackOutbox.claims + 1)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+            return rows
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _finish(self, row_id: int, **values) -> None:
+        async with self.session_factory() as db:
+            await db.exec(update(FeedbackOutbox).where(FeedbackOutbox.id == row_id).values(**values))
+            await db.commit()
+
+    async def dispatch_once(self) -> int:
+        """Deliver one batch of due rows. Returns how many were attempted."""
+        if time.monotonic() < self._paused_until:
+            return 0
+        creator = self.issue_creator_factory()
+        if creator is None:
+            return 0
+        rows = await self._claim()
+        for index, row in enumerate(rows):
+            try:
+                issue_number = await asyncio.to_thread(
+                    creator.create_feedback_issue, row.payload, row.feedback_id, row.claims > 0
+                )
+            except GithubException as e:
+                delay = rate_limit_delay(e)
+                if delay is not None:
+                    # Not the row's fault: put it and the rest of the batch back
+                    logger.warning("GitHub rate limit hit, pausing feedback delivery for %.0fs", delay)
+                    self._paused_until = time.monotonic() + delay
+                    retry_at = _utcnow() + timedelta(seconds=delay)
+                    for pending in rows[index:]:
+                        await self._finish(pending.id, next_attempt_at=retry_at)
+                    return index
+                await self._record_failure(row, str(e))
+            except Exception as e:
+                await self._record_failure(row, str(e))
+            else:
+                await self._finish(row.id, status="sent", issue_number=issue_number, last_error=None)
+                logger.info("Created GitHub issue #%s for feedback %s", issue_number, row.feedback_id)
+        return len(rows)
+
+    async def _record_failure(self, row: FeedbackOutbox, error: str) -> None:
+        attempts = row.attempts + 1
+        if attempts >= self.max_attempts:
+            logger.error("Giving up on GitHub issue for feedback %s: %s", row.feedback_id, error)
+            await self._finish(row.id, status="failed", attempts=attempts, last_error=error)
+            return
+        delay = self._backoff(attempts)
+        logger.warning("GitHub issue for feedback %s failed, retrying in %.0fs: %s", row.feedback_id, delay, error)
+        await self._finish(
+            row.id,
+            attempts=attempts,
+            last_error=error,
+            next_attempt_at=_utcnow() + timedelta(seconds=delay),
+        )
@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque keyset cursor for the last row of a page (datetimes allowed)."""
+    payload = [{"dt": value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    """Inverse of ``encode_cursor``. Raises ``ValueError`` for a malformed cursor.
+
+    With ``types``, the cursor must hold exactly that many values of those
+    types, so a well-formed cursor of the wrong shape is refused here
+    rather than when its values reach SQL.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list):
+            raise ValueError("cursor must encode a list")
+        values = [
+            datetime.fromisoformat(value["dt"]) if isinstance(value, dict) and "dt" in value else value
+            for value in payload
+        ]
+    except (TypeError, KeyError, UnicodeDecodeError, json.JSONDecodeError, base64.binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if types:
+        # bool is an int to isinstance, but never a valid id
+        if len(values) != len(types) or not all(
+            isinstance(value, expected) and not isinstance(value, bool) for value, expected in zip(values, types)
+        ):
+            raise ValueError(f"Invalid cursor: expected {len(types)} values of {', '.join(t.__name__ for t in types)}")
+    return values
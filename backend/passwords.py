@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 16))
+
+password_hash_seconds = Histogram(
+    "password_hash_seconds",
+    "Time to hash or verify a password, including queueing for a worker process",
+    labelnames=("operation",),
+)
+
+
+class PasswordHashQueueFull(Exception):
+    pass
+
+
+# Top-level so the process pool can pickle them by reference
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_password(password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs bcrypt in a small process pool so it never blocks the event loop.
+
+    bcrypt costs ~250ms of CPU by design. At most ``max_pending`` calls may
+    be queued or running at once; beyond that ``PasswordHashQueueFull`` is
+    raised so callers can shed load instead of piling up work.
+    """
+
+    def __init__(self, max_workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: forking a process with live threads and an
+            # event loop can deadlock the children
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        if self._pending >= self.max_pending:
+            logger.warning("Password %s rejected: %s already pending", operation, self._pending)
+            raise PasswordHashQueueFull()
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._pending -= 1
+            password_hash_seconds.observe(time.perf_counter() - start, operation=operation)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", _hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run("verify", _verify_password, password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
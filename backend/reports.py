@@ -0,0 +1,158 @@
+"""Report pages built from completion records.
+
+A page is one statement: the user's completion records, keyset-paginated
+on ``(completed_at, id)``, joined to each collection's stored
+``item_count``. Totals come from ``CompletionTotals`` rather than a
+``count(*)`` per request, and per-collection counts from the
+``user_collection_stats`` rollup that ``record_completion`` maintains.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from crud import UPSERT_INSERTS
+from models import Collection, CompletionRecord, UserCollectionStats
+
+
+async def fetch_report_rows(
+    db: AsyncSession,
+    user_id: int,
+    limit: int,
+    after: Optional[Tuple[datetime, int]] = None,
+    offset: int = 0,
+) -> List[Tuple[int, int, datetime]]:
+    """``(record_id, item_count, completed_at)`` rows, newest first.
+
+    ``after`` is the ``(completed_at, id)`` of the last row already served.
+    ``offset`` only exists for clients still paging by number.
+    """
+    statement = (
+        select(CompletionRecord.id, Collection.item_count, CompletionRecord.completed_at)
+        .join(Collection, Collection.collection_id == CompletionRecord.collection_id)
+        .where(CompletionRecord.user_id == user_id)
+    )
+    if after is not None:
+        completed_at, record_id = after
+        # Spelled out rather than tuple_() so the bound datetime goes through
+        # MountainDateTime and is compared in UTC like the stored values
+        statement = statement.where(or_(
+            CompletionRecord.completed_at < completed_at,
+            and_(CompletionRecord.completed_at == completed_at, CompletionRecord.id < record_id),
+        ))
+    result = await db.exec(
+        statement.order_by(CompletionRecord.completed_at.desc(), CompletionRecord.id.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def record_completion(db: AsyncSession, user_id: int, collection_id: int, completed_at: datetime) -> None:
+    """Add a completion record and fold it into the user's rollup row.
+
+    One upsert, so concurrent completions can't lose increments. The caller
+    owns the transaction.
+    """
+    db.add(CompletionRecord(collection_id=collection_id, user_id=user_id, completed_at=completed_at))
+
+    day = completed_at.date().toordinal()
+    stats = UserCollectionStats.__table__
+    insert = UPSERT_INSERTS[db.get_bind().dialect.name]
+    statement = insert(stats).values(
+        user_id=user_id,
+        collection_id=collection_id,
+        completion_count=1,
+        first_completed_at=completed_at,
+        last_completed_at=completed_at,
+        current_streak=1,
+        longest_streak=1,
+        last_streak_day=day,
+    )
+    # A completion older than the stored ones (a late or retried write)
+    # counts, but moves neither the streak nor the first/last times back
+    streak = case(
+        (stats.c.last_streak_day >= day, stats.c.current_streak),
+        (stats.c.last_streak_day == day - 1, stats.c.current_streak + 1),
+        else_=1,
+    )
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=[stats.c.user_id, stats.c.collection_id],
+        set_={
+            "completion_count": stats.c.completion_count + 1,
+            "first_completed_at": case(
+                (excluded.first_completed_at < stats.c.first_completed_at, excluded.first_completed_at),
+                else_=stats.c.first_completed_at,
+            ),
+            "last_completed_at": case(
+                (excluded.last_completed_at > stats.c.last_completed_at, excluded.last_completed_at),
+                else_=stats.c.last_completed_at,
+            ),
+            "current_streak": streak,
+            "longest_streak": case((streak > stats.c.longest_streak, streak), else_=stats.c.longest_streak),
+            "last_streak_day": case((stats.c.last_streak_day > day, stats.c.last_streak_day), else_=day),
+        },
+    )
+    await db.flush()
+    await db.exec(statement)
+
+
+async def completion_counts(db: AsyncSession, user_id: int) -> Dict[int, int]:
+    """Completions per collection for one user, from the rollup."""
+    result = await db.exec(
+        select(UserCollectionStats.collection_id, UserCollectionStats.completion_count)
+        .where(UserCollectionStats.user_id == user_id)
+    )
+    return dict(result.all())
+
+
+async def count_completions(db: AsyncSession, user_id: int) -> int:
+    result = await db.exec(
+        select(func.coalesce(func.sum(UserCollectionStats.completion_count), 0))
+        .where(UserCollectionStats.user_id == user_id)
+    )
+    return result.one()
+
+
+class CompletionTotals:
+    """Per-user completion counts, cached for ``ttl`` seconds.
+
+    Writers in this process bump or drop the cached value so it stays exact;
+    the TTL bounds drift from writes made by other workers.
+    """
+
+    def __init__(self, ttl: float = 300, maxsize: int = 10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._totals: Dict[int, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    async def get(self, db: AsyncSession, user_id: int) -> int:
+        with self._lock:
+            cached = self._totals.get(user_id)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        total = await count_completions(db, user_id)
+        with self._lock:
+            if len(self._totals) >= self.maxsize:
+                self._totals.clear()
+            self._totals[user_id] = (total, time.monotonic() + self.ttl)
+        return total
+
+    def increment(self, user_id: int, amount: int = 1) -> None:
+        with self._lock:
+            cached = self._totals.get(user_id)
+            if cached is not None:
+                self._totals[user_id] = (cached[0] + amount, cached[1])
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        with self._lock:
+            if user_id is None:
+                self._totals.clear()
+            else:
+                self._totals.pop(user_id, None)
@@ -0,0 +1,111 @@
+"""Conditional GETs and an in-process cache of serialized responses.
+
+Endpoints derive a strong ETag from cheap version data (``Collection.version``
+and friends) before doing the expensive part of a request. A matching
+``If-None-Match`` gets a bodiless 304; otherwise the body is served from
+``ResponseCache`` if an entry with the same ETag is there, and only built
+and serialized on a miss. Because the ETag names the data it was built
+from, a cached body is never stale, even with other workers writing.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 2048))
+
+# Clients must revalidate, which is cheap; private because some of these
+# responses are per user
+CACHE_CONTROL = "private, no-cache"
+
+
+def _orjson_default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def json_bytes(payload: Any) -> bytes:
+    """Serialize plain data (dicts, lists, datetimes) in one orjson call.
+
+    For payloads built from query rows, which need no validation. UTC is
+    written as ``Z``, the same as Pydantic, so output matches the
+    ``response_model`` path.
+    """
+    return orjson.dumps(payload, default=_orjson_default, option=orjson.OPT_UTC_Z)
+
+
+def make_etag(*parts: Any) -> str:
+    """A strong ETag for the given version data."""
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """Bounded LRU of serialized bodies, one entry per key.
+
+    Each entry remembers the ETag it was built for; a lookup with any other
+    ETag is a miss, and the next ``put`` replaces it.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, etag: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, etag: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+async def conditional_json(
+    cache: ResponseCache,
+    key: Hashable,
+    etag: str,
+    if_none_match: Optional[str],
+    build: Callable[[], Awaitable[Any]],
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """304, a cached body, or ``await build()`` serialized and cached."""
+    headers = {**(headers or {}), "ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    body = cache.get(key, etag)
+    if body is None:
+        body = json_bytes(await build())
+        cache.put(key, etag, body)
+    return Response(body, media_type="application/json", headers=headers)
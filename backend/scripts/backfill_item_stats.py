@@ -0,0 +1,32 @@
+"""Recompute collections.item_count and item_weight from the items table.
+
+    python scripts/backfill_item_stats.py [--collection-id ID ...]
+
+Request handlers adjust the stored stats incrementally; run this after
+editing items by hand or if the numbers are ever suspected of drifting.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlmodel import Session
+
+from crud import refresh_item_stats_statement
+from database import get_engine
+
+
+def backfill_item_stats(collection_ids=None):
+    engine = get_engine()
+    with Session(engine) as db:
+        result = db.exec(refresh_item_stats_statement(collection_ids))
+        db.commit()
+    print(f"Refreshed item stats for {result.rowcount} collections")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--collection-id", type=int, nargs="+", dest="collection_ids")
+    args = parser.parse_args()
+    backfill_item_stats(args.collection_ids)
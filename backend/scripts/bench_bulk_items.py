@@ -0,0 +1,82 @@
+"""Rows per second for inserting collection items, bulk vs. one ORM object per item.
+
+    python scripts/bench_bulk_items.py [--sizes 10 1000 100000] [--database-url URL]
+
+Defaults to a throwaway SQLite file. Pass an async URL (e.g.
+postgresql+asyncpg://...) to measure against Postgres; the benchmark
+creates and drops its own rows but never drops tables there.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from crud import bulk_insert_items, item_rows
+from models import Collection, Item, ItemPayload, User
+
+
+async def insert_orm(db, collection_id, items_data):
+    for item in items_data:
+        db.add(Item(name=item.name, collection_id=collection_id, count=item.count))
+    await db.commit()
+
+
+async def insert_bulk(db, collection_id, items_data):
+    await bulk_insert_items(db, item_rows(collection_id, items_data))
+    await db.commit()
+
+
+async def run(database_url, sizes):
+    engine = create_async_engine(database_url)
+    if database_url.startswith("sqlite"):
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+    Session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with Session() as db:
+        user = User(username=f"bench|{time.time()}", hashed_password="")
+        db.add(user)
+        await db.commit()
+        collection = Collection(name="bench", description="", category="bench", user_id=user.user_id)
+        db.add(collection)
+        await db.commit()
+
+    print(f"{'items':>8} {'method':>6} {'seconds':>9} {'rows/s':>10}")
+    for size in sizes:
+        items_data = [ItemPayload(name=f"word{i}") for i in range(size)]
+        for method, insert in (("orm", insert_orm), ("bulk", insert_bulk)):
+            async with Session() as db:
+                start = time.perf_counter()
+                await insert(db, collection.collection_id, items_data)
+                elapsed = time.perf_counter() - start
+                await db.exec(delete(Item).where(Item.collection_id == collection.collection_id))
+                await db.commit()
+            print(f"{size:>8} {method:>6} {elapsed:>9.4f} {size / elapsed:>10.0f}")
+
+    async with Session() as db:
+        await db.exec(delete(Collection).where(Collection.collection_id == collection.collection_id))
+        await db.exec(delete(User).where(User.user_id == user.user_id))
+        await db.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    if args.database_url:
+        asyncio.run(run(args.database_url, args.sizes))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(run(f"sqlite+aiosqlite:///{tmp}/bench.db", args.sizes))
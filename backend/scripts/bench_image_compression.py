@@ -0,0 +1,136 @@
+"""Feedback image compression throughput, per core and across the pool.
+
+    python scripts/bench_image_compression.py [--count 24] [--workers 1 2 4]
+
+Builds synthetic phone screenshots (PNG, 1170x2532 and 1080x2400) and
+phone photos (JPEG, 3024x4032), then times compression of each kind in
+this process with and without JPEG draft decoding, and through
+ImageCompressor pools of the given sizes.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from PIL import Image, ImageDraw
+from PIL.JpegImagePlugin import JpegImageFile
+
+import images
+from images import ImageCompressor, compress_image_bytes
+
+
+def screenshot(size, seed):
+    """Flat UI-like blocks and text-ish lines, like an app screenshot."""
+    rng = random.Random(seed)
+    img = Image.new("RGB", size, (245, 245, 247))
+    draw = ImageDraw.Draw(img)
+    y = 0
+    while y < size[1]:
+        height = rng.randint(60, 260)
+        color = tuple(rng.randint(0, 255) for _ in range(3))
+        draw.rectangle([24, y + 12, size[0] - 24, y + height], fill=color)
+        for line in range(y + 30, y + height - 10, 28):
+            draw.line([48, line, rng.randint(200, size[0] - 48), line], fill=(30, 30, 30), width=6)
+        y += height + 16
+    return img
+
+
+def photo(size, seed):
+    """Gradient plus noise, which compresses like a camera photo."""
+    noise = Image.effect_noise(size, 40).convert("RGB")
+    gradient = Image.linear_gradient("L").resize(size).convert("RGB")
+    return Image.blend(gradient, noise, 0.3 + (seed % 3) / 10)
+
+
+def encode(img, format):
+    buffer = io.BytesIO()
+    img.save(buffer, format=format, **({"quality": 92} if format == "JPEG" else {}))
+    return buffer.getvalue()
+
+
+def build_samples(count):
+    kinds = {
+        "screenshot-png": [encode(screenshot(((1170, 2532), (1080, 2400))[i % 2], i), "PNG") for i in range(count)],
+        "photo-jpeg": [encode(photo((3024, 4032), i), "JPEG") for i in range(count)],
+    }
+    return kinds
+
+
+def report(label, count, seconds, cores):
+    rate = count / seconds
+    print(f"  {label:<28} {rate:8.1f} img/s   {rate / cores:8.1f} img/s/core")
+
+
+def bench_in_process(samples):
+    start = time.perf_counter()
+    for data in samples:
+        compress_image_bytes(data)
+    return time.perf_counter() - start
+
+
+def bench_without_draft(samples):
+    # Same work with draft decoding disabled, for comparison
+    original = JpegImageFile.draft
+    JpegImageFile.draft = lambda self, mode, size: None
+    try:
+        return bench_in_process(samples)
+    finally:
+        JpegImageFile.draft = original
+
+
+def write_samples(samples, directory):
+    os.makedirs(directory)
+    paths = []
+    for i, data in enumerate(samples):
+        path = os.path.join(directory, f"sample{i}")
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    return paths
+
+
+def bench_pool(samples, workers, directory):
+    # Fresh copies every run: compress_image_file caches its output next to
+    # the source, and a cached derivative would time a file read instead
+    paths = write_samples(samples, os.path.join(directory, f"timed-{workers}"))
+    warmup = write_samples(samples[:workers], os.path.join(directory, f"warmup-{workers}"))
+    compressor = ImageCompressor(max_workers=workers)
+    try:
+        # Warm the pool so process start-up isn't counted
+        compressor.compress_files(warmup)
+        start = time.perf_counter()
+        results = compressor.compress_files(paths)
+        seconds = time.perf_counter() - start
+    finally:
+        compressor.shutdown()
+    assert all(results), "compression failed"
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=24)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, images.IMAGE_COMPRESSION_WORKERS}))
+    args = parser.parse_args()
+
+    print(f"Building {args.count} samples of each kind...")
+    kinds = build_samples(args.count)
+    with tempfile.TemporaryDirectory() as directory:
+        for kind, samples in kinds.items():
+            megabytes = sum(len(data) for data in samples) / args.count / 1e6
+            print(f"{kind} ({megabytes:.1f} MB each)")
+            report("in process", args.count, bench_in_process(samples), 1)
+            if kind.endswith("jpeg"):
+                report("in process, no draft", args.count, bench_without_draft(samples), 1)
+            for workers in args.workers:
+                seconds = bench_pool(samples, workers, os.path.join(directory, kind))
+                report(f"pool, {workers} workers", args.count, seconds, workers)
+
+
+if __name__ == "__main__":
+    main()
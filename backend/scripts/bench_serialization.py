@@ -0,0 +1,120 @@
+"""Cost of loading and serializing collection lists, per 1,000 collections.
+
+    python scripts/bench_serialization.py [--collections 1000] [--repeat 20]
+
+Fills an in-memory SQLite database and times the list endpoints' work
+the old way and the current way:
+
+  before  ORM objects -> CollectionRead.model_validate -> response_model
+          validation and dump (or jsonable_encoder + json.dumps when served
+          from the response cache)
+  after   plain rows -> dicts -> orjson (cache path), or one validation
+          and dump by the response_model (search)
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from pytz import timezone
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from crud import bulk_insert_items, preview_items, summarize_collections, summary_columns
+from models import Collection, CollectionRead, User
+from response_cache import json_bytes
+
+RESPONSE = TypeAdapter(List[CollectionRead])
+
+
+async def populate(db, count):
+    user = User(username="bench", hashed_password="")
+    db.add(user)
+    await db.flush()
+    start = timezone("America/Denver").localize(datetime(2026, 1, 1))
+    collections = [
+        Collection(
+            name=f"Collection {i}",
+            description="Sight words for the spring term",
+            category="Words",
+            user_id=user.user_id,
+            created_at=start + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+    db.add_all(collections)
+    await db.flush()
+    rows = [
+        {"name": f"word{n}", "collection_id": collection.collection_id, "count": 1, "svg": None}
+        for collection in collections
+        for n in range(8)
+    ]
+    await bulk_insert_items(db, rows)
+    await db.commit()
+    return user.user_id
+
+
+async def before(db, user_id, cached):
+    db.expunge_all()
+    result = await db.exec(select(Collection).where(Collection.user_id == user_id))
+    collections = result.all()
+    previews = await preview_items(db, [collection.collection_id for collection in collections])
+    models = [
+        CollectionRead.model_validate(collection, update={"preview_items": previews[collection.collection_id]})
+        for collection in collections
+    ]
+    if cached:
+        return JSONResponse(jsonable_encoder(models)).body
+    return RESPONSE.dump_json(RESPONSE.validate_python(models))
+
+
+async def after(db, user_id, cached):
+    result = await db.exec(select(*summary_columns()).where(Collection.user_id == user_id))
+    summaries = await summarize_collections(db, result.all())
+    if cached:
+        return json_bytes(summaries)
+    return RESPONSE.dump_json(RESPONSE.validate_python(summaries))
+
+
+async def timed(fn, db, user_id, cached, repeat):
+    await fn(db, user_id, cached)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = await fn(db, user_id, cached)
+    return (time.perf_counter() - start) / repeat, len(body)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--collections", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        user_id = await populate(db, args.collections)
+        scale = 1000 / args.collections
+        for cached in (False, True):
+            label = "cache miss (orjson)" if cached else "response_model"
+            old, old_size = await timed(before, db, user_id, cached, args.repeat)
+            new, new_size = await timed(after, db, user_id, cached, args.repeat)
+            print(f"{label}:")
+            print(f"  before  {old * scale * 1000:7.1f} ms per 1k collections   ({old_size} bytes)")
+            print(f"  after   {new * scale * 1000:7.1f} ms per 1k collections   ({new_size} bytes)")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
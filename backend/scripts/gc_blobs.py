@@ -0,0 +1,32 @@
+"""Delete blob store files that nothing refers to any more.
+
+    python scripts/gc_blobs.py [--root DIR] [--grace-hours 24]
+
+Safe to run while the app is serving: anything written or re-uploaded
+within the grace period is kept.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlmodel import Session
+
+from blobstore import BlobStore, collect_garbage
+from database import get_engine
+
+
+def gc_blobs(root=None, grace_hours=24.0):
+    store = BlobStore(root)
+    with Session(get_engine()) as db:
+        removed = collect_garbage(db, store, grace_hours * 3600)
+    print(f"Removed {removed} unreferenced blobs from {store.root}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root")
+    parser.add_argument("--grace-hours", type=float, default=24.0)
+    args = parser.parse_args()
+    gc_blobs(args.root, args.grace_hours)
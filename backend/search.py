@@ -0,0 +1,160 @@
+"""Indexed search over public collections.
+
+Postgres matches words through a generated ``tsvector`` column with a GIN
+index, and substrings/typos through ``pg_trgm`` GIN indexes on the
+collection name and creator columns. SQLite (the test database) uses an
+FTS5 table with the trigram tokenizer, kept in sync by triggers.
+
+``install_search_ddl`` attaches the DDL to the metadata so ``create_all``
+builds it; database.py does that for the app's metadata. Alembic revision
+``5c7a9e3d1f08`` runs the same statements for existing databases.
+
+Results come best match first, keyset-paginated on (rank, collection_id)
+like the public feed, so a deep page doesn't re-read the pages before it.
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy import DDL, event, text
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "ALTER TABLE collections ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(name, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_collections_search_vector ON collections USING gin (search_vector)",
+    "CREATE INDEX IF NOT EXISTS ix_collections_name_trgm ON collections USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_username_trgm ON users USING gin (username gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_display_name_trgm ON users USING gin (display_name gin_trgm_ops)",
+]
+
+SQLITE_CREATOR = "(SELECT coalesce(username, '') || ' ' || coalesce(display_name, '') FROM users WHERE user_id = new.user_id)"
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS ix_users_display_name_trgm",
+    "DROP INDEX IF EXISTS ix_users_username_trgm",
+    "DROP INDEX IF EXISTS ix_collections_name_trgm",
+    "DROP INDEX IF EXISTS ix_collections_search_vector",
+    "ALTER TABLE collections DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS collections_fts USING fts5(name, creator, tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS collections_fts_insert AFTER INSERT ON collections BEGIN "
+    f"INSERT INTO collections_fts(rowid, name, creator) VALUES (new.collection_id, new.name, {SQLITE_CREATOR}); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS collections_fts_update AFTER UPDATE OF name, user_id ON collections BEGIN "
+    f"UPDATE collections_fts SET name = new.name, creator = {SQLITE_CREATOR} WHERE rowid = new.collection_id; "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS collections_fts_delete AFTER DELETE ON collections BEGIN "
+    "DELETE FROM collections_fts WHERE rowid = old.collection_id; "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF username, display_name ON users BEGIN "
+    "UPDATE collections_fts SET creator = coalesce(new.username, '') || ' ' || coalesce(new.display_name, '') "
+    "WHERE rowid IN (SELECT collection_id FROM collections WHERE user_id = new.user_id); "
+    "END",
+]
+
+SQLITE_TRIGGERS = ["users_fts_update", "collections_fts_delete", "collections_fts_update", "collections_fts_insert"]
+
+SQLITE_DROP = [f"DROP TRIGGER IF EXISTS {trigger}" for trigger in SQLITE_TRIGGERS] + [
+    "DROP TABLE IF EXISTS collections_fts",
+]
+
+# Fills the FTS table for collections that predate the triggers
+SQLITE_BACKFILL = (
+    "INSERT INTO collections_fts(rowid, name, creator) "
+    "SELECT c.collection_id, c.name, coalesce(u.username, '') || ' ' || coalesce(u.display_name, '') "
+    "FROM collections c LEFT JOIN users u ON u.user_id = c.user_id"
+)
+
+# Candidates from each index, unioned, then ranked. Keeping the branches
+# separate lets the planner use one index per branch instead of a seq scan.
+POSTGRES_SEARCH = """
+WITH query AS (SELECT websearch_to_tsquery('simple', :q) AS tsq),
+matches AS (
+    SELECT c.collection_id FROM collections c, query
+    WHERE c.search_vector @@ query.tsq
+    UNION
+    SELECT c.collection_id FROM collections c
+    WHERE c.name ILIKE :pattern ESCAPE '\\' OR c.name % :q
+    UNION
+    SELECT c.collection_id FROM users u JOIN collections c ON c.user_id = u.user_id
+    WHERE u.username ILIKE :pattern ESCAPE '\\' OR u.display_name ILIKE :pattern ESCAPE '\\'
+)
+SELECT c.collection_id, greatest(
+    ts_rank(c.search_vector, query.tsq),
+    similarity(c.name, :q),
+    similarity(coalesce(u.display_name, ''), :q)
+)::float8 AS rank
+FROM matches m
+JOIN collections c ON c.collection_id = m.collection_id
+JOIN users u ON u.user_id = c.user_id, query
+WHERE c.status = 'public'
+"""
+
+# bm25 is lower for better matches; negated so every dialect ranks high-first
+SQLITE_SEARCH = """
+SELECT c.collection_id, -bm25(collections_fts) AS rank
+FROM collections_fts f
+JOIN collections c ON c.collection_id = f.rowid
+WHERE collections_fts MATCH :match AND c.status = 'public'
+"""
+
+# The trigram tokenizer can't MATCH fewer than three characters; LIKE on
+# the FTS table still works for those, just without the index.
+SQLITE_SHORT_SEARCH = """
+SELECT c.collection_id, 0.0 AS rank
+FROM collections_fts f
+JOIN collections c ON c.collection_id = f.rowid
+WHERE (f.name LIKE :pattern ESCAPE '\\' OR f.creator LIKE :pattern ESCAPE '\\') AND c.status = 'public'
+"""
+
+# Wraps any of the above: one page after the (rank, collection_id) cursor
+PAGE = """
+SELECT collection_id, rank FROM ({matches}) AS ranked
+{after}
+ORDER BY rank DESC, collection_id DESC
+LIMIT :limit
+"""
+AFTER = "WHERE (rank, collection_id) < (:after_rank, :after_id)"
+
+
+def install_search_ddl(metadata=SQLModel.metadata) -> None:
+    for statement in POSTGRES_DDL:
+        event.listen(metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+    for statement in SQLITE_DDL:
+        event.listen(metadata, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    for statement in SQLITE_DROP:
+        event.listen(metadata, "before_drop", DDL(statement).execute_if(dialect="sqlite"))
+
+
+def _like_pattern(query: str) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+async def search_public_collections(
+    db: AsyncSession, query: str, limit: int, after: Optional[Tuple[float, int]] = None
+) -> List[Tuple[int, float]]:
+    """``(collection_id, rank)`` of public collections matching ``query``.
+
+    Best match first. ``after`` is the last row of the previous page.
+    """
+    dialect = db.get_bind().dialect.name
+    params = {"limit": limit}
+    if after is not None:
+        params["after_rank"], params["after_id"] = after
+    if dialect == "postgresql":
+        sql = POSTGRES_SEARCH
+        params.update(q=query, pattern=_like_pattern(query))
+    elif len(query) >= 3:
+        sql = SQLITE_SEARCH
+        # Quoted so FTS5 treats the input as a literal phrase, not syntax
+        params["match"] = '"' + query.replace('"', '""') + '"'
+    else:
+        sql = SQLITE_SHORT_SEARCH
+        params["pattern"] = _like_pattern(query)
+    sql = PAGE.format(matches=sql, after=AFTER if after is not None else "")
+    result = await db.exec(text(sql).bindparams(**params))
+    return [(collection_id, rank) for collection_id, rank in result.all()]
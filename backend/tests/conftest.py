@@ -1,7 +1,9 @@
 import os
+import re
+import time
 import pytest
 from sqlalchemy.orm import sessionmaker
-from sqlmodel import SQLModel
+from sqlmodel import Session, SQLModel
 from main import app
 from database import get_db, get_engine
 
@@ -11,6 +13,18 @@ os.environ["TESTING"] = "True"
 # Get the test engine
 test_engine = get_engine()
 
+# A route running more SQL statements than its budget fails the test
+import main
+main.SQL_BUDGET_STRICT = True
+
+@pytest.fixture
+def sql_statements():
+    """How many SQL statements produced a response, from its Server-Timing header."""
+    def count(response):
+        match = re.search(r'db;desc="(\d+) statements"', response.headers["server-timing"])
+        return int(match.group(1))
+    return count
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_db():
     SQLModel.metadata.create_all(test_engine)
@@ -21,7 +35,8 @@ def setup_test_db():
 def db_session():
     connection = test_engine.connect()
     transaction = connection.begin()
-    session = sessionmaker(bind=connection)()
+    # Same Session class get_db hands out, bound to a rolled-back transaction
+    session = sessionmaker(bind=connection, class_=Session)()
     yield session
     session.close()
     transaction.rollback()
@@ -35,3 +50,70 @@ def client(db_session):
     from fastapi.testclient import TestClient
     yield TestClient(app)
     del app.dependency_overrides[get_db]
+
+@pytest.fixture(scope="session")
+def rsa_signing_key():
+    """A local RSA key pair plus the JWKS document Auth0 would serve for it."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from jose import jwk
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk.update({"kid": "test-key", "use": "sig", "alg": "RS256"})
+    return {"kid": "test-key", "private_pem": private_pem, "jwks": {"keys": [public_jwk]}}
+
+@pytest.fixture(scope="function")
+def jwks_stub(rsa_signing_key):
+    """Point the app's JWKS cache at the local key set instead of Auth0.
+
+    Cached principals are dropped too so every test starts from a cold cache.
+    """
+    import main
+
+    calls = []
+
+    def fetch(url):
+        calls.append(url)
+        return rsa_signing_key["jwks"]
+
+    original_fetcher = main.jwks_cache.fetcher
+    main.jwks_cache.fetcher = fetch
+    main.jwks_cache.clear()
+    main.principal_cache.clear()
+    yield calls
+    main.jwks_cache.fetcher = original_fetcher
+    main.jwks_cache.clear()
+    main.principal_cache.clear()
+
+@pytest.fixture(scope="function")
+def make_token(rsa_signing_key):
+    import main
+    from jose import jwt as jose_jwt
+
+    def _make_token(sub="auth0|jwksuser", **claims):
+        payload = {
+            "sub": sub,
+            "iss": f"https://{main.AUTH0_DOMAIN}/",
+            "exp": int(time.time()) + 3600,
+            **claims,
+        }
+        if main.AUTH0_AUDIENCE:
+            payload.setdefault("aud", main.AUTH0_AUDIENCE)
+        return jose_jwt.encode(
+            payload,
+            rsa_signing_key["private_pem"],
+            algorithm="RS256",
+            headers={"kid": rsa_signing_key["kid"]},
+        )
+
+    return _make_token
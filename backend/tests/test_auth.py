@@ -0,0 +1,176 @@
+import time
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+from auth import JWKSCache, PrincipalCache, upsert_auth0_user
+from models import User
+
+JWKS_URL = "https://example.test/.well-known/jwks.json"
+
+@pytest.fixture
+def fetch_counter(rsa_signing_key):
+    calls = []
+
+    def fetch(url):
+        calls.append(url)
+        return rsa_signing_key["jwks"]
+
+    fetch.calls = calls
+    return fetch
+
+async def test_jwks_cache_fetches_once(fetch_counter, rsa_signing_key):
+    cache = JWKSCache(JWKS_URL, fetcher=fetch_counter)
+    for _ in range(5):
+        key, alg = await cache.get_key(rsa_signing_key["kid"])
+        assert key is not None
+        assert alg == "RS256"
+    assert len(fetch_counter.calls) == 1
+
+async def test_jwks_cache_refetches_unknown_kid_once(fetch_counter):
+    cache = JWKSCache(JWKS_URL, fetcher=fetch_counter, min_refetch_interval=0)
+    key, _ = await cache.get_key("rotated-key")
+    assert key is None
+    # Initial load plus a single refetch for the unknown kid
+    assert len(fetch_counter.calls) == 2
+
+async def test_jwks_cache_rate_limits_unknown_kid_refetch(fetch_counter):
+    cache = JWKSCache(JWKS_URL, fetcher=fetch_counter, min_refetch_interval=60)
+    for _ in range(3):
+        key, _ = await cache.get_key("forged-key")
+        assert key is None
+    assert len(fetch_counter.calls) == 1
+
+async def test_jwks_cache_refreshes_after_ttl(fetch_counter, rsa_signing_key):
+    cache = JWKSCache(JWKS_URL, fetcher=fetch_counter, ttl=0, refresh_ahead=0)
+    await cache.get_key(rsa_signing_key["kid"])
+    await cache.get_key(rsa_signing_key["kid"])
+    assert len(fetch_counter.calls) == 2
+
+async def test_jwks_cache_serves_stale_keys_when_refresh_fails(rsa_signing_key):
+    responses = [rsa_signing_key["jwks"]]
+
+    def flaky_fetch(url):
+        if not responses:
+            raise ConnectionError("auth0 down")
+        return responses.pop()
+
+    cache = JWKSCache(JWKS_URL, fetcher=flaky_fetch, ttl=0, refresh_ahead=0)
+    await cache.get_key(rsa_signing_key["kid"])
+    key, _ = await cache.get_key(rsa_signing_key["kid"])
+    assert key is not None
+
+def test_get_current_user_uses_cached_jwks(client, jwks_stub, make_token):
+    headers = {"Authorization": f"Bearer {make_token(email='jwks@example.com')}"}
+    for _ in range(3):
+        response = client.get("/users/me/", headers=headers)
+        assert response.status_code == 200, response.text
+        assert response.json()["username"] == "auth0|jwksuser"
+    assert len(jwks_stub) == 1
+
+def test_get_current_user_rejects_unknown_kid(client, jwks_stub, rsa_signing_key):
+    from jose import jwt as jose_jwt
+
+    token = jose_jwt.encode(
+        {"sub": "auth0|intruder"},
+        rsa_signing_key["private_pem"],
+        algorithm="RS256",
+        headers={"kid": "not-a-real-key"},
+    )
+    response = client.get("/users/me/", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+
+def test_principal_cache_respects_exp():
+    cache = PrincipalCache()
+    cache.put("expired", {"user_id": 1}, exp=time.time() - 1)
+    cache.put("live", {"user_id": 1}, exp=time.time() + 30)
+    assert cache.get("expired") is None
+    assert cache.get("live") == {"user_id": 1}
+
+def test_principal_cache_evicts_least_recently_used():
+    cache = PrincipalCache(maxsize=2)
+    cache.put("a", {"user_id": 1})
+    cache.put("b", {"user_id": 2})
+    cache.get("a")
+    cache.put("c", {"user_id": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert len(cache) == 2
+
+def test_principal_cache_invalidates_all_tokens_for_user():
+    cache = PrincipalCache()
+    cache.put("phone", {"user_id": 1})
+    cache.put("laptop", {"user_id": 1})
+    cache.put("other", {"user_id": 2})
+    cache.invalidate_user(1)
+    assert cache.get("phone") is None
+    assert cache.get("laptop") is None
+    assert cache.get("other") is not None
+
+def test_get_current_user_skips_verification_for_cached_token(client, jwks_stub, make_token, monkeypatch):
+    import main
+
+    headers = {"Authorization": f"Bearer {make_token()}"}
+    assert client.get("/users/me/", headers=headers).status_code == 200
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("token verified twice")
+
+    monkeypatch.setattr(main.jwt, "decode", fail_decode)
+    response = client.get("/users/me/", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["username"] == "auth0|jwksuser"
+
+def test_display_name_update_invalidates_cached_principal(client, jwks_stub, make_token):
+    import main
+
+    headers = {"Authorization": f"Bearer {make_token()}"}
+    assert client.get("/users/me/", headers=headers).status_code == 200
+    assert len(main.principal_cache) == 1
+
+    response = client.put("/users/me/display_name", json={"display_name": "Ms. Frizzle"}, headers=headers)
+    assert response.status_code == 200
+    assert len(main.principal_cache) == 0
+    assert client.get("/users/me/", headers=headers).json()["display_name"] == "Ms. Frizzle"
+
+@pytest.fixture
+def upsert_session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    with Session(engine) as session:
+        session.statements = statements
+        yield session
+
+def test_upsert_creates_new_user(upsert_session):
+    user = upsert_auth0_user(upsert_session, "auth0|new", "new@example.com", "New Teacher")
+    assert user.user_id is not None
+    assert user.display_name == "New Teacher"
+    assert user.role == "student"
+
+def test_upsert_is_read_only_for_healthy_user(upsert_session):
+    upsert_auth0_user(upsert_session, "auth0|steady", None, "Steady")
+    upsert_session.statements.clear()
+    user = upsert_auth0_user(upsert_session, "auth0|steady", None, "Other Name")
+    assert user.display_name == "Steady"
+    assert all(statement.lstrip().upper().startswith("SELECT") for statement in upsert_session.statements)
+
+def test_upsert_repairs_display_name(upsert_session):
+    upsert_session.add(User(username="auth0|broken", display_name="auth0|broken", hashed_password=""))
+    upsert_session.commit()
+    user = upsert_auth0_user(upsert_session, "auth0|broken", None, "Fixed")
+    assert user.display_name == "Fixed"
+    assert len(upsert_session.exec(select(User)).all()) == 1
+
+def test_upsert_keeps_name_repaired_concurrently(upsert_session, monkeypatch):
+    # Our read saw a broken name, but another request fixed it before our
+    # write: the conditional DO UPDATE must leave the row alone.
+    import auth
+
+    upsert_session.add(User(username="auth0|race", display_name="First Writer", hashed_password=""))
+    upsert_session.commit()
+    monkeypatch.setattr(auth, "needs_display_name_repair", lambda display_name, username: True)
+    user = upsert_auth0_user(upsert_session, "auth0|race", None, "Second")
+    assert user.display_name == "First Writer"
+    assert len(upsert_session.exec(select(User)).all()) == 1
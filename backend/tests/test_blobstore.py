@@ -0,0 +1,72 @@
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from blobstore import BlobStore, collect_garbage, record_blobs
+from models import Blob, Feedback
+
+def put(store, data, age=0):
+    digest = hashlib.sha256(data).hexdigest()
+    os.makedirs(store.temp_dir, exist_ok=True)
+    temp_path = os.path.join(store.temp_dir, "upload")
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    path = store.adopt(temp_path, digest)
+    if age:
+        past = time.time() - age
+        os.utime(path, (past, past))
+    return digest
+
+def test_adopt_keeps_one_copy(tmp_path):
+    store = BlobStore(str(tmp_path))
+    digest = put(store, b"hello")
+    assert put(store, b"hello") == digest
+    assert store.path(digest) == os.path.join(str(tmp_path), digest[:2], digest[2:4], digest)
+    assert list(store.digests()) == [digest]
+    assert os.listdir(store.temp_dir) == []
+
+async def test_record_blobs_keeps_one_row_per_digest():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        await record_blobs(db, [("a" * 64, 5), ("a" * 64, 5), ("b" * 64, 7)])
+        await record_blobs(db, [("a" * 64, 5)])
+        await db.commit()
+        assert [blob.sha256 for blob in (await db.exec(select(Blob).order_by(Blob.sha256))).all()] == ["a" * 64, "b" * 64]
+    await engine.dispose()
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+def test_collect_garbage_keeps_referenced_and_recent_blobs(tmp_path, session):
+    store = BlobStore(str(tmp_path))
+    hour = 3600
+    kept = put(store, b"kept", age=2 * hour)
+    released = put(store, b"released", age=2 * hour)
+    orphan = put(store, b"orphan", age=2 * hour)
+    fresh_orphan = put(store, b"fresh")
+    with open(store.path(released) + ".800x800q85.jpg", "wb") as f:
+        f.write(b"derivative")
+    session.add(Blob(sha256=kept, size=4))
+    session.add(Blob(sha256=released, size=8))
+    session.add(Feedback(message="Look", page_url="/", created_at=datetime.now(timezone.utc), image_paths=[store.path(kept), "uploads/old.png"]))
+    session.commit()
+
+    assert collect_garbage(session, store, grace_seconds=hour) == 2
+    assert sorted(store.digests()) == sorted([kept, fresh_orphan])
+    assert os.listdir(os.path.dirname(store.path(released))) == []
+    assert session.get(Blob, released) is None
+    assert session.get(Blob, kept) is not None
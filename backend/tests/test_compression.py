@@ -0,0 +1,79 @@
+import gzip
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from fastapi.testclient import TestClient
+
+from compression import CompressionMiddleware, available_encoders, negotiate
+
+BIG = [{"name": f"word{i}", "count": 1} for i in range(200)]
+
+def test_negotiate_prefers_server_order_on_ties_and_honours_q():
+    assert negotiate("gzip, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate("gzip;q=1, br;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate("*;q=0.1, gzip;q=0", ["br", "gzip"]) == "br"
+    assert negotiate("identity", ["gzip"]) is None
+    assert negotiate(None, ["gzip"]) is None
+
+def make_client(calls):
+    async def items(request):
+        return JSONResponse(BIG, headers={"ETag": '"v1"'})
+
+    async def small(request):
+        return JSONResponse({"ok": True})
+
+    async def image(request):
+        return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+    async def stream(request):
+        async def lines():
+            for i in range(50):
+                calls.append(i)
+                yield b'{"line": %d, "padding": "%s"}\n' % (i, b"x" * 100)
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    app = Starlette(routes=[Route(path, fn) for path, fn in
+                            [("/items", items), ("/small", small), ("/image", image), ("/stream", stream)]])
+    # gzip only, whatever optional encoders are installed
+    gzip_only = {"gzip": available_encoders()["gzip"]}
+    return TestClient(CompressionMiddleware(app, minimum_size=500, encoders=gzip_only))
+
+def test_compresses_large_json_and_weakens_etag():
+    client = make_client([])
+    response = client.get("/items", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == 'W/"v1"'
+    assert response.json() == BIG
+    assert int(response.headers["content-length"]) < len(JSONResponse(BIG).body) / 3
+
+def test_leaves_small_binary_and_unaccepted_responses_alone():
+    client = make_client([])
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.headers["vary"] == "Accept-Encoding"
+    image = client.get("/image", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in image.headers
+    plain = client.get("/items", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] == '"v1"'
+
+def test_reuses_compressed_body_for_same_etag():
+    middleware = make_client([]).app
+    client = TestClient(middleware)
+    client.get("/items", headers={"Accept-Encoding": "gzip"})
+    assert len(middleware.cache) == 1
+    assert client.get("/items", headers={"Accept-Encoding": "gzip"}).json() == BIG
+    assert len(middleware.cache) == 1
+
+def test_streams_compressed_chunks():
+    calls = []
+    client = make_client(calls)
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+    assert len(calls) == 50
+    lines = gzip.decompress(raw).splitlines()
+    assert len(lines) == 50
@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from crud import detach_references, lock_collections
+from models import Collection, Item, User
+from tests.test_reports import postgres_url
+
+# SQLite has no row locks, so this only means something on Postgres
+@pytest.mark.skipif(postgres_url() is None, reason="TEST_DATABASE_URL is not Postgres")
+async def test_subscribing_waits_for_a_write_to_the_source():
+    engine = create_async_engine(postgres_url())
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        user = User(username="teacher", hashed_password="")
+        db.add(user)
+        await db.flush()
+        source = Collection(name="source", description="", category="Words", user_id=user.user_id)
+        db.add(source)
+        await db.flush()
+        db.add(Item(name="sun", collection_id=source.collection_id))
+        await db.commit()
+
+    async with AsyncSession(engine) as writer, AsyncSession(engine) as subscriber:
+        await detach_references(writer, source.collection_id)
+        waiting = asyncio.ensure_future(lock_collections(subscriber, Collection.collection_id == source.collection_id))
+        await asyncio.sleep(0.5)
+        assert not waiting.done()
+
+        await writer.exec(Item.__table__.delete().where(Item.collection_id == source.collection_id))
+        await writer.commit()
+        assert await asyncio.wait_for(waiting, 5) == [source.collection_id]
+        # The subscriber now sees the write it waited for
+        assert (await subscriber.exec(select(Item).where(Item.collection_id == source.collection_id))).all() == []
+        await subscriber.rollback()
+    await engine.dispose()
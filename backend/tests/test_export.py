@@ -0,0 +1,48 @@
+import gzip
+import json
+from datetime import datetime
+
+from pytz import timezone
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from export import stream_export
+from models import Collection, Item, User
+
+DENVER = timezone("America/Denver")
+
+async def test_stream_export_writes_every_row_in_batches():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        user = User(username="exporter", hashed_password="$2b$12$secret-hash")
+        db.add(user)
+        await db.flush()
+        collection = Collection(
+            name="words", description="", category="Words", user_id=user.user_id,
+            created_at=DENVER.localize(datetime(2026, 3, 1, 9)),
+        )
+        db.add(collection)
+        await db.flush()
+        db.add_all([Item(collection_id=collection.collection_id, name=f"w{i}") for i in range(25)])
+        await db.commit()
+
+    chunks = [chunk async for chunk in stream_export(engine, batch_size=10)]
+    await engine.dispose()
+
+    # A chunk per batch of 10 plus the users and collections tables
+    assert len(chunks) >= 5
+    lines = [json.loads(line) for line in gzip.decompress(b"".join(chunks)).splitlines()]
+    tables = [line["table"] for line in lines]
+    assert tables.index("users") < tables.index("collections") < tables.index("items")
+    assert tables.count("items") == 25
+    user = next(line["row"] for line in lines if line["table"] == "users")
+    assert user["username"] == "exporter"
+    assert "hashed_password" not in user
+    assert b"secret-hash" not in gzip.decompress(b"".join(chunks))
+    exported = next(line["row"] for line in lines if line["table"] == "collections")
+    assert exported["name"] == "words"
+    assert datetime.fromisoformat(exported["created_at"]) == DENVER.localize(datetime(2026, 3, 1, 9))
@@ -0,0 +1,51 @@
+import io
+
+import pytest
+from PIL import Image
+
+from images import ImageCompressor, compress_image_bytes, compress_image_file
+
+def encode(img, format, **options):
+    buffer = io.BytesIO()
+    img.save(buffer, format=format, **options)
+    return buffer.getvalue()
+
+def test_compress_large_jpeg_fits_max_size():
+    photo = encode(Image.linear_gradient("L").resize((3024, 4032)).convert("RGB"), "JPEG", quality=95)
+    result = Image.open(io.BytesIO(compress_image_bytes(photo)))
+    assert result.format == "JPEG"
+    assert max(result.size) == 800
+    assert result.size == (600, 800)
+
+def test_compress_rgba_png_to_jpeg():
+    screenshot = encode(Image.new("RGBA", (1170, 2532), (20, 120, 200, 128)), "PNG")
+    result = Image.open(io.BytesIO(compress_image_bytes(screenshot)))
+    assert (result.format, result.mode) == ("JPEG", "RGB")
+    assert result.size[1] == 800
+
+@pytest.fixture(scope="module")
+def compressor():
+    compressor = ImageCompressor(max_workers=2)
+    yield compressor
+    compressor.shutdown()
+
+def test_compressor_handles_batch_with_bad_file(compressor, tmp_path):
+    good = tmp_path / "good.png"
+    good.write_bytes(encode(Image.new("RGB", (1600, 1200), "white"), "PNG"))
+    bad = tmp_path / "bad.png"
+    bad.write_bytes(b"not an image")
+
+    results = compressor.compress_files([str(good), str(bad), str(tmp_path / "missing.png")])
+    assert Image.open(io.BytesIO(results[0])).size == (800, 600)
+    assert results[1:] == [None, None]
+    assert compressor.compress_files([]) == []
+
+def test_compress_image_file_reuses_derivative(tmp_path):
+    source = tmp_path / "shot"
+    source.write_bytes(encode(Image.new("RGB", (1600, 1200), "white"), "PNG"))
+
+    first = compress_image_file(str(source))
+    assert (tmp_path / "shot.800x800q85.jpg").read_bytes() == first
+    # Served from the derivative now, even with the source gone
+    source.unlink()
+    assert compress_image_file(str(source)) == first
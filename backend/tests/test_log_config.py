@@ -0,0 +1,82 @@
+import io
+import json
+import logging
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytz
+
+from log_config import JSONFormatter, SamplingFilter, _DeferredQueueHandler, current_scope, setup_logging
+
+def make_record(msg, *args, level=logging.INFO, created=None):
+    record = logging.LogRecord("main", level, __file__, 1, msg, args, None)
+    if created is not None:
+        record.created = created
+    return record
+
+def test_json_formatter_uses_mountain_time():
+    formatter = JSONFormatter()
+    winter = datetime(2026, 1, 15, 12, 0, 0, 250000, tzinfo=pytz.utc).timestamp()
+    summer = datetime(2026, 7, 15, 12, 0, 0, tzinfo=pytz.utc).timestamp()
+
+    entry = json.loads(formatter.format(make_record("Found %s collections", 3, created=winter)))
+    assert entry == {
+        "ts": "2026-01-15T05:00:00.250-07:00",
+        "level": "INFO",
+        "logger": "main",
+        "message": "Found 3 collections",
+    }
+    assert json.loads(formatter.format(make_record("x", created=summer)))["ts"] == "2026-07-15T06:00:00.000-06:00"
+    # Same second as the last record: served from the cached prefix
+    assert json.loads(formatter.format(make_record("x", created=summer + 0.5)))["ts"] == "2026-07-15T06:00:00.500-06:00"
+
+def test_sampling_keeps_one_in_n_per_route():
+    sampler = SamplingFilter({"Attempting to validate token": 3})
+    route = lambda path: {"route": SimpleNamespace(path=path)}
+
+    token = current_scope.set(route("/collections/{collection_id}"))
+    kept = [sampler.filter(make_record("Attempting to validate token")) for _ in range(6)]
+    current_scope.reset(token)
+    assert kept == [True, False, False, True, False, False]
+
+    token = current_scope.set(route("/users/me/"))
+    record = make_record("Attempting to validate token")
+    assert sampler.filter(record)
+    current_scope.reset(token)
+    assert record.route == "/users/me/" and record.sample_rate == 3
+
+    # Other messages and anything above INFO always get through
+    assert all(sampler.filter(make_record("Fetched current user: %s", "ada")) for _ in range(3))
+    assert all(sampler.filter(make_record("Attempting to validate token", level=logging.WARNING)) for _ in range(3))
+
+def test_only_plain_arguments_are_left_for_the_listener():
+    class Row:
+        name = "before"
+
+        def __str__(self):
+            return self.name
+
+    handler = _DeferredQueueHandler(None)
+    plain = handler.prepare(make_record("Deleted collection %s for %s", 7, "ada"))
+    assert (plain.msg, plain.args) == ("Deleted collection %s for %s", (7, "ada"))
+
+    row = Row()
+    record = handler.prepare(make_record("Saved %s", row))
+    row.name = "after"
+    assert (record.msg, record.args) == ("Saved before", None)
+
+def test_setup_logging_formats_on_the_listener():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    stream = io.StringIO()
+    listener = setup_logging(logging.INFO, {}, stream=stream)
+    try:
+        logging.getLogger("main").info("Deleted collection %s", 7)
+        logging.getLogger("main").debug("not shown")
+    finally:
+        listener.stop()
+        root.handlers, root.level = handlers, level
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["message"] == "Deleted collection 7"
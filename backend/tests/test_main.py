@@ -1,5 +1,7 @@
+import hashlib
 import os
 import sys
+import json
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, SQLModel, select
@@ -7,6 +9,7 @@ from main import app, get_current_user
 from database import get_engine, get_db
 from models import User
 import jwt
+from contextlib import contextmanager
 
 # Remove the import of "engine" from main, as it's no longer there
 
@@ -65,6 +68,24 @@ def authenticated_client(client, session, mock_auth0_token):
     client.headers.update({"Authorization": mock_auth0_token})
     return client
 
+@pytest.fixture(scope="module")
+def as_teacher(authenticated_client, session):
+    """``with as_teacher():`` sends requests as a second user, to subscribe to."""
+    teacher = User(username="auth0|teacher", email="teacher@example.com", hashed_password="")
+    session.add(teacher)
+    session.commit()
+    session.refresh(teacher)
+
+    @contextmanager
+    def acting():
+        override = app.dependency_overrides[get_current_user]
+        app.dependency_overrides[get_current_user] = lambda: teacher
+        try:
+            yield
+        finally:
+            app.dependency_overrides[get_current_user] = override
+    return acting
+
 def test_health_check(client):
     response = client.get("/health")
     assert response.status_code == 200
@@ -141,3 +162,542 @@ def test_get_namelists(authenticated_client):
     response = authenticated_client.get("/namelists/")
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+
+def test_create_collection_with_items(authenticated_client):
+    collection_data = {
+        "name": "letters",
+        "description": json.dumps([{"name": "a"}, {"name": "b", "count": 2}]),
+        "category": "Letters",
+        "status": "private"
+    }
+    response = authenticated_client.post("/collections", json=collection_data)
+    assert response.status_code == 200, f"Response: {response.json()}"
+    created = response.json()
+    collection_id = created["collection_id"]
+    assert (created["item_count"], created["item_weight"], created["preview_items"]) == (2, 3, ["a", "b"])
+
+    response = authenticated_client.get(f"/collections/{collection_id}/items")
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()] == ["a", "b"]
+    assert [item["item_id"] for item in response.json()] == created["item_ids"]
+
+def test_update_and_delete_namelist(authenticated_client):
+    response = authenticated_client.post("/namelists/", json={"name": "class", "names": ["Ann"]})
+    namelist_id = response.json()["namelist_id"]
+
+    response = authenticated_client.put(f"/namelists/{namelist_id}", json={"name": "class", "names": ["Ann", "Bo"]})
+    assert response.status_code == 200
+    assert response.json()["names"] == ["Ann", "Bo"]
+
+    response = authenticated_client.delete(f"/namelists/{namelist_id}")
+    assert response.status_code == 200
+    assert authenticated_client.put(f"/namelists/{namelist_id}", json={"name": "x", "names": []}).status_code == 404
+
+def test_complete_collection_counts(authenticated_client):
+    response = authenticated_client.post("/collections", json={
+        "name": "numbers",
+        "description": json.dumps([{"name": "1"}]),
+        "category": "Numbers",
+    })
+    collection_id = response.json()["collection_id"]
+
+    for _ in range(2):
+        assert authenticated_client.post(f"/collections/{collection_id}/complete").status_code == 200
+
+    counts = authenticated_client.get("/collections/completion-counts").json()
+    assert counts[str(collection_id)] == 2
+
+def test_item_stats_follow_item_writes(authenticated_client):
+    response = authenticated_client.post("/collections", json={
+        "name": "stats", "category": "Words", "items": [{"name": "a", "count": 3}, {"name": "b"}],
+    })
+    body = response.json()
+    assert (body["item_count"], body["item_weight"]) == (2, 4)
+    collection_id = body["collection_id"]
+
+    def stats():
+        collections = authenticated_client.get("/users/me/collections").json()
+        match = next(c for c in collections if c["collection_id"] == collection_id)
+        return match["item_count"], match["item_weight"]
+
+    authenticated_client.post(f"/collections/{collection_id}/items", json=["c"])
+    assert stats() == (3, 5)
+
+    items = authenticated_client.get(f"/collections/{collection_id}/items").json()
+    response = authenticated_client.delete(f"/collections/{collection_id}/items/{items[0]['item_id']}")
+    assert response.status_code == 200
+    assert stats() == (2, 2)
+    assert authenticated_client.delete(f"/collections/{collection_id}/items/{items[0]['item_id']}").status_code == 404
+
+    authenticated_client.put(f"/collections/{collection_id}", json={"items": [{"name": "z", "count": 7}]})
+    assert stats() == (1, 7)
+
+def test_reports_keyset_pagination(authenticated_client):
+    response = authenticated_client.post("/collections", json={
+        "name": "reported", "category": "Words", "items": [{"name": "a"}, {"name": "b"}, {"name": "c"}],
+    })
+    collection_id = response.json()["collection_id"]
+    before = authenticated_client.get("/reports").json()["total_count"]
+    for _ in range(3):
+        authenticated_client.post(f"/collections/{collection_id}/complete")
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = authenticated_client.get("/reports", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total_count"] == before + 3
+        seen.extend(body["reports"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    ids = [report["report_id"] for report in seen]
+    assert len(ids) == len(set(ids)) == before + 3
+    assert [report["total_items"] for report in seen[:3]] == [3, 3, 3]
+    # Page numbers still work for older clients
+    second = authenticated_client.get("/reports", params={"limit": 2, "page": 2}).json()
+    assert [report["report_id"] for report in second["reports"]] == ids[2:4]
+
+def test_reports_rejects_malformed_cursor(authenticated_client):
+    from datetime import datetime
+    from pagination import encode_cursor
+
+    cursors = ["not-a-cursor"] + [encode_cursor(*values) for values in [(1,), ("x", "y"), (datetime(2026, 1, 1), True)]]
+    for cursor in cursors:
+        response = authenticated_client.get("/reports", params={"cursor": cursor})
+        assert response.status_code == 400, cursor
+        assert response.json()["detail"] == "Invalid cursor"
+
+def test_create_items_returns_ids(authenticated_client):
+    response = authenticated_client.post("/collections", json={
+        "name": "bulk",
+        "description": json.dumps([{"name": f"word{i}"} for i in range(50)]),
+        "category": "Words",
+    })
+    collection_id = response.json()["collection_id"]
+    assert len(authenticated_client.get(f"/collections/{collection_id}/items").json()) == 50
+
+    response = authenticated_client.post(f"/collections/{collection_id}/items", json=["extra1", "extra2"])
+    assert response.status_code == 200
+    item_ids = response.json()["item_ids"]
+    assert len(item_ids) == 2
+    items = authenticated_client.get(f"/collections/{collection_id}/items").json()
+    assert {item["item_id"] for item in items if item["name"].startswith("extra")} == set(item_ids)
+
+def test_invalid_items_create_nothing(authenticated_client):
+    before = len(authenticated_client.get("/users/me/collections").json())
+    response = authenticated_client.post("/collections", json={
+        "name": "broken",
+        "description": json.dumps([{"label": "no name"}]),
+        "category": "Words",
+    })
+    assert response.status_code == 400
+    assert len(authenticated_client.get("/users/me/collections").json()) == before
+
+def test_legacy_json_description_moves_to_items(authenticated_client):
+    response = authenticated_client.post("/collections", json={
+        "name": "shapes",
+        "description": json.dumps([{"name": "circle", "svg": "<svg/>"}, "square"]),
+        "category": "Shapes",
+    })
+    assert response.status_code == 200
+    assert response.json()["description"] == ""
+    collection_id = response.json()["collection_id"]
+
+    items = authenticated_client.get(f"/collections/{collection_id}/items").json()
+    assert [(item["name"], item["svg"]) for item in items] == [("circle", "<svg/>"), ("square", None)]
+
+def test_list_endpoints_return_compact_summary(authenticated_client):
+    response = authenticated_client.post("/collections", json={
+        "name": "long list",
+        "description": "Sight words for week 3",
+        "category": "Words",
+        "status": "public",
+        "items": [{"name": f"word{i}"} for i in range(40)],
+    })
+    collection_id = response.json()["collection_id"]
+
+    listed = {c["collection_id"]: c for c in authenticated_client.get("/users/me/collections").json()}
+    summary = listed[collection_id]
+    assert summary["description"] == "Sight words for week 3"
+    assert summary["item_count"] == 40
+    assert summary["preview_items"] == ["word0", "word1", "word2", "word3", "word4"]
+
+    public = {c["collection_id"]: c for c in authenticated_client.get("/collections/public").json()}
+    assert public[collection_id]["item_count"] == 40
+    assert "items" not in public[collection_id]
+
+def test_update_collection_replaces_items(authenticated_client):
+    response = authenticated_client.post("/collections", json={
+        "name": "editable",
+        "category": "Words",
+        "items": [{"name": "old"}],
+    })
+    collection_id = response.json()["collection_id"]
+
+    response = authenticated_client.put(f"/collections/{collection_id}", json={
+        "description": json.dumps([{"name": "new1"}, {"name": "new2", "count": 2}]),
+    })
+    assert response.status_code == 200
+    assert response.json()["description"] == ""
+    items = authenticated_client.get(f"/collections/{collection_id}/items").json()
+    assert [(item["name"], item["count"]) for item in items] == [("new1", 1), ("new2", 2)]
+
+def test_description_length_is_bounded(authenticated_client):
+    response = authenticated_client.post("/collections", json={
+        "name": "wordy",
+        "description": "x" * 501,
+        "category": "Words",
+    })
+    assert response.status_code == 400
+
+def test_public_collections_keyset_pagination(authenticated_client):
+    created = set()
+    for i in range(5):
+        response = authenticated_client.post("/collections", json={
+            "name": f"public {i}",
+            "category": "Feed",
+            "status": "public",
+            "items": [{"name": "a"}],
+        })
+        created.add(response.json()["collection_id"])
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = authenticated_client.get("/collections/public", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(c["collection_id"] for c in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == len(set(seen))
+    assert created <= set(seen)
+    page = authenticated_client.get("/collections/public", params={"limit": 100}).json()
+    assert [c["collection_id"] for c in page] == seen
+    assert all(c["creator_username"] == "auth0|testuser" for c in page if c["collection_id"] in created)
+
+def test_next_cursor_is_exposed_to_the_browser_client(authenticated_client):
+    import main
+    response = authenticated_client.get(
+        "/collections/public", params={"limit": 1}, headers={"Origin": main.LOCAL_FRONTEND_URL}
+    )
+    assert "X-Next-Cursor" in response.headers["access-control-expose-headers"]
+
+def test_public_collections_rejects_bad_cursor(authenticated_client):
+    from datetime import datetime
+    from pagination import encode_cursor
+
+    response = authenticated_client.get("/collections/public", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    # Decodes fine, but isn't a (created_at, collection_id) pair
+    for values in [(1,), ("x", "y"), (datetime(2026, 1, 1), "7"), (datetime(2026, 1, 1), 7, 8)]:
+        response = authenticated_client.get("/collections/public", params={"cursor": encode_cursor(*values)})
+        assert response.status_code == 400, values
+        assert response.json()["detail"] == "Invalid cursor"
+
+def test_search_collections_ranked_and_paginated(authenticated_client):
+    for name, status in [("Dinosaur names", "public"), ("Dinosaur facts", "public"), ("Dinosaur secrets", "private")]:
+        authenticated_client.post("/collections", json={
+            "name": name, "category": "Science", "status": status, "items": [{"name": "T-Rex"}],
+        })
+
+    response = authenticated_client.get("/collections/search", params={"query": "dinosaur"})
+    assert response.status_code == 200
+    names = {c["name"] for c in response.json()}
+    assert names == {"Dinosaur names", "Dinosaur facts"}
+    assert all(c["item_count"] == 1 and c["creator_username"] == "auth0|testuser" for c in response.json())
+
+    first = authenticated_client.get("/collections/search", params={"query": "dinosaur", "limit": 1})
+    assert len(first.json()) == 1
+    second = authenticated_client.get(
+        "/collections/search",
+        params={"query": "dinosaur", "limit": 1, "cursor": first.headers["X-Next-Cursor"]},
+    )
+    assert len(second.json()) == 1
+    assert "X-Next-Cursor" not in second.headers
+    assert {first.json()[0]["name"], second.json()[0]["name"]} == names
+
+def test_search_pages_match_the_unpaged_ranking(authenticated_client):
+    for name in ["Planet facts", "Planets", "Planet names and planet moons", "Dwarf planet", "Planetarium"]:
+        authenticated_client.post("/collections", json={
+            "name": name, "category": "Science", "status": "public", "items": [],
+        })
+
+    # Long queries go through the ranked index, short ones through LIKE
+    for query in ("planet", "Pl"):
+        everything = [c["collection_id"] for c in authenticated_client.get(
+            "/collections/search", params={"query": query, "limit": 50}).json()]
+        assert len(everything) >= 5
+        paged, cursor = [], None
+        while True:
+            params = {"query": query, "limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = authenticated_client.get("/collections/search", params=params)
+            paged.extend(c["collection_id"] for c in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert paged == everything
+
+def test_search_matches_substrings_and_creator(authenticated_client):
+    authenticated_client.post("/collections", json={
+        "name": "Ocean animals", "category": "Science", "status": "public", "items": [],
+    })
+    assert "Ocean animals" in {c["name"] for c in authenticated_client.get("/collections/search", params={"query": "cean"}).json()}
+    assert "Ocean animals" in {c["name"] for c in authenticated_client.get("/collections/search", params={"query": "Oc"}).json()}
+    by_creator = authenticated_client.get("/collections/search", params={"query": "testuser"}).json()
+    assert "Ocean animals" in {c["name"] for c in by_creator}
+    assert authenticated_client.get("/collections/search", params={"query": '"; DROP'}).status_code == 200
+
+def test_subscribe_shares_items_until_edited(authenticated_client, as_teacher):
+    with as_teacher():
+        response = authenticated_client.post("/collections", json={
+            "name": "shared words", "category": "Words", "status": "public",
+            "items": [{"name": "cat", "count": 2}, {"name": "dog", "svg": "<svg/>"}, {"name": "emu"}],
+        })
+    source_id = response.json()["collection_id"]
+
+    def items(collection_id):
+        return authenticated_client.get(f"/collections/{collection_id}/items").json()
+
+    response = authenticated_client.post(f"/collections/subscribe/{source_id}")
+    assert response.status_code == 200, response.text
+    copy = response.json()
+    copy_id = copy["collection_id"]
+    assert copy["source_collection_id"] == source_id
+    assert copy["items_source_id"] == source_id
+    assert (copy["item_count"], copy["item_weight"]) == (3, 4)
+    assert [(i["name"], i["count"], i["svg"], i["collection_id"]) for i in items(copy_id)] == [
+        ("cat", 2, None, copy_id), ("dog", 1, "<svg/>", copy_id), ("emu", 1, None, copy_id),
+    ]
+
+    assert authenticated_client.post(f"/collections/subscribe/{source_id}").status_code == 400
+    assert authenticated_client.get(f"/collections/check-subscription/{source_id}").json() == {"isSubscribed": True}
+    response = authenticated_client.post("/collections/check-subscriptions-batch", json={"collection_ids": [source_id, 999999]})
+    assert response.json() == {str(source_id): True}
+
+    # Deleting through the copy materializes it without touching the source
+    dog = next(i for i in items(copy_id) if i["name"] == "dog")
+    assert authenticated_client.delete(f"/collections/{copy_id}/items/{dog['item_id']}").status_code == 200
+    assert [i["name"] for i in items(copy_id)] == ["cat", "emu"]
+    with as_teacher():
+        assert [i["name"] for i in items(source_id)] == ["cat", "dog", "emu"]
+    collections = {c["collection_id"]: c for c in authenticated_client.get("/users/me/collections").json()}
+    assert (collections[copy_id]["item_count"], collections[copy_id]["item_weight"]) == (2, 3)
+    assert collections[copy_id]["preview_items"] == ["cat", "emu"]
+
+def test_subscribe_to_own_collection_is_refused(authenticated_client):
+    response = authenticated_client.post("/collections", json={
+        "name": "my own list", "category": "Words", "status": "public", "items": [{"name": "sun"}],
+    })
+    source_id = response.json()["collection_id"]
+    assert authenticated_client.post(f"/collections/subscribe/{source_id}").status_code == 400
+    names = [c["name"] for c in authenticated_client.get("/users/me/collections").json()]
+    assert names.count("my own list") == 1
+
+def test_source_edit_leaves_subscribers_items(authenticated_client, as_teacher):
+    with as_teacher():
+        response = authenticated_client.post("/collections", json={
+            "name": "teacher list", "category": "Words", "status": "public", "items": [{"name": "sun"}],
+        })
+    source_id = response.json()["collection_id"]
+    copy_id = authenticated_client.post(f"/collections/subscribe/{source_id}").json()["collection_id"]
+
+    with as_teacher():
+        authenticated_client.put(f"/collections/{source_id}", json={"items": [{"name": "moon"}]})
+    assert [i["name"] for i in authenticated_client.get(f"/collections/{copy_id}/items").json()] == ["sun"]
+
+    with as_teacher():
+        assert authenticated_client.delete(f"/collections/{source_id}").status_code == 200
+    assert [i["name"] for i in authenticated_client.get(f"/collections/{copy_id}/items").json()] == ["sun"]
+
+def test_collection_reads_answer_conditional_gets(authenticated_client, as_teacher):
+    with as_teacher():
+        response = authenticated_client.post("/collections", json={
+            "name": "etag list", "category": "Words", "status": "public", "items": [{"name": "sun"}],
+        })
+    source_id = response.json()["collection_id"]
+    copy_id = authenticated_client.post(f"/collections/subscribe/{source_id}").json()["collection_id"]
+
+    def revalidate(url):
+        first = authenticated_client.get(url)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        again = authenticated_client.get(url, headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        return etag
+
+    urls = [f"/collections/{copy_id}/items", "/users/me/collections", "/collections/public?limit=50"]
+    etags = {url: revalidate(url) for url in urls}
+    # Editing the source gives the subscriber its own copy: every read changes
+    with as_teacher():
+        authenticated_client.put(f"/collections/{source_id}", json={"items": [{"name": "moon"}]})
+    for url in urls:
+        response = authenticated_client.get(url, headers={"If-None-Match": etags[url]})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etags[url]
+    assert [i["name"] for i in authenticated_client.get(f"/collections/{copy_id}/items").json()] == ["sun"]
+
+    # Renaming only the collection still changes the lists
+    etag = revalidate("/users/me/collections")
+    authenticated_client.put(f"/collections/{copy_id}", json={"name": "renamed"})
+    response = authenticated_client.get("/users/me/collections", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "renamed" in [c["name"] for c in response.json()]
+
+    # The public feed shows the creator's name, so it changes with it
+    etag = revalidate("/collections/public?limit=50")
+    authenticated_client.put("/users/me/display_name", json={"display_name": "Etag Tester"})
+    response = authenticated_client.get("/collections/public?limit=50", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "Etag Tester" in [c["creator_display_name"] for c in response.json()]
+
+def test_items_etag_survives_id_reuse(authenticated_client):
+    def create(item):
+        return authenticated_client.post("/collections", json={
+            "name": "reused", "category": "Words", "items": [{"name": item}],
+        }).json()["collection_id"]
+
+    first_id = create("old")
+    etag = authenticated_client.get(f"/collections/{first_id}/items").headers["etag"]
+    authenticated_client.delete(f"/collections/{first_id}")
+    # SQLite hands the highest id out again once its row is gone
+    second_id = create("new")
+    assert second_id == first_id
+
+    response = authenticated_client.get(f"/collections/{second_id}/items", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [i["name"] for i in response.json()] == ["new"]
+
+def test_feedback_rejects_oversized_image(authenticated_client, session, tmp_path, monkeypatch):
+    import blobstore
+    import uploads
+    from models import Blob
+
+    monkeypatch.setattr(blobstore, "BLOB_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_FILE_BYTES", 100)
+    store = blobstore.BlobStore(str(tmp_path))
+    data = {"message": "hi", "page_url": "/home", "display_name": "Tester"}
+
+    response = authenticated_client.post("/api/feedback", data=data, files=[("files", ("big.png", b"x" * 101, "image/png"))])
+    assert response.status_code == 413
+    assert list(store.digests()) == []
+    assert os.listdir(store.temp_dir) == []
+
+    # The same image sent twice is stored and recorded once
+    for name in ("ok.png", "again.png"):
+        response = authenticated_client.post("/api/feedback", data=data, files=[("files", (name, b"x" * 100, "image/png"))])
+        assert response.status_code == 200, response.text
+    digests = list(store.digests())
+    assert len(digests) == 1
+    assert session.get(Blob, digests[0]).size == 100
+
+def test_feedback_queues_github_issue(authenticated_client, session, tmp_path, monkeypatch):
+    import blobstore
+    from models import FeedbackOutbox
+
+    monkeypatch.setattr(blobstore, "BLOB_STORE_DIR", str(tmp_path))
+    response = authenticated_client.post("/api/feedback", data={
+        "message": "Queue me", "page_url": "/reports", "display_name": "Tester",
+    }, files=[("files", ("my screen.png", b"pixels", "image/png"))])
+    assert response.status_code == 200, response.text
+
+    row = session.exec(select(FeedbackOutbox).order_by(FeedbackOutbox.id.desc())).first()
+    assert row.status == "pending"
+    assert row.payload["message"] == "Queue me"
+    assert row.payload["display_name"] == "Tester"
+    assert row.payload["image_names"] == ["my_screen.png"]
+    assert os.path.basename(row.payload["image_paths"][0]) == hashlib.sha256(b"pixels").hexdigest()
+
+def test_db_export_requires_admin(authenticated_client, monkeypatch):
+    import gzip
+    import export
+
+    assert authenticated_client.get("/db-export").status_code == 403
+
+    monkeypatch.setattr(export, "ADMIN_USERNAMES", frozenset({"auth0|testuser"}))
+    response = authenticated_client.get("/db-export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    rows = [json.loads(line) for line in gzip.decompress(response.content).splitlines()]
+    assert any(row["table"] == "users" and row["row"]["username"] == "auth0|testuser" for row in rows)
+
+def test_metrics_exposes_pools_queries_and_routes(authenticated_client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "METRICS_OPEN", True)
+    authenticated_client.get("/users/me/collections")
+    response = authenticated_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'db_pool_checkouts_total{pool="async"}' in text
+    assert 'db_pool_checked_out{pool="sync"}' in text
+    assert 'db_query_seconds_count{statement="SELECT collections.collection_id' in text
+    assert 'http_request_seconds_count{method="GET",route="/users/me/collections",status="200"}' in text
+
+    # Outside development it is closed until a token is configured
+    monkeypatch.setattr(main, "METRICS_OPEN", False)
+    assert authenticated_client.get("/metrics").status_code == 401
+    monkeypatch.setattr(main, "METRICS_TOKEN", "scrape-secret")
+    assert authenticated_client.get("/metrics").status_code == 401
+    assert authenticated_client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+
+def test_list_routes_run_a_fixed_number_of_statements(authenticated_client, sql_statements):
+    # A query per row (N+1) would make these grow with the page
+    urls = ["/users/me/collections", "/collections/public?limit=50", "/collections/search?query=budget"]
+
+    def counts():
+        return [sql_statements(authenticated_client.get(url)) for url in urls]
+
+    def add(n):
+        for i in range(n):
+            authenticated_client.post("/collections", json={
+                "name": f"budget {i}", "category": "Words", "status": "public",
+                "items": [{"name": "a"}, {"name": "b"}],
+            })
+
+    add(2)
+    before = counts()
+    add(6)
+    assert counts() == before
+
+def test_feedback_statements_do_not_grow_with_attachments(authenticated_client, tmp_path, monkeypatch, sql_statements):
+    import blobstore
+
+    monkeypatch.setattr(blobstore, "BLOB_STORE_DIR", str(tmp_path))
+    data = {"message": "Screenshots", "page_url": "/reports", "display_name": "Tester"}
+
+    def post(n):
+        files = [("files", (f"shot{i}.png", f"image {n} {i}".encode(), "image/png")) for i in range(n)]
+        response = authenticated_client.post("/api/feedback", data=data, files=files)
+        assert response.status_code == 200, response.text
+        return sql_statements(response)
+
+    one = post(1)
+    assert one >= 1
+    assert post(6) == one
+
+def test_statement_budget_is_enforced(authenticated_client, monkeypatch, sql_statements):
+    import main
+    from db_metrics import StatementBudgetExceeded
+
+    response = authenticated_client.get("/namelists/")
+    assert response.headers["server-timing"].startswith("db;desc=")
+    statements = sql_statements(response)
+    assert statements >= 1
+    monkeypatch.setattr(main, "SQL_STATEMENT_BUDGET", statements - 1)
+    with pytest.raises(StatementBudgetExceeded, match=f"GET /namelists/ ran {statements} SQL statements"):
+        authenticated_client.get("/namelists/")
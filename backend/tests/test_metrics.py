@@ -0,0 +1,28 @@
+from db_metrics import fingerprint
+from metrics import Counter, Gauge, Histogram, Registry
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    hits = Counter("cache_hits", "Cache hits", ["cache"], registry=registry)
+    size = Gauge("queue_depth", "Items waiting", registry=registry)
+    latency = Histogram("work_seconds", "Work time", ["kind"], buckets=(0.1, 1.0), registry=registry)
+    hits.inc(cache='a"b')
+    hits.inc(2, cache='a"b')
+    size.set_function(lambda: 7)
+    latency.observe(0.5, kind="x")
+
+    text = registry.render()
+    assert "# TYPE cache_hits counter\ncache_hits_total{cache=\"a\\\"b\"} 3\n" in text
+    assert "queue_depth 7\n" in text
+    assert 'work_seconds_bucket{kind="x",le="0.1"} 0\n' in text
+    assert 'work_seconds_bucket{kind="x",le="1"} 1\n' in text
+    assert 'work_seconds_bucket{kind="x",le="+Inf"} 1\n' in text
+    assert 'work_seconds_count{kind="x"} 1\n' in text
+
+def test_fingerprint_collapses_data_out_of_statements():
+    assert fingerprint("SELECT * FROM items WHERE items.collection_id IN (?, ?, ?) LIMIT ?") == \
+        fingerprint("SELECT * FROM items\n WHERE items.collection_id IN (?, ?) LIMIT 20") == \
+        "SELECT * FROM items WHERE items.collection_id IN (...) LIMIT ?"
+    assert fingerprint("INSERT INTO items (name, count) VALUES ($1, $2), ($3, $4) RETURNING items.item_id") == \
+        "INSERT INTO items (name, count) VALUES (...) RETURNING items.item_id"
+    assert fingerprint("SELECT 'it''s' FROM t WHERE x = %(x_1)s") == "SELECT ? FROM t WHERE x = ?"
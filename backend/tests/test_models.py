@@ -2,7 +2,10 @@ import os
 import sys
 import pytest
 from sqlmodel import SQLModel, Session, create_engine, select
-from models import User, Sequence, Collection, Item, NameList
+from datetime import datetime
+import pytz
+from sqlalchemy.dialects import postgresql
+from models import User, Sequence, Collection, Item, NameList, MountainDateTime
 
 # Set up testing environment
 os.environ["TESTING"] = "True"
@@ -297,3 +300,14 @@ def test_delete_namelist(session):
     session.commit()
     deleted_namelist = session.exec(select(NameList).where(NameList.name == "testnamelist")).first()
     assert deleted_namelist is None
+
+# MountainDateTime columns are timestamp WITHOUT time zone
+def test_mountain_datetime_binds_naive_utc():
+    denver = pytz.timezone("America/Denver")
+    column_type = MountainDateTime()
+    dialect = postgresql.dialect()
+    aware = denver.localize(datetime(2026, 7, 1, 9, 30))
+    assert column_type.process_bind_param(aware, dialect) == datetime(2026, 7, 1, 15, 30)
+    # Naive values are taken as Mountain Time
+    assert column_type.process_bind_param(datetime(2026, 1, 1, 9, 30), dialect) == datetime(2026, 1, 1, 16, 30)
+    assert column_type.process_result_value(datetime(2026, 7, 1, 15, 30), dialect) == aware
@@ -0,0 +1,198 @@
+import base64
+import io
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from PIL import Image
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from github_integration import GitHubIssueCreator
+from images import ImageCompressor
+from models import Feedback, FeedbackOutbox
+from outbox import FeedbackOutboxDispatcher
+
+class FakeGitHub(ThreadingHTTPServer):
+    """Just enough of the GitHub REST API to create issues."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeGitHubHandler)
+        self.requests = []
+        self.responses = []  # (status, headers, body) to serve before succeeding
+        self.issue_number = 0
+        self.issues = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+        self.server.requests.append((self.path, body))
+        if self.server.responses:
+            status, headers, payload = self.server.responses.pop(0)
+        elif self.path.endswith("/issues"):
+            self.server.issue_number += 1
+            status, headers, payload = 201, {}, {"number": self.server.issue_number, "title": body["title"]}
+            self.server.issues.append({**payload, "body": body["body"]})
+        else:
+            status, headers, payload = 201, {}, {"sha": "0" * 40}
+        data = json.dumps(payload).encode()
+        self.respond(status, headers, data)
+
+    def do_GET(self):
+        # Issue search, matching the quoted phrase in the query
+        url = urlsplit(self.path)
+        self.server.requests.append((url.path, None))
+        phrase = parse_qs(url.query)["q"][0].split('"')[1]
+        items = [issue for issue in self.server.issues if phrase in issue["body"]]
+        self.respond(200, {}, json.dumps({"total_count": len(items), "incomplete_results": False, "items": items}).encode())
+
+    def respond(self, status, headers, data):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def fake_github():
+    server = FakeGitHub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+@pytest.fixture
+def dispatcher(fake_github, session_factory):
+    creator = GitHubIssueCreator(
+        token="test-token",
+        repo_name="teacher/race-the-clock",
+        base_url=fake_github.url,
+        compressor=ImageCompressor(max_workers=1),
+        seconds_between_requests=None,
+        seconds_between_writes=None,
+    )
+    yield FeedbackOutboxDispatcher(session_factory, lambda: creator, max_attempts=2, base_backoff=30)
+    creator.compressor.shutdown()
+
+async def queue_feedback(session_factory, message="The timer skips", image_paths=(), image_names=()):
+    async with session_factory() as db:
+        feedback = Feedback(message=message, page_url="/play", created_at=datetime.now(timezone.utc), image_paths=[])
+        db.add(feedback)
+        await db.flush()
+        db.add(FeedbackOutbox(feedback_id=feedback.id, payload={
+            "message": message, "page_url": "/play", "created_at": "2026-10-18 09:00:00 MST",
+            "display_name": "Ms. Frizzle", "image_paths": list(image_paths),
+            "image_names": list(image_names),
+        }))
+        await db.commit()
+
+async def outbox_rows(session_factory):
+    async with session_factory() as db:
+        return (await db.exec(select(FeedbackOutbox))).all()
+
+async def test_dispatcher_creates_issue(dispatcher, fake_github, session_factory):
+    await queue_feedback(session_factory)
+    assert await dispatcher.dispatch_once() == 1
+
+    (row,) = await outbox_rows(session_factory)
+    assert (row.status, row.issue_number, row.attempts) == ("sent", 1, 0)
+    path, body = fake_github.requests[-1]
+    assert path == "/repos/teacher/race-the-clock/issues"
+    assert body["title"] == "Ms. Frizzle - Play - The timer skips"
+    assert f"<!-- feedback-id: {row.feedback_id} -->" in body["body"]
+    # A first claim creates the issue without looking for one
+    assert not any(path == "/search/issues" for path, _ in fake_github.requests)
+    assert await dispatcher.dispatch_once() == 0
+
+async def test_redelivery_finds_the_issue_it_already_created(dispatcher, fake_github, session_factory):
+    await queue_feedback(session_factory)
+    assert await dispatcher.dispatch_once() == 1
+    # As if the worker had died before marking the row sent
+    async with session_factory() as db:
+        (row,) = (await db.exec(select(FeedbackOutbox))).all()
+        row.status, row.issue_number, row.next_attempt_at = "pending", None, datetime.now(timezone.utc)
+        db.add(row)
+        await db.commit()
+
+    assert await dispatcher.dispatch_once() == 1
+    (row,) = await outbox_rows(session_factory)
+    assert (row.status, row.issue_number, row.claims) == ("sent", 1, 2)
+    assert len(fake_github.issues) == 1
+    assert fake_github.requests[-1][0] == "/search/issues"
+
+async def test_dispatcher_backs_off_then_gives_up(dispatcher, fake_github, session_factory):
+    fake_github.responses = [(500, {}, {"message": "boom"})] * 2
+    await queue_feedback(session_factory)
+
+    assert await dispatcher.dispatch_once() == 1
+    (row,) = await outbox_rows(session_factory)
+    assert (row.status, row.attempts) == ("pending", 1)
+    assert row.next_attempt_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) + timedelta(seconds=10)
+    assert await dispatcher.dispatch_once() == 0  # not due yet
+
+    async with session_factory() as db:
+        row.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.add(row)
+        await db.commit()
+    assert await dispatcher.dispatch_once() == 1
+    (row,) = await outbox_rows(session_factory)
+    assert (row.status, row.attempts) == ("failed", 2)
+    assert "boom" in row.last_error
+
+async def test_dispatcher_waits_out_rate_limit(dispatcher, fake_github, session_factory):
+    reset = int(time.time()) + 120
+    fake_github.responses = [(403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reset)},
+                              {"message": "API rate limit exceeded"})]
+    await queue_feedback(session_factory, "first")
+    await queue_feedback(session_factory, "second")
+
+    assert await dispatcher.dispatch_once() == 0
+    rows = await outbox_rows(session_factory)
+    assert all(row.status == "pending" and row.attempts == 0 for row in rows)
+    assert all(row.next_attempt_at.replace(tzinfo=timezone.utc).timestamp() >= reset - 5 for row in rows)
+    # Paused: no further requests reach GitHub until the reset
+    requests = len(fake_github.requests)
+    assert await dispatcher.dispatch_once() == 0
+    assert len(fake_github.requests) == requests
+
+async def test_dispatcher_uploads_compressed_images(dispatcher, fake_github, session_factory, tmp_path):
+    paths = []
+    for i in range(2):
+        # Named by digest in the blob store
+        path = tmp_path / (str(i) * 64)
+        Image.new("RGB", (1170, 2532), (i * 100, 50, 50)).save(path, "PNG")
+        paths.append(str(path))
+    await queue_feedback(session_factory, image_paths=paths, image_names=["shot0.png", "shot1.png"])
+    assert await dispatcher.dispatch_once() == 1
+
+    blobs = [body for path, body in fake_github.requests if path.endswith("/git/blobs")]
+    assert len(blobs) == 2
+    image = Image.open(io.BytesIO(base64.b64decode(blobs[0]["content"])))
+    assert (image.format, image.size[1]) == ("JPEG", 800)
+    _, issue = fake_github.requests[-1]
+    assert "![shot0.png]" in issue["body"] and "![shot1.png]" in issue["body"]
+    assert "0" * 64 not in issue["body"]
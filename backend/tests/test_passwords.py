@@ -0,0 +1,27 @@
+import pytest
+from passwords import PasswordHasher, PasswordHashQueueFull, password_hash_seconds
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(max_workers=1, max_pending=4)
+    yield hasher
+    hasher.shutdown()
+
+async def test_hash_and_verify_in_worker_process(hasher):
+    hashed = await hasher.hash("correct horse")
+    assert hashed.startswith("$2b$")
+    assert await hasher.verify("correct horse", hashed)
+    assert not await hasher.verify("wrong horse", hashed)
+    assert hasher.pending == 0
+
+async def test_hash_latency_is_recorded(hasher):
+    before = password_hash_seconds.count(operation="hash")
+    await hasher.hash("pw")
+    assert password_hash_seconds.count(operation="hash") == before + 1
+    assert password_hash_seconds.sum(operation="hash") > 0
+
+async def test_rejects_when_queue_is_full():
+    hasher = PasswordHasher(max_workers=1, max_pending=0)
+    with pytest.raises(PasswordHashQueueFull):
+        await hasher.hash("pw")
+    assert hasher.pending == 0
@@ -0,0 +1,80 @@
+import os
+from datetime import datetime
+
+import pytest
+from pytz import timezone
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import Collection, User, UserCollectionStats
+from reports import completion_counts, count_completions, record_completion
+
+DENVER = timezone("America/Denver")
+
+def postgres_url():
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url or not url.startswith("postgres"):
+        return None
+    return make_url(url).set(drivername="postgresql+asyncpg")
+
+# asyncpg is strict about the datetimes it binds, so the same tests run
+# there when TEST_DATABASE_URL points at a Postgres database
+@pytest.fixture(params=[
+    "sqlite",
+    pytest.param("postgres", marks=pytest.mark.skipif(postgres_url() is None, reason="TEST_DATABASE_URL is not Postgres")),
+])
+async def async_session(request):
+    if request.param == "postgres":
+        engine = create_async_engine(postgres_url(), connect_args={"server_settings": {"timezone": "America/Denver"}})
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+    else:
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        user = User(username="streaker", hashed_password="")
+        session.add(user)
+        await session.flush()
+        collection = Collection(name="daily", description="", category="Words", user_id=user.user_id)
+        session.add(collection)
+        await session.commit()
+        session.info["ids"] = (user.user_id, collection.collection_id)
+        yield session
+    if request.param == "postgres":
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.drop_all)
+    await engine.dispose()
+
+async def test_record_completion_rolls_up_counts_and_streaks(async_session):
+    user_id, collection_id = async_session.info["ids"]
+    # Two on day one, then days two and four: a two-day streak, then broken
+    for day, hour in [(1, 9), (1, 23), (2, 8), (4, 12)]:
+        await record_completion(async_session, user_id, collection_id, DENVER.localize(datetime(2026, 3, day, hour)))
+        await async_session.commit()
+
+    stats = (await async_session.exec(select(UserCollectionStats))).one()
+    assert stats.completion_count == 4
+    assert (stats.current_streak, stats.longest_streak) == (1, 2)
+    assert stats.first_completed_at == DENVER.localize(datetime(2026, 3, 1, 9))
+    assert stats.last_completed_at == DENVER.localize(datetime(2026, 3, 4, 12))
+
+    assert await completion_counts(async_session, user_id) == {collection_id: 4}
+    assert await count_completions(async_session, user_id) == 4
+
+async def test_record_completion_out_of_order_keeps_latest(async_session):
+    user_id, collection_id = async_session.info["ids"]
+    for day, hour in [(2, 9), (3, 9), (1, 9), (3, 8)]:
+        await record_completion(async_session, user_id, collection_id, DENVER.localize(datetime(2026, 3, day, hour)))
+        await async_session.commit()
+
+    stats = (await async_session.exec(select(UserCollectionStats))).one()
+    assert stats.completion_count == 4
+    # The day-one completion came late: the streak from days two and three stands
+    assert (stats.current_streak, stats.longest_streak) == (2, 2)
+    assert stats.last_streak_day == datetime(2026, 3, 3).toordinal()
+    assert stats.first_completed_at == DENVER.localize(datetime(2026, 3, 1, 9))
+    assert stats.last_completed_at == DENVER.localize(datetime(2026, 3, 3, 9))
@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+from models import ItemRead
+from response_cache import ResponseCache, conditional_json, etag_matches, json_bytes, make_etag
+
+def test_make_etag_is_strong_and_stable():
+    etag = make_etag("items", 1, 3)
+    assert etag == make_etag("items", 1, 3)
+    assert etag != make_etag("items", 1, 4)
+    assert etag.startswith('"') and etag.endswith('"')
+
+def test_etag_matches_lists_weak_and_star():
+    etag = make_etag("x")
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+def test_response_cache_keeps_one_etag_per_key_and_evicts_lru():
+    cache = ResponseCache(maxsize=2)
+    cache.put("a", '"1"', b"a1")
+    cache.put("b", '"1"', b"b1")
+    assert cache.get("a", '"1"') == b"a1"
+    assert cache.get("a", '"2"') is None
+    cache.put("c", '"1"', b"c1")
+    # "b" was least recently used
+    assert cache.get("b", '"1"') is None
+    assert len(cache) == 2
+
+async def test_conditional_json_builds_once():
+    cache = ResponseCache()
+    calls = []
+
+    async def build():
+        calls.append(1)
+        return [{"name": "sun"}]
+
+    etag = make_etag("items", 7, 1)
+    first = await conditional_json(cache, ("items", 7), etag, None, build)
+    second = await conditional_json(cache, ("items", 7), etag, None, build)
+    assert first.body == second.body == b'[{"name":"sun"}]'
+    assert len(calls) == 1
+    not_modified = await conditional_json(cache, ("items", 7), etag, etag, build)
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+def test_json_bytes_matches_pydantic_output():
+    item = ItemRead(item_id=1, name="sun", collection_id=2)
+    payload = {"at": datetime(2026, 3, 1, 16, tzinfo=timezone.utc), "item": item}
+    assert json_bytes(payload) == b'{"at":"2026-03-01T16:00:00Z","item":' + item.model_dump_json().encode() + b"}"
@@ -0,0 +1,64 @@
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from fastapi.testclient import TestClient
+
+from blobstore import BlobStore
+from uploads import RequestSizeLimitMiddleware, UploadTooLarge, save_uploads
+
+def upload(name, data):
+    return UploadFile(file=io.BytesIO(data), filename=name)
+
+async def test_save_uploads_streams_into_the_blob_store(tmp_path):
+    store = BlobStore(str(tmp_path))
+    data = os.urandom(3 * 1024 * 1024 + 5)
+    stored = await save_uploads([upload("../../shot 1.png", data), upload("shot.png", b"small")], store)
+
+    first = stored[0]
+    assert first.sha256 == hashlib.sha256(data).hexdigest()
+    assert first.size == len(data)
+    assert first.filename == "shot_1.png"
+    assert first.path == store.path(first.sha256)
+    with open(first.path, "rb") as f:
+        assert f.read() == data
+    assert sorted(store.digests()) == sorted(s.sha256 for s in stored)
+    assert os.listdir(store.temp_dir) == []
+
+async def test_save_uploads_stores_duplicates_once(tmp_path):
+    store = BlobStore(str(tmp_path))
+    stored = await save_uploads([upload("a.png", b"same"), upload("b.png", b"same")], store)
+    assert stored[0].path == stored[1].path
+    assert [s.filename for s in stored] == ["a.png", "b.png"]
+    assert len(list(store.digests())) == 1
+
+async def test_save_uploads_enforces_file_limit(tmp_path):
+    store = BlobStore(str(tmp_path))
+    with pytest.raises(UploadTooLarge):
+        await save_uploads([upload("big.png", b"x" * 101)], store, max_file_bytes=100)
+    assert list(store.digests()) == []
+    assert os.listdir(store.temp_dir) == []
+
+async def test_save_uploads_enforces_request_limit(tmp_path):
+    store = BlobStore(str(tmp_path))
+    files = [upload("a.png", b"a" * 60), upload("b.png", b"b" * 60)]
+    with pytest.raises(UploadTooLarge, match="in total"):
+        await save_uploads(files, store, max_file_bytes=100, max_request_bytes=100)
+    # The first file stays for the garbage collector; the partial one is gone
+    assert list(store.digests()) == [hashlib.sha256(b"a" * 60).hexdigest()]
+    assert os.listdir(store.temp_dir) == []
+
+def test_request_size_limit_middleware():
+    async def echo(request):
+        return PlainTextResponse(str(len(await request.body())))
+
+    app = Starlette(routes=[Route("/upload", echo, methods=["POST"]), Route("/other", echo, methods=["POST"])])
+    client = TestClient(RequestSizeLimitMiddleware(app, max_bytes=10, paths=["/upload"]))
+    assert client.post("/upload", content=b"x" * 10).text == "10"
+    assert client.post("/upload", content=b"x" * 11).status_code == 413
+    assert client.post("/other", content=b"x" * 11).text == "11"
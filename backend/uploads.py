@@ -0,0 +1,171 @@
+"""Streaming, size-bounded storage for uploaded files.
+
+Uploads are copied to disk a chunk at a time, with every blocking write
+done on a worker thread so the event loop keeps serving other requests.
+Each file is hashed while it streams, written under a temporary name and
+moved into the content-addressed ``BlobStore`` only once complete, so
+readers never see a partial file and a file uploaded twice is kept once.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+from typing import BinaryIO, List, NamedTuple, Optional, Sequence
+
+from fastapi import UploadFile
+from starlette.exceptions import HTTPException
+from starlette.responses import PlainTextResponse
+
+from blobstore import BlobStore
+
+MAX_UPLOAD_FILE_BYTES = int(os.environ.get("MAX_UPLOAD_FILE_BYTES", 10 * 1024 * 1024))
+MAX_UPLOAD_REQUEST_BYTES = int(os.environ.get("MAX_UPLOAD_REQUEST_BYTES", 25 * 1024 * 1024))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+# Multipart boundaries and form fields on top of the files themselves
+REQUEST_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class StoredUpload(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+    filename: str
+
+
+def safe_filename(filename: Optional[str]) -> str:
+    """Client filename reduced to a harmless basename."""
+    name = os.path.basename((filename or "").replace("\\", "/"))
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._")
+    return name[-100:] or "upload"
+
+
+def _write_chunk(buffer: BinaryIO, hasher, chunk: bytes) -> None:
+    buffer.write(chunk)
+    hasher.update(chunk)
+
+
+def _finish(buffer: BinaryIO, store: BlobStore, digest: str) -> str:
+    buffer.flush()
+    os.fsync(buffer.fileno())
+    buffer.close()
+    return store.adopt(buffer.name, digest)
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _discard(buffer: BinaryIO, temp_path: str) -> None:
+    buffer.close()
+    _remove_quietly(temp_path)
+
+
+async def save_upload(upload: UploadFile, store: BlobStore, max_bytes: int) -> StoredUpload:
+    """Stream ``upload`` into ``store``, refusing more than ``max_bytes``."""
+    await asyncio.to_thread(os.makedirs, store.temp_dir, exist_ok=True)
+    buffer = await asyncio.to_thread(
+        tempfile.NamedTemporaryFile, dir=store.temp_dir, prefix="upload-", delete=False
+    )
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"{safe_filename(upload.filename)} is larger than {max_bytes} bytes")
+            await asyncio.to_thread(_write_chunk, buffer, hasher, chunk)
+
+        digest = hasher.hexdigest()
+        final_path = await asyncio.to_thread(_finish, buffer, store, digest)
+    except BaseException:
+        await asyncio.to_thread(_discard, buffer, buffer.name)
+        raise
+    return StoredUpload(final_path, digest, size, safe_filename(upload.filename))
+
+
+async def save_uploads(
+    uploads: Sequence[UploadFile],
+    store: Optional[BlobStore] = None,
+    max_file_bytes: Optional[int] = None,
+    max_request_bytes: Optional[int] = None,
+) -> List[StoredUpload]:
+    """Store every upload of one request.
+
+    Each file may use at most ``max_file_bytes`` and the files together at
+    most ``max_request_bytes``; going over raises ``UploadTooLarge`` after
+    discarding the file being streamed. Files already stored are left for
+    ``scripts/gc_blobs.py``, since another request may share them. Unset
+    arguments take the module settings.
+    """
+    store = store or BlobStore()
+    max_file_bytes = max_file_bytes or MAX_UPLOAD_FILE_BYTES
+    max_request_bytes = max_request_bytes or MAX_UPLOAD_REQUEST_BYTES
+    stored: List[StoredUpload] = []
+    remaining = max_request_bytes
+    for upload in uploads:
+        limit = min(max_file_bytes, remaining)
+        try:
+            upload_file = await save_upload(upload, store, limit)
+        except UploadTooLarge:
+            if limit < max_file_bytes:
+                raise UploadTooLarge(f"Uploads are larger than {max_request_bytes} bytes in total")
+            raise
+        stored.append(upload_file)
+        remaining -= upload_file.size
+    return stored
+
+
+class RequestSizeLimitMiddleware:
+    """Reject request bodies over ``max_bytes`` on the given paths with 413.
+
+    Starlette spools a multipart body to disk before the handler runs, so
+    the handler's own limits come too late to protect the disk. This
+    refuses an oversized ``Content-Length`` up front and stops reading a
+    body that grows past the limit without one.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: Sequence[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > self.max_bytes:
+                    response = PlainTextResponse("Request body too large", status_code=413)
+                    await response(scope, receive, send)
+                    return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -12,9 +12,13 @@ if (!API_BASE_URL) {
   console.error("VITE_API_BASE_URL is not set in the environment variables");
 }
 
-interface Item {
-  id: number;
+// One row of GET /collections/{id}/items, in the collection's order
+export interface Item {
+  item_id: number;
   name: string;
+  collection_id: number;
+  count?: number;
+  svg?: string;
 }
 
 // Function to handle API errors
@@ -174,13 +178,15 @@ export interface Collection {
   user_id: number;
   creator_username: string;
   creator_display_name: string | null;
-  items: CollectionItem[];
   type: string;
-  item_count?: number;
+  // List endpoints carry a count and the first few names, not the items;
+  // fetchItemsForCollection loads the items themselves
+  item_count: number;
+  preview_items: string[];
   isSubscribed?: boolean;
 }
 
-interface CollectionItem {
+export interface CollectionItem {
   name: string;
   svg?: string;
   count?: number;
@@ -228,7 +234,7 @@ export const createCollection = async (
 export const updateCollection = async (
   collectionId: number,
   name: string,
-  description: string,
+  items: CollectionItem[],
   category: string,
   isPublic: boolean,
   getAccessTokenSilently: () => Promise<string>,
@@ -240,7 +246,7 @@ export const updateCollection = async (
       `${API_BASE_URL}/collections/${collectionId}`,
       {
         name,
-        description,
+        items,
         category,
         status: isPublic ? "public" : "private",
       },
@@ -299,7 +305,7 @@ export const saveCollection = async (
       {
         user_id: username,
         name: collectionName,
-        description: JSON.stringify(collectionData),
+        items: collectionData,
         status: visibility,
         category,
         type,
@@ -340,17 +346,40 @@ export const createCollectionFromForm = async (
   }
 };
 
-// Function to fetch public collections
-export const fetchPublicCollections = async () => {
+// One page of a keyset-paginated list. nextCursor fetches the page after
+// it, and is null on the last page.
+export interface Page<T> {
+  results: T[];
+  nextCursor: string | null;
+}
+
+const fetchPage = async <T>(
+  url: string,
+  params: Record<string, string | number>,
+  cursor?: string,
+): Promise<Page<T>> => {
+  const response = await axios.get<T[]>(url, {
+    params: cursor ? { ...params, cursor } : params,
+  });
+  return {
+    results: response.data,
+    nextCursor: response.headers["x-next-cursor"] || null,
+  };
+};
+
+// Function to fetch one page of public collections, newest first
+export const fetchPublicCollections = async (cursor?: string) => {
   try {
-    const response = await axios.get<Collection[]>(
+    const page = await fetchPage<Collection>(
       `${API_BASE_URL}/collections/public`,
+      { limit: 50 },
+      cursor,
     );
 
     // Log the response to verify creator information
-    console.log("Fetched public collections:", response.data);
+    console.log("Fetched public collections:", page.results);
 
-    return response.data;
+    return page;
   } catch (error) {
     console.error("Error fetching public collections:", error);
     if (axios.isAxiosError(error)) {
@@ -407,16 +436,25 @@ export const duplicateCollection = async (
   getAccessTokenSilently: () => Promise<string>,
 ) => {
   const newCollectionName = `${collectionToDuplicate.name} Copy`;
-  const newCollection = {
-    name: newCollectionName,
-    description: collectionToDuplicate.description,
-    category: collectionToDuplicate.category,
-    status: "private",
-    user_id: collectionToDuplicate.user_id,
-  };
 
   try {
     const token = await getAccessTokenSilently();
+    const items = await fetchItemsForCollection(
+      collectionToDuplicate.collection_id,
+      token,
+    );
+    const newCollection = {
+      name: newCollectionName,
+      description: collectionToDuplicate.description,
+      category: collectionToDuplicate.category,
+      status: "private",
+      user_id: collectionToDuplicate.user_id,
+      items: (items || []).map(({ name, count, svg }) => ({
+        name,
+        count,
+        svg,
+      })),
+    };
     const response = await axios.post(
       `${API_BASE_URL}/collections`,
       newCollection,
@@ -481,21 +519,18 @@ export const subscribeToCollection = async (
   }
 };
 
+// Best matches first; pass nextCursor back for more results. The search
+// matches collection names and creators alike.
 export const searchPublicCollections = async (
   query: string,
-  searchType: "name" | "creator" = "name",
+  cursor?: string,
 ) => {
   try {
-    const response = await axios.get<Collection[]>(
+    return await fetchPage<Collection>(
       `${API_BASE_URL}/collections/search`,
-      {
-        params: {
-          query,
-          searchType,
-        },
-      },
+      { query, limit: 50 },
+      cursor,
     );
-    return response.data;
   } catch (error) {
     handleApiError(error);
   }
@@ -1,10 +1,11 @@
 import React, { useRef, useEffect, useState } from "react";
 import { useAuth0 } from "@auth0/auth0-react";
-import { subscribeToCollection, Collection } from "../api";
+import { subscribeToCollection, Collection, CollectionItem } from "../api";
 import { useTheme } from "../context/ThemeContext";
 
 interface CollectionPreviewModalProps {
-  collection: Collection;
+  // With its items loaded; list endpoints only return item_count
+  collection: Collection & { items: CollectionItem[] };
   onClose: () => void;
   isSubscribed: boolean;
   onSubscribe?: (collectionId: string) => void;
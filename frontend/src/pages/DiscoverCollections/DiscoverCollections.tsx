@@ -4,6 +4,7 @@ import {
   searchPublicCollections,
   getCurrentUser,
   checkSubscriptionsBatch,
+  fetchItemsForCollection,
 } from "../../api";
 import CollectionPreviewModal from "../../components/CollectionPreviewModal";
 import { AxiosError } from "axios";
@@ -26,9 +27,10 @@ interface Item {
   count?: number;
 }
 
-interface Collection extends Omit<APICollection, "items"> {
+// items is filled in when a collection is previewed; the feed only
+// carries item_count and preview_items
+interface Collection extends APICollection {
   items: Item[];
-  item_count?: number;
 }
 
 const DiscoverCollections: React.FC = () => {
@@ -84,8 +86,12 @@ const DiscoverCollections: React.FC = () => {
   const [isTourRunning, setIsTourRunning] = useState<boolean>(false);
   const [currentTourStep, setCurrentTourStep] = useState<number>(0);
   const [userDisplayName, setUserDisplayName] = useState<string>("");
-  const [searchType, setSearchType] = useState<"name" | "creator">("name");
   const [isLoading, setIsLoading] = useState(true);
+  // Cursor for the page after the last one shown, null when there is none
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  // The search the shown results came from, null for the public feed
+  const [activeQuery, setActiveQuery] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   // Define the steps variable
   const steps = tourStepsDiscoverCollections(visibilityStates); // Create tour steps based on visibility states
@@ -125,25 +131,30 @@ const DiscoverCollections: React.FC = () => {
     setIsTourRunning(false); // Reset the tour running state
   };
 
-  const fetchCollections = useCallback(async () => {
-    setIsLoading(true);
-    try {
-      const fetchedCollections = await fetchPublicCollections();
-      const collectionsWithItems =
-        fetchedCollections?.map((collection) => ({
-          ...collection,
-          items: parseDescription(collection.description),
-        })) || [];
-
-      // Batch check subscriptions
-      const collectionIds = collectionsWithItems.map((c) => c.collection_id);
+  // Subscriptions are checked for each page as it arrives
+  const withSubscriptions = useCallback(
+    async (page: APICollection[]) => {
+      const collectionsWithItems = page.map((collection) => ({
+        ...collection,
+        items: [],
+      }));
       const subscriptionResults = await checkSubscriptionsBatch(
-        collectionIds,
+        collectionsWithItems.map((c) => c.collection_id),
         getAccessTokenSilently,
       );
+      setSubscriptionStatus((prev) => ({ ...prev, ...subscriptionResults }));
+      return collectionsWithItems;
+    },
+    [getAccessTokenSilently],
+  );
 
-      setSubscriptionStatus(subscriptionResults);
-      setCollections(collectionsWithItems);
+  const fetchCollections = useCallback(async () => {
+    setIsLoading(true);
+    try {
+      const page = await fetchPublicCollections();
+      setCollections(await withSubscriptions(page.results));
+      setNextCursor(page.nextCursor);
+      setActiveQuery(null);
     } catch (error) {
       console.error("Error fetching public collections:", error);
       if (axios.isAxiosError(error)) {
@@ -157,31 +168,30 @@ const DiscoverCollections: React.FC = () => {
     } finally {
       setIsLoading(false);
     }
-  }, [getAccessTokenSilently]);
+  }, [withSubscriptions]);
 
-  useEffect(() => {
-    fetchCollections();
-  }, [fetchCollections]);
-
-  const parseDescription = (description: string): Item[] => {
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
     try {
-      return JSON.parse(description).map(
-        (
-          item: { name: string; svg?: string; count?: number },
-          index: number,
-        ) => ({
-          id: index,
-          name: item.name,
-          svg: item.svg,
-          count: item.count,
-        }),
-      );
-    } catch {
-      // If parsing fails, treat the description as a single item
-      return [{ id: 0, name: description }];
+      const page = activeQuery
+        ? await searchPublicCollections(activeQuery, nextCursor)
+        : await fetchPublicCollections(nextCursor);
+      if (!page) return;
+      const more = await withSubscriptions(page.results);
+      setCollections((prev) => [...prev, ...more]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error("Error loading more collections:", error);
+    } finally {
+      setIsLoadingMore(false);
     }
   };
 
+  useEffect(() => {
+    fetchCollections();
+  }, [fetchCollections]);
+
   // Group collections by category
   const groupedCollections = collections.reduce(
     (acc, collection) => {
@@ -204,16 +214,10 @@ const DiscoverCollections: React.FC = () => {
 
     try {
       console.log("Searching collections");
-      const searchResults = await searchPublicCollections(
-        searchQuery,
-        searchType,
-      );
-      const processedResults =
-        searchResults?.map((collection) => ({
-          ...collection,
-          items: JSON.parse(collection.description),
-        })) || [];
-      setCollections(processedResults);
+      const page = await searchPublicCollections(searchQuery);
+      setCollections(await withSubscriptions(page?.results || []));
+      setNextCursor(page?.nextCursor || null);
+      setActiveQuery(searchQuery);
     } catch (err) {
       const error = err as AxiosError;
       console.error("Error searching collections:", error);
@@ -228,10 +232,22 @@ const DiscoverCollections: React.FC = () => {
 
   const openModal = async (collection: APICollection) => {
     console.log("Opening collection preview");
-    const parsedCollection: Collection = {
-      ...collection,
-      items: parseDescription(collection.description),
-    };
+    let items: Item[] = [];
+    try {
+      const token = await getAccessTokenSilently();
+      const fetchedItems =
+        (await fetchItemsForCollection(collection.collection_id, token)) || [];
+      items = fetchedItems.map((item) => ({
+        id: item.item_id,
+        name: item.name,
+        svg: item.svg,
+        count: item.count,
+      }));
+    } catch (error) {
+      console.error("Error loading collection items:", error);
+      return;
+    }
+    const parsedCollection: Collection = { ...collection, items };
 
     // Use the subscription status from the state
     const isSubscribed = subscriptionStatus[collection.collection_id] || false;
@@ -324,27 +340,12 @@ const DiscoverCollections: React.FC = () => {
       {user && <p className="inherit mb-4">Welcome, {userDisplayName}</p>}
       <div className="mb-4 w-full max-w-md">
         <div className="flex flex-col items-center justify-center gap-2 sm:flex-row sm:items-center">
-          <select
-            value={searchType}
-            onChange={(e) =>
-              setSearchType(e.target.value as "name" | "creator")
-            }
-            className={`rounded-md border border-black p-2 ${
-              theme.isDarkMode
-                ? "bg-gray-700 text-white"
-                : "bg-white text-black"
-            }`}
-            aria-label="Search type selector"
-          >
-            <option value="name">Search by Name</option>
-            <option value="creator">Search by Creator</option>
-          </select>
           <input
             type="text"
             value={searchQuery}
             onChange={(e) => setSearchQuery(e.target.value)}
             onKeyDown={handleKeyDown}
-            placeholder={`Search by ${searchType === "name" ? "collection name" : "creator"}`}
+            placeholder="Search by collection name or creator"
             className={`search-collections-input rounded-md border border-black p-2 ${
               theme.isDarkMode
                 ? "bg-gray-700 text-white"
@@ -411,8 +412,7 @@ const DiscoverCollections: React.FC = () => {
                     const lightColor = baseColor
                       ? lightenColor(baseColor, 0.7)
                       : "";
-                    const itemCount =
-                      collection.item_count ?? collection.items?.length ?? 0;
+                    const itemCount = collection.item_count;
                     return (
                       <div
                         key={collection.collection_id}
@@ -480,6 +480,22 @@ const DiscoverCollections: React.FC = () => {
               </div>
             ),
           )}
+          {nextCursor && (
+            <div className="flex justify-center">
+              <button
+                type="button"
+                onClick={loadMore}
+                disabled={isLoadingMore}
+                className={`rounded-md border border-black px-4 py-2 font-bold ${
+                  theme.isDarkMode
+                    ? "bg-gray-700 text-white"
+                    : "bg-green-500 text-white"
+                }`}
+              >
+                {isLoadingMore ? "Loading..." : "Load More"}
+              </button>
+            </div>
+          )}
         </div>
       )}
       {activeCollection && (
@@ -17,14 +17,10 @@ interface Collection {
   category: string;
   user_id: number;
   creator_username: string;
-  items: Item[];
+  item_count: number;
   type: string;
 }
 
-interface Item {
-  name: string;
-}
-
 const TimedChallenges: React.FC = () => {
   const { getAccessTokenSilently } = useAuth0();
   const [collections, setCollections] = useState<Collection[]>([]); // State to hold collections
@@ -98,8 +94,7 @@ const TimedChallenges: React.FC = () => {
           <ul className="inherit">
             {collections.map((collection: Collection) => (
               <li key={collection.collection_id} className="inherit">
-                {collection.name} - {getItemsCount(collection.description)}{" "}
-                items
+                {collection.name} - {collection.item_count} items
               </li>
             ))}
           </ul>
@@ -117,16 +112,4 @@ const TimedChallenges: React.FC = () => {
   );
 };
 
-// Helper function to count items in a collection description
-const getItemsCount = (description: string | undefined): number => {
-  if (!description) return 0;
-  try {
-    const items = JSON.parse(description);
-    return Array.isArray(items) ? items.length : 0;
-  } catch {
-    console.error("Error parsing description:", description);
-    return 0;
-  }
-};
-
 export default TimedChallenges;
@@ -1,10 +1,18 @@
-import React, { useState, useEffect, useRef, useCallback } from "react";
+import React, {
+  useState,
+  useEffect,
+  useRef,
+  useCallback,
+  useMemo,
+} from "react";
 import { useNavigate } from "react-router-dom";
 import {
   fetchCollections,
+  fetchItemsForCollection,
   deleteCollectionById,
   duplicateCollection,
   updateCollection,
+  Item,
 } from "../../api";
 import { useAuth0 } from "@auth0/auth0-react";
 import SessionSettingsModal from "../../components/SessionSettingsModal";
@@ -35,52 +43,13 @@ interface Collection {
   user_id: number;
   creator_username: string;
   creator_display_name: string;
-  items: Item[];
+  item_count: number;
+  preview_items: string[];
   type: string;
   status: string;
   is_public: boolean;
 }
 
-interface Item {
-  name: string;
-}
-
-const getItemsCount = (description: string | undefined): number => {
-  if (!description) return 0;
-  try {
-    const items = JSON.parse(description);
-    return Array.isArray(items) ? items.length : 0;
-  } catch {
-    console.error("Error parsing description:", description);
-    return 0;
-  }
-};
-
-const parseDescription = (
-  description: string,
-): { name: string; id?: number; svg?: string; count?: number }[] => {
-  try {
-    const parsed = JSON.parse(description);
-    return Array.isArray(parsed)
-      ? parsed.map((item, index) => ({
-          name:
-            typeof item === "object" && item !== null
-              ? item.name
-              : String(item),
-          id:
-            typeof item === "object" && item !== null && "id" in item
-              ? item.id
-              : index,
-          svg: typeof item === "object" && item !== null ? item.svg : undefined,
-          count:
-            typeof item === "object" && item !== null ? item.count : undefined,
-        }))
-      : [];
-  } catch {
-    return [{ name: description }];
-  }
-};
-
 declare global {
   interface Window {
     savePreferenceTimeout: ReturnType<typeof setTimeout> | null;
@@ -103,6 +72,12 @@ const YourCollections: React.FC = () => {
   const [showModal, setShowModal] = useState<boolean>(false);
   const [selectedCollection, setSelectedCollection] =
     useState<Collection | null>(null);
+  // Items of the collection being edited; lists only carry item_count
+  const [selectedItems, setSelectedItems] = useState<Item[]>([]);
+  const editableItems = useMemo(
+    () => selectedItems.map((item) => ({ name: item.name, id: item.item_id })),
+    [selectedItems],
+  );
   const [isLoading, setIsLoading] = useState<boolean>(false);
   const modalRef = useRef<HTMLDivElement | null>(null);
   const { theme, adjustColorForColorblindness } = useTheme();
@@ -278,23 +253,37 @@ const YourCollections: React.FC = () => {
     setIsLoading(true);
     try {
       if (selectedCollection) {
+        // Edited names keep the picture and count of the item they came from
+        const originals = new Map(
+          selectedItems.map((item) => [item.item_id, item]),
+        );
         const filteredItems = newItems
           .filter((item) => String(item.name).trim() !== "")
-          .map((item) => ({
-            name: String(item.name),
-            id: item.id,
-          }));
-
-        const updatedDescription = JSON.stringify(filteredItems);
+          .map((item) => {
+            const original =
+              item.id !== undefined ? originals.get(item.id) : undefined;
+            return {
+              name: String(item.name),
+              svg: original?.svg,
+              count: original?.count,
+            };
+          });
 
-        const updatedCollection = await updateCollection(
+        const savedCollection = await updateCollection(
           selectedCollection.collection_id,
           newCollectionName,
-          updatedDescription,
+          filteredItems,
           selectedCollection.category,
           isPublic,
           getAccessTokenSilently,
         );
+        // The update returns the bare row, without the list summary fields
+        const updatedCollection: Collection = {
+          ...selectedCollection,
+          ...savedCollection,
+          item_count: filteredItems.length,
+          preview_items: filteredItems.slice(0, 5).map((item) => item.name),
+        };
 
         // Update both collections and filteredCollections
         setCollections((prevCollections) =>
@@ -334,9 +323,19 @@ const YourCollections: React.FC = () => {
     }
   };
 
-  const handleEditButtonClick = (collection: Collection) => {
+  const loadItems = async (collectionId: number): Promise<Item[]> => {
+    const token = await getAccessTokenSilently();
+    return (await fetchItemsForCollection(collectionId, token)) || [];
+  };
+
+  const handleEditButtonClick = async (collection: Collection) => {
     setSelectedCollection(collection);
-    setEditModalOpen(true);
+    try {
+      setSelectedItems(await loadItems(collection.collection_id));
+      setEditModalOpen(true);
+    } catch (error) {
+      console.error("Error loading collection items:", error);
+    }
   };
 
   const handleDuplicateConfirm = async (collection: Collection) => {
@@ -382,7 +381,7 @@ const YourCollections: React.FC = () => {
     }
   };
 
-  const handleStartSession = (
+  const handleStartSession = async (
     min: number,
     sec: number,
     shuffle: boolean,
@@ -399,19 +398,19 @@ const YourCollections: React.FC = () => {
       localStorage.setItem("lastUsedSeconds", sec.toString());
       localStorage.setItem("lastUsedSpeed", speed.toString());
 
-      const sequenceItems = JSON.parse(selectedCollection.description || "[]");
-      const sequence = sequenceItems.map(
-        (
-          item: { name: string; svg?: string; count?: number } | string,
-          index: number,
-        ) => ({
-          name: typeof item === "object" ? item.name : item,
-          svg: typeof item === "object" ? item.svg : undefined,
-          count: typeof item === "object" ? item.count : undefined,
-          isAnswer:
-            selectedCollection.type === "mathProblems" && index % 2 !== 0,
-        }),
-      );
+      let sequenceItems: Item[];
+      try {
+        sequenceItems = await loadItems(selectedCollection.collection_id);
+      } catch (error) {
+        console.error("Error loading collection items:", error);
+        return;
+      }
+      const sequence = sequenceItems.map((item, index) => ({
+        name: item.name,
+        svg: item.svg,
+        count: item.count,
+        isAnswer: selectedCollection.type === "mathProblems" && index % 2 !== 0,
+      }));
 
       navigate("/fullscreen-display", {
         state: {
@@ -698,7 +697,7 @@ const YourCollections: React.FC = () => {
           isOpen={isEditModalOpen}
           onClose={() => setEditModalOpen(false)}
           collectionName={selectedCollection.name}
-          items={parseDescription(selectedCollection.description)}
+          items={editableItems}
           onSave={handleSaveUpdatedItems}
           type={selectedCollection.type}
           isPublic={selectedCollection.status === "public"}
@@ -746,7 +745,7 @@ const CollectionContent: React.FC<CollectionContentProps> = ({
   formatDate,
   theme,
 }) => {
-  const itemCount = getItemsCount(collection.description);
+  const itemCount = collection.item_count;
 
   const getCategoryColor = (category: string) => {
     const color = categoryColors[category as keyof typeof categoryColors];